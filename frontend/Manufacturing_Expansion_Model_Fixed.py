@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 import json
 import os
+from perf import stage, start_run, finish_run, render_panel
 
 SAVE_FILE = "financial_model_debug.json"
 
@@ -56,15 +57,16 @@ def manufacturing_expansion_app():
     st.title("Debug Mode: Manufacturing Expansion Financial Model")
 
     st.sidebar.header("User Inputs")
+    start_run(trace_memory=True)
 
     # Load saved data if available
-    saved_data = load_model()
+    with stage("load_model"):
+        saved_data = load_model()
     equipment_list = saved_data["equipment"]
     product_list = saved_data["products"]
 
-    # Debugging - Show loaded data
-    st.subheader("🔍 Debug Info: Loaded Data")
-    st.json(saved_data)
+    # Debugging - Summarize loaded data (stage timings are in the sidebar panel)
+    st.caption(f"🔍 Loaded {len(equipment_list)} equipment items and {len(product_list)} products from {SAVE_FILE}")
 
     # User Input Fields
     initial_revenue = st.sidebar.number_input("Initial Annual Revenue ($)", min_value=1000000, value=5000000, step=100000)
@@ -128,34 +130,38 @@ def manufacturing_expansion_app():
     years = np.arange(2025, 2030)
 
     # Compute Revenue, Cost, and Utilization based on product ramp-up
-    revenue_forecast, cost_forecast, total_production = [], [], []
+    with stage("forecast"):
+        revenue_forecast, cost_forecast, total_production = [], [], []
 
-    for year_idx in range(len(years)):
-        yearly_revenue, yearly_cost, yearly_production = 0, 0, 0
+        for year_idx in range(len(years)):
+            yearly_revenue, yearly_cost, yearly_production = 0, 0, 0
 
-        for product in product_list:
-            units_produced = product["Initial Units"] * (1 + product["Growth Rate"]) ** year_idx
-            yearly_revenue += units_produced * product["Unit Price"]
-            yearly_cost += units_produced * product["Unit Cost"]
-            yearly_production += units_produced
+            for product in product_list:
+                units_produced = product["Initial Units"] * (1 + product["Growth Rate"]) ** year_idx
+                yearly_revenue += units_produced * product["Unit Price"]
+                yearly_cost += units_produced * product["Unit Cost"]
+                yearly_production += units_produced
 
-        revenue_forecast.append(yearly_revenue)
-        cost_forecast.append(yearly_cost)
-        total_production.append(yearly_production)
+            revenue_forecast.append(yearly_revenue)
+            cost_forecast.append(yearly_cost)
+            total_production.append(yearly_production)
 
-    # Equipment Utilization
-    total_capacity = sum([eq["Max Capacity"] for eq in equipment_list]) if equipment_list else 1  # Avoid zero division
-    utilization_rate = [(total_production[i] / total_capacity) * 100 if total_capacity > 0 else 0 for i in range(len(years))]
+        # Equipment Utilization
+        total_capacity = sum([eq["Max Capacity"] for eq in equipment_list]) if equipment_list else 1  # Avoid zero division
+        utilization_rate = [(total_production[i] / total_capacity) * 100 if total_capacity > 0 else 0 for i in range(len(years))]
 
     # Debugging - Show calculated forecasts
-    st.subheader("🔍 Debug Info: Revenue, Cost, and Utilization Forecasts")
-    debug_data = pd.DataFrame({
-        "Year": years,
-        "Revenue": revenue_forecast,
-        "Costs": cost_forecast,
-        "Equipment Utilization (%)": utilization_rate
-    })
-    st.dataframe(debug_data)
+    with stage("rendering"):
+        st.subheader("🔍 Debug Info: Revenue, Cost, and Utilization Forecasts")
+        debug_data = pd.DataFrame({
+            "Year": years,
+            "Revenue": revenue_forecast,
+            "Costs": cost_forecast,
+            "Equipment Utilization (%)": utilization_rate
+        })
+        st.dataframe(debug_data)
+
+    render_panel(finish_run())
 
 if __name__ == "__main__":
     manufacturing_expansion_app()
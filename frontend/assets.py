@@ -0,0 +1,48 @@
+import numpy as np
+
+# Asset lifecycle of every machine over any horizon. A machine is bought in its
+# Purchase Year (default: the first forecast year) and replaced like for like
+# whenever its Useful Life runs out; the replaced unit is sold for its salvage
+# value. Depreciation is straight line to salvage value, and maintenance grows
+# with the age of the unit in service:
+#
+#   maintenance = Cost x Maintenance Rate x (1 + Maintenance Growth) ^ age
+#
+# Machines purchased before the horizon start mid-cycle at their age. All
+# schedules are (..., machines, periods) arrays computed in one pass.
+
+ASSET_FIELDS = {  # equipment field: default
+    "Purchase Year": np.nan,
+    "Salvage Rate": 0.0,
+    "Maintenance Rate": 0.0,
+    "Maintenance Growth": 0.0,
+}
+ASSET_KEYS = {field: "asset_" + field.lower().replace(" ", "_") for field in ASSET_FIELDS}
+
+
+def asset_schedule(compiled, years):
+    years = np.asarray(years, dtype=np.float64)
+    cost = compiled["equipment_cost"][..., None]
+    life = np.maximum(np.round(compiled["equipment_life"]), 1.0)[..., None]
+    purchase = compiled["asset_purchase_year"]
+    purchase = np.where(np.isnan(purchase), years[0], purchase)[..., None]
+    salvage = cost * compiled["asset_salvage_rate"][..., None]
+
+    elapsed = years - purchase
+    in_service = elapsed >= 0
+    age = np.where(in_service, np.mod(elapsed, life), 0.0)
+    cycle_start = in_service & (age == 0)
+    replaced = cycle_start & (elapsed > 0)
+    yearly_depreciation = (cost - salvage) / life
+
+    maintenance = cost * compiled["asset_maintenance_rate"][..., None] * (1 + compiled["asset_maintenance_growth"][..., None]) ** age
+    return {
+        "in_service": in_service,
+        "age": age,
+        "capex": np.where(cycle_start, cost, 0.0),
+        "replacements": replaced,
+        "salvage": np.where(replaced, salvage, 0.0),
+        "depreciation": np.where(in_service, yearly_depreciation, 0.0),
+        "maintenance": np.where(in_service, maintenance, 0.0),
+        "book_value": np.where(in_service, cost - yearly_depreciation * (age + 1), 0.0),  # End of period
+    }
@@ -0,0 +1,120 @@
+import numpy as np
+
+# Multi-level bills of materials. The BOM nodes are the model's products
+# followed by its purchased materials; an edge says one unit of the parent
+# consumes quantity units of the child. With A the node x node quantity matrix
+#
+#   rolled unit cost  c = (I - A)^-1 own cost      (bottom-up)
+#   requirements      r = (I - A^T)^-1 demand      (top-down)
+#
+# The inverse is never formed. A is kept as edge lists (parent, child,
+# quantity) and the series I + A + A^2 + ... is summed one BOM level at a time
+# with a scatter-add over that level's edges. Edges are compiled sorted by the
+# level of their parent (leaves are level 0), so each pass only slices them.
+# Quantities may carry leading scenario axes; the structure is shared.
+
+
+# Level of every node: 0 for nodes without components, otherwise one more
+# than its deepest component. Raises ValueError when the BOM has a cycle.
+def bom_levels(parent, child, n_nodes):
+    level = np.zeros(n_nodes, dtype=np.int64)
+    for _ in range(n_nodes + 1):
+        deeper = level.copy()
+        np.maximum.at(deeper, parent, level[child] + 1)
+        if np.array_equal(deeper, level):
+            return level
+        level = deeper
+    raise ValueError("The bill of materials has a cycle: a product contains itself")
+
+
+# Edge lists sorted by parent level, ready to store with the compiled model
+def compile_bom(parent, child, quantity, n_nodes):
+    parent, child = np.asarray(parent, dtype=np.int64), np.asarray(child, dtype=np.int64)
+    level = bom_levels(parent, child, n_nodes)[parent]
+    order = np.argsort(level, kind="stable")
+    return {"bom_parent": parent[order], "bom_child": child[order],
+            "bom_quantity": np.asarray(quantity, dtype=np.float64)[..., order], "bom_level": level[order]}
+
+
+def has_bom(compiled):
+    return "bom_parent" in compiled and len(compiled["bom_parent"]) > 0
+
+
+# Slices of the (level-sorted) edges belonging to parents of each level
+def _level_slices(edge_level):
+    bounds = np.searchsorted(edge_level, np.arange(1, edge_level[-1] + 2)) if len(edge_level) else [0]
+    return [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _start(values, quantity):
+    values = np.asarray(values, dtype=np.float64)
+    shape = np.broadcast_shapes(values.shape[:-1], quantity.shape[:-1]) + values.shape[-1:]
+    return np.broadcast_to(values, shape).copy()
+
+
+# Bottom-up: every node's own amount plus its components' rolled amounts times
+# their quantities. values is (..., nodes); quantity defaults to the compiled one
+def roll_up(compiled, values, quantity=None):
+    parent, child = compiled["bom_parent"], compiled["bom_child"]
+    quantity = compiled["bom_quantity"] if quantity is None else quantity
+    rolled = _start(values, quantity)
+    for edges in _level_slices(compiled["bom_level"]):
+        np.add.at(rolled, (Ellipsis, parent[edges]), quantity[..., edges] * rolled[..., child[edges]])
+    return rolled
+
+
+# Top-down: the external demand of every node plus what its parents consume.
+# demand is (..., nodes).
+def explode(compiled, demand, quantity=None):
+    parent, child = compiled["bom_parent"], compiled["bom_child"]
+    quantity = compiled["bom_quantity"] if quantity is None else quantity
+    required = _start(demand, quantity)
+    for edges in reversed(_level_slices(compiled["bom_level"])):
+        np.add.at(required, (Ellipsis, child[edges]), quantity[..., edges] * required[..., parent[edges]])
+    return required
+
+
+# Product values followed by material values on one node axis
+def _nodes(product_values, material_values):
+    shape = np.broadcast_shapes(product_values.shape[:-1], np.shape(material_values)[:-1])
+    return np.concatenate([np.broadcast_to(product_values, shape + product_values.shape[-1:]),
+                           np.broadcast_to(material_values, shape + np.shape(material_values)[-1:])], axis=-1)
+
+
+# Rolled unit cost per product from each product's own cost (entered Unit Cost
+# or cost drivers) and the material prices. product_cost is (..., products),
+# or (..., products, years) with by_year; material_cost defaults to the
+# compiled prices and may be (..., materials, years) with by_year.
+def rolled_unit_cost(compiled, product_cost, by_year=False, material_cost=None):
+    n_products = product_cost.shape[-2 if by_year else -1]
+    if not by_year:
+        material_cost = compiled["material_cost"] if material_cost is None else material_cost
+        return roll_up(compiled, _nodes(product_cost, material_cost))[..., :n_products]
+    material_cost = compiled["material_cost"][..., None, :] if material_cost is None else np.swapaxes(material_cost, -1, -2)
+    values = _nodes(np.swapaxes(product_cost, -1, -2), material_cost)
+    rolled = roll_up(compiled, values, compiled["bom_quantity"][..., None, :])
+    return np.swapaxes(rolled[..., :n_products], -1, -2)
+
+
+# Units to make of every product and to buy of every material per year, from
+# product sales (..., products, years)
+def requirements(compiled, units):
+    n_products = units.shape[-2]
+    demand = _nodes(np.swapaxes(units, -1, -2), np.zeros(compiled["material_cost"].shape[-1]))
+    required = np.swapaxes(explode(compiled, demand, compiled["bom_quantity"][..., None, :]), -1, -2)
+    return required[..., :n_products, :], required[..., n_products:, :]
+
+
+# Units of one node contained in one unit of every node: a column of
+# (I - A)^-1, found by rolling up a cost of 1 on that node alone
+def where_used(compiled, node):
+    values = np.zeros(len(compiled["product_names"]) + len(compiled["material_names"]))
+    values[node] = 1.0
+    return roll_up(compiled, values)
+
+
+# Incremental update of rolled costs (..., nodes) after one node's own cost
+# changes by delta (a scalar or one value per scenario); only the node and
+# the products that use it move
+def reprice(rolled, usage, delta):
+    return rolled + np.multiply.outer(delta, usage)
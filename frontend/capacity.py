@@ -0,0 +1,79 @@
+import numpy as np
+from catalog_editor import LABOR_ROLES
+
+# Machine capacity in available hours per period from each machine's shift
+# calendar and OEE:
+#
+#   scheduled = working days x shifts per day x hours per shift - maintenance
+#   available = scheduled x availability x performance x quality
+#
+# Working days are counted from the calendar of each year (weekdays for a
+# 5-day week, Monday-Saturday for 6 days, every day for 7) less holidays.
+
+CALENDAR_FIELDS = {  # equipment field: default
+    "Shifts Per Day": 1,
+    "Hours Per Shift": 8,
+    "Days Per Week": 5,
+    "Holidays": 10,
+    "Maintenance Hours": 0,
+    "Availability": 1.0,
+    "Performance": 1.0,
+    "Quality": 1.0,
+}
+CALENDAR_KEYS = {field: "calendar_" + field.lower().replace(" ", "_") for field in CALENDAR_FIELDS}
+
+WEEKMASKS = {5: "1111100", 6: "1111110", 7: "1111111"}
+
+
+def working_days(years, days_per_week):
+    days = np.empty((len(days_per_week), len(years)))
+    for pattern in np.unique(days_per_week):
+        weekmask = WEEKMASKS[int(np.clip(pattern, 5, 7))]
+        counts = np.busday_count([f"{year}-01-01" for year in years], [f"{year + 1}-01-01" for year in years], weekmask=weekmask)
+        days[days_per_week == pattern] = counts
+    return days
+
+
+# Available hours per machine x year. calendar maps CALENDAR_KEYS values to
+# per-machine arrays; machines share the working-day count of their pattern.
+def capacity_table(calendar, years):
+    years = [int(year) for year in years]
+    days = working_days(years, calendar["calendar_days_per_week"])
+    days = np.maximum(days - calendar["calendar_holidays"][:, None], 0)
+    scheduled = days * calendar["calendar_shifts_per_day"][:, None] * calendar["calendar_hours_per_shift"][:, None]
+    scheduled = np.maximum(scheduled - calendar["calendar_maintenance_hours"][:, None], 0)
+    oee = calendar["calendar_availability"] * calendar["calendar_performance"] * calendar["calendar_quality"]
+    return scheduled * oee[:, None]
+
+
+# Capacity table for the forecast years: the one compiled with the model when
+# the years match, so sweeps and simulations only look it up
+def available_hours(compiled, years):
+    table = compiled["capacity_hours"]
+    if table.shape[-1] == len(years) and np.array_equal(compiled["capacity_years"], years):
+        return table
+    return capacity_table({key: compiled[key] for key in CALENDAR_KEYS.values()}, years)
+
+
+# Hours worked per machine x year; equipment drivers follow the labor roles on
+# the driver axis (see model_store.compile_model)
+def machine_hours(results, n_equipment):
+    return results["driver_load"][..., len(LABOR_ROLES):len(LABOR_ROLES) + n_equipment, :]
+
+
+def machine_utilization(hours, capacity):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(capacity > 0, hours / capacity * 100, np.nan)
+
+
+# Utilization of the busiest machine per year; machines without capacity count as idle
+def peak_utilization(utilization):
+    return np.max(np.nan_to_num(utilization, nan=0.0), axis=-2, initial=0.0)
+
+
+# Machine hours and utilization (..., machines, years) for a forecast; the
+# forecast's capacity only counts machines in service (see assets.py)
+def machine_load(compiled, results):
+    hours = machine_hours(results, compiled["capacity_hours"].shape[-2])
+    capacity = results["capacity_hours"] if "capacity_hours" in results else available_hours(compiled, results["years"])
+    return hours, machine_utilization(hours, capacity)
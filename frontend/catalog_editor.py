@@ -0,0 +1,268 @@
+import uuid
+import numpy as np
+import pandas as pd
+from bom import bom_levels
+
+# Optional shift calendar and OEE per machine (see capacity.CALENDAR_FIELDS)
+CALENDAR_COLUMNS = ["Shifts Per Day", "Hours Per Shift", "Days Per Week", "Holidays", "Maintenance Hours",
+                    "Availability", "Performance", "Quality"]
+
+# Optional replacement, salvage and maintenance profile per machine (see assets.ASSET_FIELDS)
+ASSET_COLUMNS = ["Purchase Year", "Salvage Rate", "Maintenance Rate", "Maintenance Growth"]
+
+# Optional power draw and first shift start per machine (see energy.ENERGY_FIELDS)
+ENERGY_COLUMNS = ["Power kW", "Idle kW", "Shift Start"]
+
+EQUIPMENT_COLUMNS = ["ID", "Name", "Cost", "Useful Life", "Max Capacity", "Financing"] + CALENDAR_COLUMNS + ENERGY_COLUMNS + ASSET_COLUMNS
+# Optional product lifecycle profile (see financial_engine.lifecycle_curves)
+LIFECYCLE_OPTIONS = ["Compound Growth", "S-Curve", "Custom"]
+LIFECYCLE_COLUMNS = ["Lifecycle", "Launch Year", "Ramp Years", "Plateau Years", "Decline Rate", "End of Life Year", "Custom Curve"]
+
+# Optional batch economics (see lot_sizing); a blank Lot Size means economic lots
+LOT_COLUMNS = ["Lot Size", "Holding Rate"]
+# Optional days outstanding per product (see working_capital); blank = the model-wide days
+WORKING_CAPITAL_COLUMNS = ["Receivable Days", "Inventory Days", "Payable Days"]
+# Optional price elasticity and market cap (see demand.py)
+DEMAND_COLUMNS = ["Reference Price", "Price Elasticity", "Market Size", "Market Growth"]
+
+PRODUCT_COLUMNS = ["ID", "Name", "Initial Units", "Unit Price", "Unit Cost", "Growth Rate"] + LIFECYCLE_COLUMNS + LOT_COLUMNS + \
+                  DEMAND_COLUMNS + WORKING_CAPITAL_COLUMNS
+DRIVER_COLUMNS = ["Product", "Driver", "Cost Per Hour", "Hours Per Unit", "Setup Hours", "Learning Rate", "Reference Units"]
+# Wright's-law learning (see financial_engine.learning_hours) and setup hours per batch
+OPTIONAL_DRIVER_FIELDS = {"Learning Rate", "Reference Units", "Setup Hours"}
+DRIVER_KEY = ["Product", "Driver"]
+# Purchased materials and the bill of materials (see bom.py)
+MATERIAL_COLUMNS = ["ID", "Name", "Unit Cost"]
+BOM_COLUMNS = ["Product", "Component", "Quantity"]
+BOM_KEY = ["Product", "Component"]
+OPTIONAL_COLUMNS = {"Unit Cost", "Financing"} | set(LIFECYCLE_COLUMNS) | set(CALENDAR_COLUMNS) | set(ASSET_COLUMNS) | set(ENERGY_COLUMNS) | set(LOT_COLUMNS) | \
+                   set(DEMAND_COLUMNS) | set(WORKING_CAPITAL_COLUMNS)
+
+# Non-equipment drivers stored at the top level of a product's cost drivers
+LABOR_ROLES = ["Machinist Labor", "Design Labor", "Supervision"]
+
+
+# Stable IDs let grid edits be matched to catalog rows even after renames,
+# reordering or deletes of other rows
+def new_item_id():
+    return uuid.uuid4().hex[:12]
+
+def ensure_ids(items):
+    for item in items:
+        if not item.get("ID"):
+            item["ID"] = new_item_id()
+    return items
+
+
+def catalog_frame(items, columns):
+    frame = pd.DataFrame(items, columns=columns)
+    return frame.astype({col: "string" for col in ["ID", "Name", "Lifecycle", "Custom Curve"] if col in columns})
+
+
+# Custom lifecycle curve "2025: 0.2, 2027: 1.0, 2032: 0.4" as year and volume
+# multiplier lists sorted by year
+def parse_curve(text):
+    points = []
+    for point in str(text).replace(";", ",").split(","):
+        if point.strip():
+            year, _, value = point.partition(":")
+            try:
+                points.append((float(year), float(value)))
+            except ValueError:
+                raise ValueError(f"Invalid curve point '{point.strip()}', expected 'year: multiplier'")
+    if not points:
+        raise ValueError("A custom curve needs at least one 'year: multiplier' point")
+    points.sort()
+    return [year for year, _ in points], [value for _, value in points]
+
+# Problems with the lifecycle fields of a product, as messages
+def lifecycle_errors(product):
+    lifecycle = product.get("Lifecycle")
+    if lifecycle is None:
+        return []
+    if lifecycle not in LIFECYCLE_OPTIONS:
+        return [f"{product.get('Name')}: Lifecycle must be one of {', '.join(LIFECYCLE_OPTIONS)}"]
+    if lifecycle == "Custom":
+        try:
+            parse_curve(product.get("Custom Curve", ""))
+        except ValueError as error:
+            return [f"{product.get('Name')}: {error}"]
+    return []
+
+def drivers_frame(cost_drivers):
+    rows = []
+    for product_name, drivers in cost_drivers.items():
+        for eq_name, values in drivers.get("Equipment Costs", {}).items():
+            rows.append({"Product": product_name, "Driver": eq_name, **values})
+        for role in LABOR_ROLES:
+            if role in drivers:
+                rows.append({"Product": product_name, "Driver": role, **drivers[role]})
+    return pd.DataFrame(rows, columns=DRIVER_COLUMNS)
+
+
+def bom_frame(bom):
+    rows = [{"Product": product, "Component": component, "Quantity": quantity}
+            for product, components in bom.items() for component, quantity in components.items()]
+    return pd.DataFrame(rows, columns=BOM_COLUMNS)
+
+def bom_from_frame(frame):
+    bom = {}
+    for row in frame.dropna(subset=BOM_KEY).to_dict("records"):
+        bom.setdefault(row["Product"], {})[row["Component"]] = _python_value(row["Quantity"]) if not pd.isna(row["Quantity"]) else None
+    return bom
+
+# Problems with a bill of materials, as messages: components must be known
+# products or materials, names must not be shared and no product may contain
+# itself at any level
+def bom_errors(bom, products, materials):
+    product_names, material_names = [p["Name"] for p in products], [m["Name"] for m in materials]
+    problems = [f"'{name}' is both a product and a material" for name in sorted(set(product_names) & set(material_names))]
+    nodes = {name: i for i, name in enumerate(product_names + material_names)}
+    edges = []
+    for product, components in bom.items():
+        for component, quantity in components.items():
+            if product not in product_names:
+                problems.append(f"{product}: not a product")
+            elif component not in nodes:
+                problems.append(f"{product}: unknown component '{component}'")
+            elif not quantity or quantity < 0:
+                problems.append(f"{product}: quantity of '{component}' must be positive")
+            else:
+                edges.append((nodes[product], nodes[component]))
+    try:
+        bom_levels(np.array([e[0] for e in edges], dtype=np.int64), np.array([e[1] for e in edges], dtype=np.int64), len(nodes))
+    except ValueError as error:
+        problems.append(str(error))
+    return problems
+
+
+def _python_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value
+
+def _record(row):
+    return {col: _python_value(val) for col, val in row.items() if not pd.isna(val)}
+
+
+# Compare the original and edited tables on their key columns and return the
+# inserts, updates and deletes needed to turn one into the other
+def diff_frames(original, edited, key):
+    key = [key] if isinstance(key, str) else list(key)
+    value_columns = [col for col in original.columns if col not in key]
+
+    before = original.set_index(key)
+    edited = edited.reset_index(drop=True)
+    # Rows without a key, with a key the original never had, or repeating a
+    # key already seen are inserts
+    unknown_key = ~edited.set_index(key).index.isin(before.index)
+    new_rows = edited[key].isna().any(axis=1) | edited[key].duplicated(keep="first") | unknown_key
+    inserted = [_record(row) for _, row in edited.loc[new_rows].iterrows()]
+
+    after = edited.loc[~new_rows].set_index(key)
+    deleted = before.index.difference(after.index).tolist()
+
+    common = before.index.intersection(after.index)
+    old_values = before.loc[common, value_columns]
+    new_values = after.loc[common, value_columns]
+    changed = (old_values != new_values) & ~(old_values.isna() & new_values.isna())
+    updated = {}
+    for row_key in common[changed.any(axis=1).to_numpy()]:
+        updated[row_key] = _record(new_values.loc[row_key])
+    return {"inserted": inserted, "updated": updated, "deleted": deleted}
+
+def diff_size(diff):
+    return len(diff["inserted"]) + len(diff["updated"]) + len(diff["deleted"])
+
+
+# Apply a grid diff to the equipment, product or material list in place,
+# keeping the cost drivers and BOM consistent with renamed and removed items
+def apply_catalog_diff(catalog, kind, diff):
+    items = catalog[kind]
+    by_id = {item["ID"]: item for item in items}
+    cost_drivers = catalog["cost_drivers"]
+    renames = {}
+
+    for item_id, values in diff["updated"].items():
+        item = by_id[item_id]
+        if values.get("Name") and values["Name"] != item["Name"]:
+            renames[item["Name"]] = values["Name"]
+        # Optional columns cleared in the grid are removed from the record
+        for column in OPTIONAL_COLUMNS & set(item) - set(values):
+            del item[column]
+        item.update(values)
+
+    deleted = set(diff["deleted"])
+    removed = {item["Name"] for item in items if item["ID"] in deleted}
+    items[:] = [item for item in items if item["ID"] not in deleted]
+
+    for values in diff["inserted"]:
+        if values.get("Name"):
+            items.append({**values, "ID": new_item_id()})
+
+    if kind in ("products", "materials"):
+        bom = catalog.setdefault("bom", {})
+        for old_name, new_name in renames.items():
+            if old_name in bom:
+                bom[new_name] = bom.pop(old_name)
+            for components in bom.values():
+                if old_name in components:
+                    components[new_name] = components.pop(old_name)
+        for name in removed:
+            bom.pop(name, None)
+            for components in bom.values():
+                components.pop(name, None)
+
+    if kind == "products":
+        for old_name, new_name in renames.items():
+            if old_name in cost_drivers:
+                cost_drivers[new_name] = cost_drivers.pop(old_name)
+        for name in removed:
+            cost_drivers.pop(name, None)
+    elif kind == "equipment":
+        for drivers in cost_drivers.values():
+            equipment_costs = drivers.get("Equipment Costs", {})
+            for old_name, new_name in renames.items():
+                if old_name in equipment_costs:
+                    equipment_costs[new_name] = equipment_costs.pop(old_name)
+            for name in removed:
+                equipment_costs.pop(name, None)
+
+def _driver_entry(cost_drivers, product_name, driver):
+    drivers = cost_drivers.setdefault(product_name, {"Equipment Costs": {}})
+    if driver in LABOR_ROLES:
+        return drivers.setdefault(driver, {})
+    return drivers.setdefault("Equipment Costs", {}).setdefault(driver, {})
+
+def apply_driver_diff(cost_drivers, diff):
+    for product_name, driver in diff["deleted"]:
+        drivers = cost_drivers.get(product_name, {})
+        if driver in LABOR_ROLES:
+            drivers.pop(driver, None)
+        else:
+            drivers.get("Equipment Costs", {}).pop(driver, None)
+
+    changes = [((product_name, driver), values) for (product_name, driver), values in diff["updated"].items()]
+    changes += [((values.get("Product"), values.get("Driver")), values) for values in diff["inserted"]]
+    for (product_name, driver), values in changes:
+        if not product_name or not driver:
+            continue
+        entry = _driver_entry(cost_drivers, product_name, driver)
+        for field in OPTIONAL_DRIVER_FIELDS & set(entry) - set(values):
+            del entry[field]
+        entry.update({field: values[field] for field in DRIVER_COLUMNS[2:] if field in values})
+
+def apply_bom_diff(bom, diff):
+    for product, component in diff["deleted"]:
+        components = bom.get(product, {})
+        components.pop(component, None)
+        if not components:
+            bom.pop(product, None)
+
+    changes = [(key, values) for key, values in diff["updated"].items()]
+    changes += [((values.get("Product"), values.get("Component")), values) for values in diff["inserted"]]
+    for (product, component), values in changes:
+        if product and component and "Quantity" in values:
+            bom.setdefault(product, {})[component] = values["Quantity"]
@@ -0,0 +1,266 @@
+import os
+import numpy as np
+import pandas as pd
+from catalog_editor import new_item_id, lifecycle_errors
+
+CHUNK_ROWS = 10000  # Rows validated per chunk when streaming an upload
+
+FINANCING_OPTIONS = ["Cash Purchase", "Short-Term Debt", "Long-Term Debt", "$1 Buyout Lease", "FMV Lease"]
+
+# Numeric columns per catalog: (column, required, minimum, default)
+EQUIPMENT_FIELDS = [
+    ("Cost", True, 0, None),
+    ("Useful Life", True, 1, None),
+    ("Max Capacity", True, 1, None),
+    ("Shifts Per Day", False, 0, None),
+    ("Hours Per Shift", False, 0, None),
+    ("Days Per Week", False, 5, None),
+    ("Holidays", False, 0, None),
+    ("Maintenance Hours", False, 0, None),
+    ("Availability", False, 0, None),
+    ("Performance", False, 0, None),
+    ("Quality", False, 0, None),
+    ("Purchase Year", False, 1900, None),
+    ("Salvage Rate", False, 0, None),
+    ("Maintenance Rate", False, 0, None),
+    ("Maintenance Growth", False, 0, None),
+    ("Power kW", False, 0, None),
+    ("Idle kW", False, 0, None),
+    ("Shift Start", False, 0, None),
+]
+PRODUCT_FIELDS = [
+    ("Initial Units", True, 1, None),
+    ("Unit Price", True, 0.01, None),
+    ("Growth Rate", False, -0.99, 0.10),
+    ("Unit Cost", False, 0, None),
+    ("Launch Year", False, 1900, None),
+    ("Ramp Years", False, 0, None),
+    ("Plateau Years", False, 0, None),
+    ("Decline Rate", False, 0, None),
+    ("End of Life Year", False, 1900, None),
+    ("Lot Size", False, 1, None),
+    ("Holding Rate", False, 0, None),
+    ("Reference Price", False, 0.01, None),
+    ("Price Elasticity", False, -np.inf, None),
+    ("Market Size", False, 0, None),
+    ("Market Growth", False, -0.99, None),
+    ("Receivable Days", False, 0, None),
+    ("Inventory Days", False, 0, None),
+    ("Payable Days", False, 0, None),
+]
+PRODUCT_TEXT_COLUMNS = ["Lifecycle", "Custom Curve"]
+
+# Labor cost drivers and the column prefix used for them in spreadsheets,
+# e.g. "Machinist Cost Per Hour" / "Machinist Hours Per Unit"
+LABOR_DRIVERS = {"Machinist Labor": "Machinist", "Design Labor": "Design", "Supervision": "Supervision"}
+DRIVER_FIELDS = ["Cost Per Hour", "Hours Per Unit"]
+OPTIONAL_DRIVER_FIELDS = [("Setup Hours", 0), ("Learning Rate", 0.01), ("Reference Units", 1)]  # (field, minimum)
+
+
+# Stream an uploaded CSV/XLSX file as DataFrame chunks so large ERP exports
+# never have to be materialized in one piece
+def read_catalog_chunks(uploaded_file, chunk_rows=CHUNK_ROWS):
+    file_name = getattr(uploaded_file, "name", str(uploaded_file))
+    extension = os.path.splitext(file_name)[1].lower()
+
+    if extension in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(col).strip() if col is not None else "" for col in next(rows, [])]
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_rows:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header)
+        workbook.close()
+    else:
+        for chunk in pd.read_csv(uploaded_file, chunksize=chunk_rows, skipinitialspace=True):
+            yield chunk
+
+
+# Map spreadsheet headers onto the catalog's column names, ignoring case and
+# surrounding whitespace
+def normalize_columns(chunk, known_columns):
+    lookup = {col.lower(): col for col in known_columns}
+    return chunk.rename(columns=lambda col: lookup.get(str(col).strip().lower(), str(col).strip()))
+
+
+def _row_errors(row_numbers, mask, column, message):
+    if not mask.any():
+        return None
+    return pd.DataFrame({"Row": row_numbers[mask], "Column": column, "Error": message})
+
+
+# Validate one chunk with column-wide checks; returns the cleaned chunk, a mask
+# of valid rows and a frame of row-level errors
+def validate_chunk(chunk, fields, row_offset):
+    chunk = chunk.reset_index(drop=True)
+    row_numbers = np.arange(len(chunk)) + row_offset + 2  # +2: header row and 1-based rows
+    errors = []
+    valid = np.ones(len(chunk), dtype=bool)
+
+    names = chunk["Name"].astype("string").str.strip() if "Name" in chunk else pd.Series(pd.NA, index=chunk.index, dtype="string")
+    missing_name = names.isna().to_numpy() | (names.fillna("") == "").to_numpy()
+    errors.append(_row_errors(row_numbers, missing_name, "Name", "Name is required"))
+    valid &= ~missing_name
+    chunk["Name"] = names
+
+    for column, required, minimum, default in fields:
+        if column not in chunk:
+            if required:
+                errors.append(_row_errors(row_numbers, np.ones(len(chunk), dtype=bool), column, "Column is missing"))
+                valid[:] = False
+                chunk[column] = np.nan
+                continue
+            chunk[column] = default
+        raw = chunk[column]
+        values = pd.to_numeric(raw, errors="coerce")
+        blank = raw.isna().to_numpy()
+        not_numeric = values.isna().to_numpy() & ~blank
+        errors.append(_row_errors(row_numbers, not_numeric, column, "Not a number"))
+        if required:
+            errors.append(_row_errors(row_numbers, blank, column, "Value is required"))
+            valid &= ~blank
+        elif default is not None:
+            values = values.where(~pd.Series(blank), default)
+        below = (values < minimum).to_numpy()
+        errors.append(_row_errors(row_numbers, below, column, f"Must be at least {minimum}"))
+        valid &= ~not_numeric & ~below
+        chunk[column] = values
+
+    errors = [e for e in errors if e is not None]
+    error_frame = pd.concat(errors, ignore_index=True) if errors else pd.DataFrame(columns=["Row", "Column", "Error"])
+    return chunk, valid, error_frame
+
+
+def validate_equipment_chunk(chunk, row_offset):
+    chunk = normalize_columns(chunk, ["Name", "Financing"] + [f[0] for f in EQUIPMENT_FIELDS])
+    chunk, valid, errors = validate_chunk(chunk, EQUIPMENT_FIELDS, row_offset)
+
+    if "Financing" not in chunk:
+        chunk["Financing"] = FINANCING_OPTIONS[0]
+    financing = chunk["Financing"].fillna(FINANCING_OPTIONS[0]).astype(str).str.strip()
+    bad_financing = ~financing.isin(FINANCING_OPTIONS).to_numpy()
+    if bad_financing.any():
+        row_numbers = np.arange(len(chunk)) + row_offset + 2
+        errors = pd.concat([errors, _row_errors(row_numbers, bad_financing, "Financing",
+                                                f"Must be one of: {', '.join(FINANCING_OPTIONS)}")], ignore_index=True)
+    chunk["Financing"] = financing
+    valid &= ~bad_financing
+
+    records = chunk.loc[valid, ["Name", "Financing"] + [f[0] for f in EQUIPMENT_FIELDS]]
+    records = records.astype({"Useful Life": int, "Max Capacity": int})
+    # Optional calendar columns left blank are not stored
+    return [{key: value for key, value in record.items() if not pd.isna(value)} for record in records.to_dict("records")], errors
+
+
+def driver_columns(columns):
+    fields = DRIVER_FIELDS + [field for field, _ in OPTIONAL_DRIVER_FIELDS]
+    labor = {}
+    for driver, prefix in LABOR_DRIVERS.items():
+        labor[driver] = {field: f"{prefix} {field}" for field in fields}
+    equipment = {}
+    for col in columns:
+        for field in fields:
+            suffix = f" - {field}"
+            if str(col).endswith(suffix):
+                equipment.setdefault(str(col)[:-len(suffix)], {})[field] = col
+    return labor, equipment
+
+
+def validate_product_chunk(chunk, row_offset):
+    labor_cols, equipment_cols = driver_columns(chunk.columns)
+    known = ["Name"] + [f[0] for f in PRODUCT_FIELDS] + PRODUCT_TEXT_COLUMNS + [c for cols in labor_cols.values() for c in cols.values()]
+    chunk = normalize_columns(chunk, known)
+    labor_cols, equipment_cols = driver_columns(chunk.columns)
+
+    minimums = dict(OPTIONAL_DRIVER_FIELDS)
+    driver_fields = []
+    for cols in list(labor_cols.values()) + list(equipment_cols.values()):
+        driver_fields += [(col, False, minimums.get(field, 0), None) for field, col in cols.items() if col in chunk]
+    chunk, valid, errors = validate_chunk(chunk, PRODUCT_FIELDS + driver_fields, row_offset)
+
+    for column in PRODUCT_TEXT_COLUMNS:
+        chunk[column] = chunk[column].astype("string").str.strip().replace("", pd.NA) if column in chunk else pd.NA
+    lifecycle_problems = [lifecycle_errors({key: value for key, value in row.items() if not pd.isna(value)})
+                          for row in chunk[["Name"] + PRODUCT_TEXT_COLUMNS].to_dict("records")]
+    bad_lifecycle = np.array([bool(problems) for problems in lifecycle_problems], dtype=bool) & valid
+    if bad_lifecycle.any():
+        row_numbers = np.arange(len(chunk)) + row_offset + 2
+        errors = pd.concat([errors, pd.DataFrame({"Row": row_numbers[bad_lifecycle], "Column": "Lifecycle",
+                                                  "Error": [lifecycle_problems[i][0] for i in np.flatnonzero(bad_lifecycle)]})],
+                           ignore_index=True)
+    valid &= ~bad_lifecycle
+
+    base = chunk.loc[valid, ["Name"] + [f[0] for f in PRODUCT_FIELDS] + PRODUCT_TEXT_COLUMNS]
+    base = base.astype({"Initial Units": int})
+    # Optional columns left blank are not stored
+    products = [{key: value for key, value in product.items() if not pd.isna(value)} for product in base.to_dict("records")]
+
+    # Assemble per-product cost drivers from whichever driver columns exist
+    drivers = [{"Equipment Costs": {}} for _ in products]
+    driver_rows = chunk.loc[valid]
+    for driver, cols in labor_cols.items():
+        _fill_drivers(drivers, driver_rows, cols, lambda d, driver=driver: d.setdefault(driver, {}))
+    for eq_name, cols in equipment_cols.items():
+        _fill_drivers(drivers, driver_rows, cols, lambda d, eq_name=eq_name: d["Equipment Costs"].setdefault(eq_name, {}))
+    cost_drivers = {p["Name"]: d for p, d in zip(products, drivers) if len(d) > 1 or d["Equipment Costs"]}
+    return products, cost_drivers, errors
+
+
+def _fill_drivers(drivers, rows, cols, target):
+    if not all(cols.get(field) in rows for field in DRIVER_FIELDS):
+        return
+    values = {field: rows[col].to_numpy(dtype=float) for field, col in cols.items() if col in rows}
+    present = np.logical_and.reduce([~np.isnan(values[field]) for field in DRIVER_FIELDS])
+    for i in np.flatnonzero(present):
+        entry = target(drivers[i])
+        for field, column_values in values.items():
+            if not np.isnan(column_values[i]):
+                entry[field] = float(column_values[i])
+
+
+# Upsert validated records by name, keeping catalog order for existing items
+def upsert_by_name(existing, records):
+    index = {item["Name"]: i for i, item in enumerate(existing)}
+    inserted = updated = 0
+    for record in records:
+        i = index.get(record["Name"])
+        if i is None:
+            index[record["Name"]] = len(existing)
+            existing.append({**record, "ID": new_item_id()})
+            inserted += 1
+        else:
+            existing[i] = {**existing[i], **record}
+            updated += 1
+    return inserted, updated
+
+
+# Import a whole file into the catalog; rows are validated chunk by chunk and
+# applied together at the end so the caller can persist once
+def import_catalog(uploaded_file, kind, catalog, chunk_rows=CHUNK_ROWS):
+    records, cost_drivers, errors = {}, {}, []
+    row_offset = 0
+    for chunk in read_catalog_chunks(uploaded_file, chunk_rows):
+        if kind == "equipment":
+            chunk_records, chunk_errors = validate_equipment_chunk(chunk, row_offset)
+        else:
+            chunk_records, chunk_drivers, chunk_errors = validate_product_chunk(chunk, row_offset)
+            cost_drivers.update(chunk_drivers)
+        # Later rows with the same name win, matching upsert semantics
+        records.update((record["Name"], record) for record in chunk_records)
+        errors.append(chunk_errors)
+        row_offset += len(chunk)
+
+    inserted, updated = upsert_by_name(catalog[kind], list(records.values()))
+    if kind == "products":
+        catalog["cost_drivers"].update(cost_drivers)
+
+    errors = [e for e in errors if not e.empty]
+    error_frame = pd.concat(errors, ignore_index=True).sort_values("Row", kind="stable") if errors else pd.DataFrame(columns=["Row", "Column", "Error"])
+    return {"rows": row_offset, "inserted": inserted, "updated": updated, "errors": error_frame}
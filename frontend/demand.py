@@ -0,0 +1,65 @@
+import numpy as np
+from catalog_editor import LABOR_ROLES
+from bom import has_bom, roll_up
+
+# Price-driven demand. A product's forecast volume is what it sells at its
+# Reference Price (default: its Unit Price); at another price demand follows
+# a constant price elasticity
+#
+#   demand = volume x (Unit Price / Reference Price) ^ Price Elasticity
+#
+# and is capped by the product's market, Market Size units in the first year
+# growing at Market Growth (default: the product's Growth Rate). Demand is
+# then reconciled with machine capacity: where the machine hours needed at
+# entry hours per unit (components included through the bill of materials)
+# exceed a machine's available hours, every product using that machine is cut
+# back by the overload ratio, which always makes the load fit.
+
+DEMAND_FIELDS = {  # product field: default
+    "Reference Price": np.nan,
+    "Price Elasticity": 0.0,
+    "Market Size": np.nan,
+    "Market Growth": np.nan,
+}
+DEMAND_KEYS = {field: field.lower().replace(" ", "_") for field in DEMAND_FIELDS}
+
+
+# Only models with an elasticity or a market cap are price and capacity driven
+def has_demand(compiled):
+    return "price_elasticity" in compiled and bool(((compiled["price_elasticity"] != 0) | ~np.isnan(compiled["market_size"])).any())
+
+
+# Demand (..., products, years) at the batch's prices from the volumes the
+# products sell at their reference prices (fixed when the model is compiled,
+# so price scenarios move along the demand curve)
+def price_demand(compiled, units, years):
+    price, reference = compiled["unit_price"], compiled["reference_price"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.where((reference > 0) & (price > 0), (price / reference) ** compiled["price_elasticity"], 1.0)
+    growth = np.where(np.isnan(compiled["market_growth"]), compiled["growth_rate"], compiled["market_growth"])
+    market = compiled["market_size"][..., None] * (1 + growth[..., None]) ** np.arange(len(years))
+    demand = units * factor[..., None]
+    return np.where(np.isnan(market), demand, np.minimum(demand, market))
+
+
+# Machine hours per unit sold (..., products, machines), components included
+def _unit_machine_hours(compiled, n_machines):
+    hours = compiled["driver_hours"][..., len(LABOR_ROLES):len(LABOR_ROLES) + n_machines]
+    if not has_bom(compiled):
+        return hours
+    n_products = hours.shape[-2]
+    nodes = np.concatenate([np.swapaxes(hours, -1, -2),
+                            np.zeros(hours.shape[:-2] + (n_machines, compiled["material_cost"].shape[-1]))], axis=-1)
+    rolled = roll_up(compiled, nodes, compiled["bom_quantity"][..., None, :])
+    return np.swapaxes(rolled[..., :n_products], -1, -2)
+
+
+# Sales the machines can make (..., products, years) out of demand, with
+# capacity the machines' available hours (..., machines, years)
+def capacity_constrained(compiled, demand, capacity):
+    hours = _unit_machine_hours(compiled, capacity.shape[-2])
+    load = np.einsum("...py,...pm->...my", demand, hours)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(load > capacity, capacity / load, 1.0)
+    scale = np.min(np.where(hours[..., None] > 0, ratio[..., None, :, :], 1.0), axis=-2, initial=1.0)
+    return demand * scale
@@ -0,0 +1,140 @@
+import numpy as np
+from catalog_editor import LABOR_ROLES
+from capacity import CALENDAR_KEYS, WEEKMASKS
+from escalation import ENERGY
+
+# Machine energy cost under a time-of-use tariff. Every machine draws Power kW
+# while it runs and Idle kW while it is scheduled but not running, over the
+# hours its shift calendar schedules it: Days Per Week from Monday, Shifts Per
+# Day x Hours Per Shift from Shift Start (night shifts run past midnight), less
+# Holidays spread evenly over the working days. The tariff prices every hour
+# of the week in one of TARIFF_BANDS; weekends are off-peak.
+#
+# The calendar and tariff are fixed per model, so the scheduled hours in each
+# band (bands x machines x years) are built from hourly arrays (hours of the
+# year x machines) once, a chunk of machines at a time to bound memory. With
+# the forecast's machine hours the energy of every band is then
+#
+#   kWh = band hours x (Idle kW + (Power kW - Idle kW) x running share)
+#
+# and it is charged to the products by machine hours. Machines with no
+# production are switched off.
+
+ENERGY_FIELDS = {  # equipment field: default
+    "Power kW": 0.0,
+    "Idle kW": 0.0,
+    "Shift Start": 6.0,  # Hour of day the first shift starts
+}
+ENERGY_KEYS = {field: "energy_" + field.lower().replace(" ", "_") for field in ENERGY_FIELDS}
+TARIFF_BANDS = ["Off-Peak", "Mid-Peak", "On-Peak"]
+TARIFF_FIELDS = {  # "Energy Tariff" assumptions field: default ($/kWh or hour of day)
+    "Off-Peak Rate": 0.08,
+    "Mid-Peak Rate": 0.12,
+    "On-Peak Rate": 0.20,
+    "Mid-Peak Start": 7,
+    "Mid-Peak End": 23,
+    "On-Peak Start": 16,
+    "On-Peak End": 21,
+}
+CHUNK_MACHINES = 256
+
+
+def has_energy(compiled):
+    return "energy_power_kw" in compiled and bool(((compiled["energy_power_kw"] > 0) | (compiled["energy_idle_kw"] > 0)).any())
+
+
+# $/kWh per band and the band of every hour of the week (Monday 00:00 first)
+def tariff(settings):
+    settings = {**TARIFF_FIELDS, **settings}
+    hour = np.arange(168) % 24
+    weekday = np.arange(168) < 120
+    mid = weekday & (hour >= settings["Mid-Peak Start"]) & (hour < settings["Mid-Peak End"])
+    on = weekday & (hour >= settings["On-Peak Start"]) & (hour < settings["On-Peak End"])
+    rates = np.array([settings[band + " Rate"] for band in TARIFF_BANDS], dtype=np.float64)
+    return rates, np.where(on, 2, np.where(mid, 1, 0))
+
+
+# Scheduled hours per tariff band (bands x machines x years). calendar maps
+# capacity.CALENDAR_KEYS values to per-machine arrays, shift_start is per
+# machine. Machines on the same schedule share one hourly evaluation.
+def band_hours(calendar, shift_start, week_bands, years, chunk_machines=CHUNK_MACHINES):
+    schedules = np.stack([calendar["calendar_days_per_week"], calendar["calendar_shifts_per_day"] * calendar["calendar_hours_per_shift"],
+                          calendar["calendar_holidays"], np.mod(shift_start, 24)], axis=-1).astype(np.float64)
+    unique, inverse = np.unique(schedules.reshape(-1, 4), axis=0, return_inverse=True)
+    hours = _schedule_band_hours(*unique.T, week_bands, years, chunk_machines)
+    return hours[:, inverse.reshape(-1)].reshape((len(TARIFF_BANDS),) + schedules.shape[:-1] + (len(years),))
+
+
+def _schedule_band_hours(days_per_week, shift_hours, holidays, shift_start, week_bands, years, chunk_machines):
+    n_machines = len(shift_start)
+    hours = np.zeros((len(TARIFF_BANDS), n_machines, len(years)))
+    for y, year in enumerate(int(year) for year in years):
+        n_hours = 24 * int(np.busday_count(f"{year}-01-01", f"{year + 1}-01-01", weekmask="1111111"))
+        first_weekday = int((np.datetime64(f"{year}-01-01") - np.datetime64("1970-01-05")).astype(np.int64) % 7)  # Monday = 0
+        clock = np.arange(n_hours)
+        band_of_hour = np.eye(len(TARIFF_BANDS))[week_bands[(first_weekday * 24 + clock) % 168]]
+
+        for start in range(0, n_machines, chunk_machines):
+            machines = slice(start, start + chunk_machines)
+            n_days = np.clip(days_per_week[machines], 5, 7).astype(np.int64)
+            hours_per_day = np.minimum(shift_hours[machines], 24)
+            # Working days from the day before Jan 1 (its night shift runs into the year)
+            day = np.arange(-1, n_hours // 24)
+            weekmask = np.array([[c == "1" for c in WEEKMASKS[d]] for d in n_days])  # machines x weekdays
+            working = weekmask[:, (first_weekday + day) % 7].T  # days x machines
+            in_year = working & (day[:, None] >= 0)
+            rank = np.cumsum(in_year, axis=0) - in_year
+            n_working = in_year.sum(axis=0)
+            n_holidays = np.minimum(holidays[machines], n_working)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                holiday = in_year & (np.floor((rank + 1) * n_holidays / n_working) > np.floor(rank * n_holidays / n_working))
+            on_day = working & ~holiday
+
+            # Hourly schedule: hours since the shift start of the machine's working day
+            shifted = clock[:, None] - shift_start[machines]
+            shift_day = np.floor(shifted / 24).astype(np.int64)
+            scheduled = on_day[shift_day + 1, np.arange(on_day.shape[1])] & (shifted - 24 * shift_day < hours_per_day)
+            hours[:, machines, y] = band_of_hour.T @ scheduled
+    return hours
+
+
+# Scheduled hours per band for the forecast years: the table compiled with the
+# model when the years match, otherwise rebuilt from the calendars
+def band_table(compiled, years):
+    table = compiled["energy_band_hours"]
+    if table.shape[-1] == len(years) and np.array_equal(compiled["capacity_years"], years):
+        return table
+    calendar = {key: compiled[key] for key in CALENDAR_KEYS.values()}
+    return band_hours(calendar, compiled["energy_shift_start"], compiled["tariff_week_band"], years)
+
+
+# Energy (..., machines, years) for run_load, the hours each machine runs
+# (setups included).
+# in_service switches machines on and off by year; index escalates the tariff.
+def energy_use(compiled, run_load, years, in_service=None, index=None):
+    scheduled_bands = band_table(compiled, years)
+    if in_service is not None:
+        scheduled_bands = scheduled_bands * in_service[..., None, :, :]
+    scheduled = scheduled_bands.sum(axis=-3)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        running = np.clip(np.where(scheduled > 0, run_load / scheduled, 0.0), 0.0, 1.0)
+    power, idle = compiled["energy_power_kw"][..., None], compiled["energy_idle_kw"][..., None]
+    draw = np.where(run_load > 0, idle + (power - idle) * running, 0.0)
+    band_kwh = scheduled_bands * draw[..., None, :, :]
+    cost = (band_kwh * compiled["tariff_rate"][..., :, None, None]).sum(axis=-3)
+    if index is not None:
+        cost = cost * index[..., None, :]
+    return {"band_kwh": band_kwh, "kwh": band_kwh.sum(axis=-3), "cost": cost}
+
+
+# Energy cost (starts x machines x years) with every machine's shifts moved
+# to each of the start hours, for the forecast's machine hours
+def shift_start_costs(compiled, results, starts):
+    years = results["years"]
+    calendar = {key: np.broadcast_to(compiled[key], (len(starts),) + compiled[key].shape) for key in CALENDAR_KEYS.values()}
+    shift_start = np.broadcast_to(np.asarray(starts, dtype=np.float64)[:, None], (len(starts), len(compiled["energy_shift_start"])))
+    bands = np.moveaxis(band_hours(calendar, shift_start, compiled["tariff_week_band"], years), 0, -3)
+    n_machines = len(compiled["energy_shift_start"])
+    load = results["driver_load"][..., len(LABOR_ROLES):len(LABOR_ROLES) + n_machines, :]
+    index = None if results.get("escalation") is None else results["escalation"][..., ENERGY, :]
+    return energy_use({**compiled, "energy_band_hours": bands}, load, years, results["assets"]["in_service"], index)["cost"]
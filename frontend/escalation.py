@@ -0,0 +1,66 @@
+import numpy as np
+from catalog_editor import LABOR_ROLES
+
+# Cost and price escalation. Every cost center has a yearly escalation rate,
+# set model-wide in the "Escalation" assumptions as one rate or as
+# {year: rate}; years without a rate keep the last one before them. The rates
+# are compiled into a cumulative index per center and year, 1.0 in the first
+# forecast year where the entered rates and prices apply:
+#
+#   index[y] = index[y - 1] x (1 + rate[y])
+#
+# so escalating a cost center is one broadcast multiply by its index row.
+# Labor and machine-hour rates follow their driver's center, the energy
+# tariff (see energy.py) the Energy index, material prices and entered unit
+# costs the Materials index, equipment maintenance the Maintenance index and
+# product prices the Selling Prices index.
+
+ESCALATION_CENTERS = ["Labor", "Machine Time", "Energy", "Materials", "Maintenance", "Selling Prices"]
+LABOR, MACHINE_TIME, ENERGY, MATERIALS, MAINTENANCE, SELLING_PRICES = range(len(ESCALATION_CENTERS))
+
+
+# Any cost center with a nonzero rate; without one every index is 1.0
+def has_escalation(compiled):
+    return "escalation_rate" in compiled and bool(np.any(compiled["escalation_rate"] != 0))
+
+
+# Yearly rates (centers x years) from the Escalation assumptions
+def escalation_rates(settings, years):
+    rates = np.zeros((len(ESCALATION_CENTERS), len(years)))
+    for c, center in enumerate(ESCALATION_CENTERS):
+        rate = settings.get(center, 0.0)
+        if not isinstance(rate, dict):
+            rates[c] = float(rate)
+            continue
+        given = {int(year): float(value) for year, value in rate.items()}
+        last = 0.0
+        for y, year in enumerate(years):
+            last = given.get(int(year), last)
+            rates[c, y] = last
+    return rates
+
+
+# Cumulative index from yearly rates (..., years); 1.0 in the first year
+def cumulative_index(rates):
+    growth = np.concatenate([np.ones(rates.shape[:-1] + (1,)), 1 + rates[..., 1:]], axis=-1)
+    return np.cumprod(growth, axis=-1)
+
+
+# Index (..., centers, years) for any forecast years; the compiled table when
+# the years match, otherwise rebuilt with the last rate carried forward
+def escalation_index(compiled, years):
+    table = compiled["escalation_index"]
+    if table.shape[-1] == len(years) and np.array_equal(compiled["escalation_years"], years):
+        return table
+    base = int(compiled["escalation_years"][0])
+    years = np.asarray(years, dtype=np.int64)
+    start = min(int(years.min()), base)
+    offsets = np.arange(start, int(years.max()) + 1) - base
+    index = cumulative_index(compiled["escalation_rate"][..., np.clip(offsets, 0, compiled["escalation_rate"].shape[-1] - 1)])
+    return (index / index[..., base - start:base - start + 1])[..., years - start]
+
+
+# Index of every cost driver (..., drivers, years): labor roles, then machines
+def driver_index(index, n_drivers):
+    centers = np.where(np.arange(n_drivers) < len(LABOR_ROLES), LABOR, MACHINE_TIME)
+    return np.take(index, centers, axis=-2)
@@ -0,0 +1,414 @@
+import numpy as np
+import pandas as pd
+from swot_rules import evaluate_rules, swot_lists
+from investor_score import score_scenarios
+from catalog_editor import LABOR_ROLES
+from capacity import CALENDAR_KEYS, available_hours
+from bom import compile_bom, has_bom, requirements, rolled_unit_cost
+from lot_sizing import has_setups, economic_lot_sizes
+from assets import ASSET_KEYS, asset_schedule
+from working_capital import WORKING_CAPITAL_KEYS, working_capital
+from tax import TAX_KEYS, tax_inputs, income_taxes
+from staffing import STAFFING_KEYS
+from escalation import ENERGY, MATERIALS, MAINTENANCE, SELLING_PRICES, has_escalation, escalation_index, driver_index
+from energy import ENERGY_KEYS, has_energy, energy_use
+from demand import DEMAND_FIELDS, DEMAND_KEYS, has_demand, price_demand, capacity_constrained
+
+FORECAST_YEARS = np.arange(2025, 2030)
+
+# The engine works on the compiled model arrays (see model_store.compile_model).
+# Product inputs have shape (..., products); any leading axes are scenarios,
+# so the same functions evaluate one model or a whole batch.
+
+
+# Unit cost per product: the entered "Unit Cost" where there is one, otherwise
+# the sum of equipment and labor cost drivers (rate x hours per unit)
+def unit_costs(compiled):
+    driver_cost = (compiled["driver_rate"] * compiled["driver_hours"]).sum(axis=-1)
+    return np.where(np.isnan(compiled["unit_cost"]), driver_cost, compiled["unit_cost"])
+
+
+def forecast_units(initial_units, growth_rate, years=FORECAST_YEARS, curves=None):
+    year_idx = np.arange(len(years))
+    compound = (1 + growth_rate[..., None]) ** year_idx
+    if curves is None:
+        return initial_units[..., None] * compound
+    shape, is_compound = curves
+    return initial_units[..., None] * shape * np.where(is_compound[..., None], compound, 1.0)
+
+
+LIFECYCLE_FIELDS = ["lifecycle_kind", "launch_year", "ramp_years", "plateau_years", "decline_rate", "eol_year"]
+COMPOUND, S_CURVE, CUSTOM = range(3)  # lifecycle_kind codes, in catalog_editor.LIFECYCLE_OPTIONS order
+
+
+# One lifecycle volume curve per row of parameters (rows, fields), over years.
+# Multipliers of Initial Units: an S-curve ramps from launch to 1 over Ramp
+# Years, holds for Plateau Years and then declines by Decline Rate a year;
+# custom curves interpolate their points. Nothing is sold before launch or
+# after end of life. Compound-growth rows are just that on/off mask.
+def _curve_table(params, n_points, years):
+    kind, launch, ramp, plateau, decline, eol = (params[:, i, None] for i in range(len(LIFECYCLE_FIELDS)))
+    curve_years, curve_values = params[:, 6:6 + n_points], params[:, 6 + n_points:]
+    launch = np.where(np.isnan(launch), years[0], launch)
+    age = years - launch
+
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        ramp_shape = np.where(ramp > 0, 1 / (1 + np.exp(-8 / ramp * (age - ramp / 2))), 1.0)
+        decline_start = ramp + np.where(np.isnan(plateau), np.inf, plateau)
+        s_curve = ramp_shape * (1 - decline) ** np.maximum(age - decline_start, 0)
+    table = np.where(kind == S_CURVE, s_curve, 1.0)
+    for row in np.flatnonzero(kind[:, 0] == CUSTOM):
+        points = ~np.isnan(curve_years[row])
+        table[row] = np.interp(years, curve_years[row, points], curve_values[row, points])
+
+    live = (age >= 0) & (np.isnan(eol) | (years <= eol))
+    return np.where(live, table, 0.0)
+
+
+# Lifecycle volume multipliers (..., products, years) and a compound-growth
+# mask (..., products). Curves are evaluated once per distinct parameter set,
+# so products sharing a profile share one row of the curve table.
+def lifecycle_curves(compiled, years=FORECAST_YEARS):
+    kind = np.asarray(compiled["lifecycle_kind"])
+    params = np.concatenate([np.stack([np.broadcast_to(compiled[f], kind.shape) for f in LIFECYCLE_FIELDS], axis=-1),
+                             compiled["curve_years"], compiled["curve_values"]], axis=-1).astype(np.float64)
+    rows = params.reshape(-1, params.shape[-1])
+    # NaN never equals itself, so map it to a sentinel before looking for duplicates
+    unique, inverse = np.unique(np.where(np.isnan(rows), -np.inf, rows), axis=0, return_inverse=True)
+    unique = np.where(np.isinf(unique) & (unique < 0), np.nan, unique)
+    table = _curve_table(unique, compiled["curve_years"].shape[-1], np.asarray(years, dtype=np.float64))
+    shape = table[inverse.reshape(-1)].reshape(kind.shape + (len(years),))
+    return shape, kind == COMPOUND
+
+
+# Hours per unit for every product x driver x year. Drivers with a learning
+# rate below 1 follow Wright's law: each doubling of cumulative volume
+# multiplies their hours by the learning rate. "Hours Per Unit" is the standard
+# at the driver's reference volume (default: the first year's units) and hours
+# never rise above it. Cumulative volume is taken at the middle of each year.
+def learning_hours(compiled, units):
+    cumulative = np.cumsum(units, axis=-1) - units / 2
+    reference = compiled["driver_reference_units"]
+    reference = np.where(np.isnan(reference), units[..., :1], reference)
+    exponent = np.log2(np.minimum(compiled["driver_learning_rate"], 1.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.maximum(cumulative[..., None, :] / reference[..., None], 1.0)
+        factor = np.where(reference[..., None] > 0, ratio ** exponent[..., None], 1.0)
+    return compiled["driver_hours"][..., None] * factor
+
+
+def has_learning(compiled):
+    return "driver_learning_rate" in compiled and bool((compiled["driver_learning_rate"] < 1).any())
+
+
+# Product x year forecast of units, revenue and cost plus the yearly totals.
+# units are sales; with a demand model (see demand.py) demand_units is the
+# price-driven demand they are cut back from to fit machine capacity; production_units add the components other products
+# consume through the bill of materials, and unit_cost is rolled up through it.
+# driver_load holds the hours each cost driver (labor role or machine) works
+# per year for that production, after learning and including batch setups;
+# unit_hours the hours per unit costed (..., products, drivers[, years]).
+# With setup hours on the routings, production runs in economic lots (see
+# lot_sizing) whose setup and holding cost per unit is part of unit_cost.
+# assets holds the equipment lifecycle schedules and capacity_hours the hours
+# of the machines in service; working_capital the year-end receivables,
+# inventory and payables and tax the settings and tax depreciation.
+# escalation is the cost center x year index applied to rates, costs and
+# prices (see escalation.py) and energy the machines' time-of-use energy use
+# and cost, part of unit_cost (see energy.py). check_cancelled, if given, is
+# called between the stages so a caller can abandon a superseded forecast.
+def forecast(compiled, years=FORECAST_YEARS, check_cancelled=None):
+    checkpoint = check_cancelled or (lambda: None)
+    curves = lifecycle_curves(compiled, years) if "lifecycle_kind" in compiled else None
+    units = forecast_units(compiled["initial_units"], compiled["growth_rate"], years, curves)
+
+    assets = asset_schedule(compiled, years)
+    capacity = available_hours(compiled, years) * assets["in_service"]
+
+    demand = None
+    if has_demand(compiled):
+        demand = price_demand(compiled, units, years)
+        units = capacity_constrained(compiled, demand, capacity)
+
+    checkpoint()
+    production_units, material_units = units, None
+    if has_bom(compiled):
+        production_units, material_units = requirements(compiled, units)
+    # Escalated cost driver rates and entered unit costs; see escalation.py
+    index = escalation_index(compiled, years) if has_escalation(compiled) else None
+    rate, entered_cost = compiled["driver_rate"][..., None], compiled["unit_cost"][..., None]
+    if index is not None:
+        rate = rate * driver_index(index, rate.shape[-2])[..., None, :, :]
+        entered_cost = entered_cost * index[..., MATERIALS, None, :]
+    material_cost = None if index is None else compiled["material_cost"][..., None] * index[..., MATERIALS, None, :]
+
+    unit_hours = compiled["driver_hours"]
+    if has_learning(compiled):
+        hours = unit_hours = learning_hours(compiled, production_units)
+        driver_cost = (rate * hours).sum(axis=-2)
+        own_cost = np.where(np.isnan(compiled["unit_cost"])[..., None], driver_cost, entered_cost)
+        driver_load = (production_units[..., None, :] * hours).sum(axis=-3)
+    elif index is not None:
+        driver_cost = (rate * compiled["driver_hours"][..., None]).sum(axis=-2)
+        own_cost = np.broadcast_to(np.where(np.isnan(compiled["unit_cost"])[..., None], driver_cost, entered_cost), units.shape)
+        driver_load = np.swapaxes(np.swapaxes(production_units, -1, -2) @ compiled["driver_hours"], -1, -2)
+    else:
+        own_cost = np.broadcast_to(unit_costs(compiled)[..., None], units.shape)
+        driver_load = np.swapaxes(np.swapaxes(production_units, -1, -2) @ compiled["driver_hours"], -1, -2)
+
+    checkpoint()
+    lots = None
+    run_load = driver_load
+    if has_setups(compiled):
+        # Lots are held in stock at the rolled cost before setups
+        held_cost = rolled_unit_cost(compiled, own_cost, True, material_cost) if has_bom(compiled) else own_cost
+        lots = economic_lot_sizes(compiled, production_units, held_cost, driver_load, capacity, rate)
+        driver_load = driver_load + lots["setup_load"]
+        own_cost = own_cost + lots["lot_cost"]
+
+    checkpoint()
+    # Machine energy, charged per running hour to the products using the machine
+    energy = None
+    if has_energy(compiled):
+        machines = slice(len(LABOR_ROLES), len(LABOR_ROLES) + capacity.shape[-2])
+        energy = energy_use(compiled, driver_load[..., machines, :], years, assets["in_service"],
+                            None if index is None else index[..., ENERGY, :])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            hourly = np.where(run_load[..., machines, :] > 0, energy["cost"] / run_load[..., machines, :], 0.0)
+        if unit_hours.ndim == compiled["driver_hours"].ndim:
+            own_cost = own_cost + np.einsum("...pm,...my->...py", unit_hours[..., machines], hourly)
+        else:
+            own_cost = own_cost + np.einsum("...pmy,...my->...py", unit_hours[..., machines, :], hourly)
+    unit_cost = rolled_unit_cost(compiled, own_cost, True, material_cost) if has_bom(compiled) else own_cost
+
+    checkpoint()
+    price = compiled["unit_price"][..., None]
+    if index is not None:
+        price = price * index[..., SELLING_PRICES, None, :]
+        assets["maintenance"] = assets["maintenance"] * index[..., MAINTENANCE, None, :]
+    product_revenue = units * price
+    product_cost = units * unit_cost
+    return {
+        "years": years,
+        "units": units,
+        "demand_units": demand,
+        "production_units": production_units,
+        "material_units": material_units,
+        "lot_size": None if lots is None else lots["lot_size"],
+        "assets": assets,
+        "working_capital": working_capital(compiled, product_revenue, product_cost),
+        "tax": tax_inputs(compiled, assets),
+        "escalation": index,
+        "energy": energy,
+        "capacity_hours": capacity,
+        "unit_cost": unit_cost,
+        "driver_load": driver_load,
+        "unit_hours": unit_hours,
+        "product_revenue": product_revenue,
+        "product_cost": product_cost,
+        "revenue": product_revenue.sum(axis=-2),
+        "cost": product_cost.sum(axis=-2),
+        "production": production_units.sum(axis=-2),
+    }
+
+
+def utilization_rate(production, equipment_capacity):
+    total_capacity = np.asarray(equipment_capacity.sum(axis=-1))[..., None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total_capacity > 0, production / total_capacity * 100, 0.0)
+
+
+# Machines referenced by cost drivers that are not in the equipment list
+def _n_extra_drivers(compiled):
+    return len(compiled["driver_names"]) - len(LABOR_ROLES) - len(compiled["equipment_names"])
+
+
+# Stack several compiled models into one scenario batch. Product, equipment
+# and driver axes are zero-padded to the largest model; padded products have
+# no units and padded machines no capacity, so they drop out of every total.
+# Labor and equipment drivers stay aligned with LABOR_ROLES and the equipment
+# axis; other referenced machines are kept per scenario after them.
+def stack_compiled(compiled_list):
+    n_products = max(len(c["product_names"]) for c in compiled_list)
+    n_equipment = max(len(c["equipment_names"]) for c in compiled_list)
+    n_labor = len(LABOR_ROLES)
+    n_extra = max(_n_extra_drivers(c) for c in compiled_list)
+    n_points = max(c["curve_years"].shape[-1] for c in compiled_list)
+    n_materials = max(len(c["material_names"]) for c in compiled_list)
+
+    def pad(values, width):
+        return np.pad(values, (0, width - len(values)))
+
+    # Driver axis: labor roles, then machines aligned with the equipment axis,
+    # then machines referenced by cost drivers but not in the equipment list
+    def pad_drivers(compiled, field, fill=0.0):
+        values = compiled[field]
+        labor, machines, extras = np.split(values, [n_labor, n_labor + len(compiled["equipment_names"])], axis=-1)
+        padded = np.concatenate([
+            labor,
+            np.pad(machines, ((0, 0), (0, n_equipment - machines.shape[-1])), constant_values=fill),
+            np.pad(extras, ((0, 0), (0, n_extra - extras.shape[-1])), constant_values=fill),
+        ], axis=-1)
+        return np.pad(padded, ((0, n_products - len(padded)), (0, 0)), constant_values=fill)
+
+    def pad_points(points):
+        return np.pad(points, ((0, n_products - len(points)), (0, n_points - points.shape[-1])), constant_values=np.nan)
+
+    def stack(field, pad_values):
+        return np.stack([pad_values(c[field]) for c in compiled_list])
+
+    # BOM: the union of every model's edges on the padded node axis (products,
+    # then materials); each scenario has zero quantity on the other models' edges
+    def pad_nodes(compiled, nodes):
+        n = len(compiled["product_names"])
+        return np.where(nodes < n, nodes, nodes - n + n_products)
+
+    edge_nodes = np.array([np.concatenate([pad_nodes(c, c["bom_parent"]) for c in compiled_list]),
+                           np.concatenate([pad_nodes(c, c["bom_child"]) for c in compiled_list])], dtype=np.int64).reshape(2, -1)
+    edge_scenario = np.concatenate([np.full(len(c["bom_parent"]), s) for s, c in enumerate(compiled_list)]).astype(np.int64)
+    union, edge_index = np.unique(edge_nodes, axis=1, return_inverse=True)
+    quantity = np.zeros((len(compiled_list), union.shape[1]))
+    np.add.at(quantity, (edge_scenario, edge_index.reshape(-1)), np.concatenate([c["bom_quantity"] for c in compiled_list]))
+
+    return {
+        "initial_units": stack("initial_units", lambda v: pad(v, n_products)),
+        "unit_price": stack("unit_price", lambda v: pad(v, n_products)),
+        "unit_cost": stack("unit_cost", lambda v: pad(v, n_products)),
+        "growth_rate": stack("growth_rate", lambda v: pad(v, n_products)),
+        "equipment_cost": stack("equipment_cost", lambda v: pad(v, n_equipment)),
+        "equipment_life": stack("equipment_life", lambda v: pad(v, n_equipment)),
+        "equipment_capacity": stack("equipment_capacity", lambda v: pad(v, n_equipment)),
+        **{key: stack(key, lambda v: pad(v, n_equipment)) for key in ASSET_KEYS.values()},
+        "driver_rate": np.stack([pad_drivers(c, "driver_rate") for c in compiled_list]),
+        "driver_hours": np.stack([pad_drivers(c, "driver_hours") for c in compiled_list]),
+        "driver_learning_rate": np.stack([pad_drivers(c, "driver_learning_rate", 1.0) for c in compiled_list]),
+        "driver_reference_units": np.stack([pad_drivers(c, "driver_reference_units", np.nan) for c in compiled_list]),
+        "driver_setup_hours": np.stack([pad_drivers(c, "driver_setup_hours") for c in compiled_list]),
+        "lot_size": stack("lot_size", lambda v: np.pad(v, (0, n_products - len(v)), constant_values=np.nan)),
+        "holding_rate": stack("holding_rate", lambda v: pad(v, n_products)),
+        **{key: stack(key, lambda v: np.pad(v, (0, n_products - len(v)), constant_values=DEMAND_FIELDS[field]))
+           for field, key in DEMAND_KEYS.items()},
+        **{key: stack(key, lambda v: pad(v, n_products)) for key in WORKING_CAPITAL_KEYS.values()},
+        **{key: stack(key, lambda v: v) for key in TAX_KEYS.values()},
+        **{key: stack(key, lambda v: v) for key in list(STAFFING_KEYS.values()) + ["supervision_span"]},
+        **{key: stack(key, lambda v: pad(v, n_equipment)) for key in CALENDAR_KEYS.values()},
+        **{key: stack(key, lambda v: pad(v, n_equipment)) for key in ENERGY_KEYS.values()},
+        "energy_band_hours": stack("energy_band_hours", lambda v: np.pad(v, ((0, 0), (0, n_equipment - v.shape[1]), (0, 0)))),
+        "tariff_rate": stack("tariff_rate", lambda v: v),
+        "tariff_week_band": compiled_list[0]["tariff_week_band"],
+        "capacity_years": compiled_list[0]["capacity_years"],
+        "escalation_years": compiled_list[0]["escalation_years"],
+        "escalation_rate": stack("escalation_rate", lambda v: v),
+        "escalation_index": stack("escalation_index", lambda v: v),
+        "capacity_hours": stack("capacity_hours", lambda v: np.pad(v, ((0, n_equipment - len(v)), (0, 0)))),
+        **{field: stack(field, lambda v: pad(v, n_products)) for field in LIFECYCLE_FIELDS},
+        "curve_years": stack("curve_years", pad_points),
+        "curve_values": stack("curve_values", pad_points),
+        "material_cost": stack("material_cost", lambda v: pad(v, n_materials)),
+        **compile_bom(union[0], union[1], quantity, n_products + n_materials),
+    }
+
+
+DEFAULT_DEBT_RATIO = 0.50  # Share of the equipment list financed with debt
+DEFAULT_INTEREST_RATE = 0.10
+
+
+# Debt raised to fund the equipment list at the given debt financing ratio
+def equipment_debt(compiled, debt_ratio):
+    return debt_ratio * compiled["equipment_cost"].sum(axis=-1)
+
+
+# Statement lines as (..., years) arrays so a whole scenario batch is computed
+# with the same array operations as a single model. debt is a scalar or one
+# value per scenario, held over the whole forecast; Interest Expense charges
+# interest_rate (a scalar or (..., 1)) on it and the balance sheet carries it
+# as a liability. Maintenance, depreciation and investing cash flow come
+# from the equipment lifecycle schedules, the balance sheet and operating
+# cash flow (indirect method) from the working capital. Income taxes carry
+# losses forward (see tax.py).
+def statement_lines(results, debt=0.0, interest_rate=0.0):
+    revenue, cogs = results["revenue"], results["cost"]
+    assets, capital = results["assets"], results["working_capital"]
+    zeros = np.zeros_like(revenue)
+    debt = zeros + np.asarray(debt)[..., None]
+    lines = {"Total Revenue": revenue, "COGS": cogs}
+    lines["Gross Profit"] = revenue - cogs
+    lines["Operating Expenses"] = cogs * 0.20  # Placeholder for OpEx
+    lines["Maintenance"] = zeros + assets["maintenance"].sum(axis=-2)
+    lines["EBITDA"] = lines["Gross Profit"] - lines["Operating Expenses"] - lines["Maintenance"]
+    lines["Depreciation"] = zeros + assets["depreciation"].sum(axis=-2)
+    lines["EBIT"] = lines["EBITDA"] - lines["Depreciation"]
+    lines["Interest Expense"] = debt * interest_rate
+    lines["Pre-Tax Income"] = lines["EBIT"] - lines["Interest Expense"]
+    taxes = income_taxes(lines["Pre-Tax Income"], lines["Depreciation"], **results["tax"])
+    lines["Income Tax"] = taxes["expense"]
+    lines["Net Income"] = lines["Pre-Tax Income"] - lines["Income Tax"]
+    lines["Taxable Income"] = taxes["taxable_income"]
+    lines["Current Tax"] = taxes["current"]
+    lines["Tax Loss Carryforward"] = taxes["loss_carryforward"]
+    lines["Deferred Taxes"] = taxes["deferred"]
+    lines["Deferred Tax Liability"] = np.cumsum(taxes["deferred"], axis=-1)
+
+    lines["Net PP&E"] = zeros + assets["book_value"].sum(axis=-2)
+    lines["Accounts Receivable"] = capital["receivable"]
+    lines["Inventory"] = capital["inventory"]
+    lines["Accounts Payable"] = capital["payable"]
+    lines["Assets"] = lines["Accounts Receivable"] + lines["Inventory"] + lines["Net PP&E"]
+    lines["Liabilities"] = lines["Accounts Payable"] + lines["Deferred Tax Liability"] + debt
+    lines["Equity"] = lines["Assets"] - lines["Liabilities"]
+    lines["Change in Working Capital"] = capital["change"]
+    lines["Operating Cash Flow"] = (lines["Net Income"] + lines["Depreciation"] + lines["Deferred Taxes"]
+                                    - lines["Change in Working Capital"])
+    # Replacement and expansion capex less salvage proceeds
+    lines["Investing Cash Flow"] = zeros + (assets["salvage"] - assets["capex"]).sum(axis=-2)
+    lines["Financing Cash Flow"] = lines["EBITDA"] * 0.1  # Placeholder assumption
+    return lines
+
+INCOME_STATEMENT_LINES = ["Gross Profit", "Operating Expenses", "Maintenance", "EBITDA", "Depreciation", "EBIT", "Interest Expense",
+                          "Pre-Tax Income", "Income Tax", "Net Income"]
+BALANCE_SHEET_LINES = ["Accounts Receivable", "Inventory", "Net PP&E", "Assets", "Accounts Payable", "Deferred Tax Liability",
+                       "Liabilities", "Equity"]
+TAX_LINES = ["Taxable Income", "Current Tax", "Deferred Taxes", "Tax Loss Carryforward"]
+CASH_FLOW_LINES = ["Deferred Taxes", "Change in Working Capital", "Operating Cash Flow", "Investing Cash Flow", "Financing Cash Flow"]
+
+
+def income_statement(results, product_names, lines):
+    financial_df = pd.DataFrame({"Year": results["years"], "Total Revenue": lines["Total Revenue"], "COGS": lines["COGS"]})
+
+    for product_name, rev_list in zip(product_names, results["product_revenue"]):
+        financial_df[product_name + " Revenue"] = rev_list
+
+    for line in INCOME_STATEMENT_LINES:
+        financial_df[line] = lines[line]
+    return financial_df
+
+
+def balance_sheet(results, lines):
+    return pd.DataFrame({"Year": results["years"], **{line: lines[line] for line in BALANCE_SHEET_LINES}})
+
+
+def cash_flow(results, lines):
+    return pd.DataFrame({"Year": results["years"], **{line: lines[line] for line in CASH_FLOW_LINES}})
+
+
+def tax_schedule(results, lines):
+    return pd.DataFrame({"Year": results["years"], **{line: lines[line] for line in TAX_LINES}})
+
+
+# SWOT lists for one scenario from the declarative rules in swot_rules
+def generate_swot_analysis(revenue_forecast, cost_forecast, utilization_rate):
+    flags = evaluate_rules({"revenue": np.asarray(revenue_forecast, dtype=float), "cost": np.asarray(cost_forecast, dtype=float),
+                            "utilization": np.asarray(utilization_rate, dtype=float)})
+    return swot_lists(flags)
+
+# Believability score (0-100) for one scenario from its revenue, cost and
+# utilization; see investor_score for the full, explainable scoring
+def investor_sanity_check(revenue_forecast, cost_forecast, utilization_rate):
+    scores, _ = score_scenarios({"revenue": np.asarray(revenue_forecast, dtype=float), "cost": np.asarray(cost_forecast, dtype=float),
+                                 "utilization": np.asarray(utilization_rate, dtype=float)})
+    return int(scores)
+
+def export_to_excel(financial_model):
+    file_path = "financial_report.xlsx"
+    financial_model.to_excel(file_path, index=False)
+    return file_path
@@ -0,0 +1,118 @@
+import numpy as np
+from swot_rules import compile_condition, metric_inputs
+
+# Investor believability score: 100 points minus the points of every criterion
+# that fires, clamped to 0-100. Criteria are data in the same form as the SWOT
+# rules (see swot_rules) plus the points they deduct. A criterion is skipped
+# when its metric needs a series the caller did not provide, e.g. NPV when only
+# revenue, cost and utilization are known.
+
+DISCOUNT_RATE = 0.10
+HURDLE_RATE = 0.15
+PAYBACK_YEARS = 5
+SCORE_BINS = np.arange(0, 101, 10)
+
+SCORING_CRITERIA = [
+    {"name": "Zero revenue", "metric": "max(revenue)", "op": "<=", "threshold": 0, "points": 100,
+     "message": "The forecast has no revenue"},
+    {"name": "Growth multiple", "metric": "max(revenue) / min(revenue)", "op": ">", "threshold": 5, "points": 15,
+     "message": "Revenue grows more than 5x over the forecast"},
+    {"name": "Utilization", "metric": "utilization", "aggregate": "max", "op": ">", "threshold": 95, "points": 10,
+     "message": "Utilization above 95% with no extra investment"},
+    {"name": "Coverage", "metric": "min(revenue) / min(cost)", "op": "<", "threshold": 1, "points": 20,
+     "message": "Revenue does not cover costs in the weakest year"},
+    {"name": "Leverage", "metric": "leverage", "op": ">", "threshold": 4, "points": 10,
+     "message": "Debt is more than 4x peak EBITDA, or EBITDA never turns positive"},
+    {"name": "NPV", "metric": "npv", "op": "<", "threshold": 0, "points": 15,
+     "message": f"Negative NPV at a {DISCOUNT_RATE:.0%} discount rate"},
+    {"name": "IRR", "metric": "irr", "op": "<", "threshold": HURDLE_RATE, "points": 10,
+     "message": f"IRR below the {HURDLE_RATE:.0%} hurdle rate"},
+    {"name": "Payback", "metric": "payback", "op": ">", "threshold": PAYBACK_YEARS, "points": 10,
+     "message": f"Investment not paid back within {PAYBACK_YEARS} years"},
+]
+
+
+def compile_criteria(criteria):
+    return [(criterion, compile_condition(criterion), metric_inputs(criterion["metric"])) for criterion in criteria]
+
+_COMPILED_CRITERIA = compile_criteria(SCORING_CRITERIA)
+
+
+# NPV, IRR and payback of an up-front investment followed by yearly cash flows
+# (..., years). IRR is found by bisection for all scenarios at once and is NaN
+# where the cash flows never recover the investment at any rate in range.
+def investment_metrics(cash_flows, investment, discount_rate=DISCOUNT_RATE):
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    investment = np.asarray(investment, dtype=float)
+    periods = np.arange(1, cash_flows.shape[-1] + 1)
+
+    def npv(rate):
+        return (cash_flows / (1 + np.asarray(rate)[..., None]) ** periods).sum(axis=-1) - investment
+
+    low = np.full(cash_flows.shape[:-1], -0.99)
+    high = np.full(cash_flows.shape[:-1], 10.0)
+    npv_low = npv(low)
+    bracketed = (np.sign(npv_low) != np.sign(npv(high))) & (investment > 0)
+    for _ in range(60):
+        mid = (low + high) / 2
+        npv_mid = npv(mid)
+        below = np.sign(npv_mid) == np.sign(npv_low)
+        low, npv_low = np.where(below, mid, low), np.where(below, npv_mid, npv_low)
+        high = np.where(below, high, mid)
+    irr = np.where(bracketed, (low + high) / 2, np.nan)
+
+    cumulative = np.cumsum(cash_flows, axis=-1)
+    recovered = cumulative >= investment[..., None]
+    first = np.asarray(recovered.argmax(axis=-1))
+    previous = np.where(first > 0, np.take_along_axis(cumulative, np.maximum(first - 1, 0)[..., None], -1)[..., 0], 0.0)
+    flow = np.take_along_axis(cash_flows, first[..., None], -1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(recovered.any(axis=-1), first + (investment - previous) / flow, np.inf)
+    payback = np.where(investment <= 0, 0.0, payback)
+
+    return {"npv": npv(discount_rate), "irr": irr, "payback": payback}
+
+
+# Score every scenario in one pass. series holds (..., years) arrays (revenue,
+# cost, utilization, ebitda) and per-scenario values (debt, leverage, npv, irr,
+# payback).
+# Returns the scores and each criterion's deduction as a (criteria, ...) array.
+def score_scenarios(series, criteria=None):
+    compiled = _COMPILED_CRITERIA if criteria is None else compile_criteria(criteria)
+    shape = np.shape(series["revenue"])[:-1]
+    deductions = np.zeros((len(compiled),) + shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i, (criterion, rule, inputs) in enumerate(compiled):
+            if inputs <= series.keys():
+                deductions[i] = np.where(rule(series), criterion["points"], 0)
+    scores = np.clip(100 - deductions.sum(axis=0), 0, 100)
+    return scores, deductions
+
+
+# Debt over peak EBITDA; infinite when there is debt and EBITDA never turns
+# positive, so the most indebted loss-making plans count as most leveraged
+def leverage(debt, ebitda):
+    peak = np.max(ebitda, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(debt <= 0, 0.0, np.where(peak <= 0, np.inf, debt / peak))
+
+
+# Inputs for score_scenarios from statement lines and the equipment investment
+def scoring_series(lines, utilization, investment, debt=0.0):
+    debt = np.broadcast_to(debt, np.shape(lines["EBITDA"])[:-1])
+    return {"revenue": lines["Total Revenue"], "cost": lines["COGS"], "utilization": utilization,
+            "ebitda": lines["EBITDA"], "debt": debt, "leverage": leverage(debt, lines["EBITDA"]),
+            **investment_metrics(lines["Operating Cash Flow"], np.broadcast_to(investment, np.shape(lines["EBITDA"])[:-1]))}
+
+
+# Criteria that fired for one scenario and the points each one cost
+def explain_score(deductions, criteria=SCORING_CRITERIA):
+    return [{"criterion": criterion["name"], "reason": criterion["message"], "points": -float(points)}
+            for criterion, points in zip(criteria, deductions) if points]
+
+
+# Histogram of scores in SCORE_BINS plus summary statistics, for simulations
+def score_distribution(scores):
+    counts, _ = np.histogram(scores, bins=SCORE_BINS)
+    return {"bins": SCORE_BINS.tolist(), "counts": counts.tolist(), "mean": float(np.mean(scores)),
+            "percentiles": {str(p): float(v) for p, v in zip((5, 50, 95), np.percentile(scores, (5, 50, 95)))}}
@@ -0,0 +1,162 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+import numpy as np
+from model_store import load_compiled
+from shop_floor import run_shop_floor
+from simulation import run_monte_carlo, run_sweep
+
+# Long-running simulations run in a pool of worker processes. Every job is a row
+# in an on-disk SQLite table that workers update with progress and partial
+# results, so the UI (or any other process) can poll, cancel and fetch results.
+
+JOB_DB = "jobs.db"
+JOB_RESULTS_DIR = "job_results"
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+PROGRESS_INTERVAL = 0.25  # Minimum seconds between progress writes from a worker
+
+JOB_KINDS = {"monte_carlo": run_monte_carlo, "sweep": run_sweep, "shop_floor": run_shop_floor}
+ACTIVE_STATUSES = ("queued", "running")
+
+_executor = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _connect(db_path):
+    connection = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            model_path TEXT NOT NULL,
+            params TEXT NOT NULL,
+            status TEXT NOT NULL,
+            progress REAL NOT NULL DEFAULT 0,
+            message TEXT,
+            partial TEXT,
+            result TEXT,
+            error TEXT,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            owner_pid INTEGER,
+            created REAL NOT NULL,
+            updated REAL NOT NULL
+        )""")
+    return connection
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Spawned workers avoid forking the Streamlit server's threads
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def _row(row):
+    job = dict(row)
+    for field in ("params", "partial", "result"):
+        job[field] = json.loads(job[field]) if job[field] else None
+    return job
+
+
+# Runs inside a worker process
+def _run_job(db_path, job_id):
+    connection = _connect(db_path)
+    job = _row(connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+    if job["cancel_requested"]:
+        connection.execute("UPDATE jobs SET status = 'cancelled', updated = ? WHERE id = ?", (time.time(), job_id))
+        return
+    connection.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ?", (time.time(), job_id))
+    last_write = [0.0]
+
+    def progress(fraction, message, partial=None):
+        now = time.time()
+        if fraction < 1 and now - last_write[0] < PROGRESS_INTERVAL:
+            return
+        last_write[0] = now
+        connection.execute("UPDATE jobs SET progress = ?, message = ?, partial = ?, updated = ? WHERE id = ?",
+                           (fraction, message, json.dumps(partial), now, job_id))
+        if connection.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]:
+            raise JobCancelled()
+
+    try:
+        compiled = load_compiled(job["model_path"])
+        summary, arrays = JOB_KINDS[job["kind"]](compiled, job["params"], progress)
+        os.makedirs(os.path.join(os.path.dirname(db_path), JOB_RESULTS_DIR), exist_ok=True)
+        np.savez(_arrays_path(db_path, job_id), **arrays)
+        connection.execute("UPDATE jobs SET status = 'done', progress = 1, result = ?, updated = ? WHERE id = ?",
+                           (json.dumps(summary), time.time(), job_id))
+    except JobCancelled:
+        connection.execute("UPDATE jobs SET status = 'cancelled', updated = ? WHERE id = ?", (time.time(), job_id))
+    except Exception as error:
+        connection.execute("UPDATE jobs SET status = 'failed', error = ?, updated = ? WHERE id = ?",
+                           (f"{type(error).__name__}: {error}", time.time(), job_id))
+    finally:
+        connection.close()
+
+
+def _arrays_path(db_path, job_id):
+    return os.path.join(os.path.dirname(db_path), JOB_RESULTS_DIR, f"job_{job_id}.npz")
+
+
+def submit_job(kind, model_path, params, db_path=JOB_DB):
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    db_path = os.path.abspath(db_path)
+    now = time.time()
+    with closing(_connect(db_path)) as connection:
+        job_id = connection.execute(
+            "INSERT INTO jobs (kind, model_path, params, status, owner_pid, created, updated) VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+            (kind, os.path.abspath(model_path), json.dumps(params), os.getpid(), now, now)).lastrowid
+    _get_executor().submit(_run_job, db_path, job_id)
+    return job_id
+
+
+def get_job(job_id, db_path=JOB_DB):
+    with closing(_connect(db_path)) as connection:
+        row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row(row) if row else None
+
+
+def list_jobs(limit=20, db_path=JOB_DB):
+    with closing(_connect(db_path)) as connection:
+        rows = connection.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    return [_row(row) for row in rows]
+
+
+# Workers notice the flag at their next progress report; queued jobs never start
+def cancel_job(job_id, db_path=JOB_DB):
+    with closing(_connect(db_path)) as connection:
+        connection.execute("UPDATE jobs SET cancel_requested = 1, updated = ? WHERE id = ? AND status IN (?, ?)",
+                           (time.time(), job_id, *ACTIVE_STATUSES))
+
+
+def job_arrays(job_id, db_path=JOB_DB):
+    with np.load(_arrays_path(os.path.abspath(db_path), job_id)) as arrays:
+        return {key: arrays[key] for key in arrays.files}
+
+
+# Jobs left queued or running by a process that no longer exists can never finish
+def recover_jobs(db_path=JOB_DB):
+    with closing(_connect(db_path)) as connection:
+        for row in connection.execute("SELECT id, owner_pid FROM jobs WHERE status IN (?, ?)", ACTIVE_STATUSES).fetchall():
+            if row["owner_pid"] != os.getpid() and not _pid_alive(row["owner_pid"]):
+                connection.execute("UPDATE jobs SET status = 'failed', error = 'Interrupted by a server restart', updated = ? WHERE id = ?",
+                                   (time.time(), row["id"]))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
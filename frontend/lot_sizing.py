@@ -0,0 +1,63 @@
+import numpy as np
+from catalog_editor import LABOR_ROLES
+
+# Batch-size economics. Every cost driver on a product's routing may need
+# "Setup Hours" per batch on top of its hours per unit. For demand D a year,
+# setup cost S per batch (setup hours x cost per hour) and holding cost H per
+# unit-year (Holding Rate x unit cost) the economic lot size is
+#
+#   Q* = sqrt(2 D S / H)
+#
+# Setups also use machine time. Where the setups at economic lot sizes do not
+# fit in a machine's hours left over after running, the lots of every product
+# using that machine are stretched by the overload ratio, which always makes
+# the setups fit. A product's entered "Lot Size" overrides the optimizer.
+# Everything is evaluated at once over (..., products, years).
+
+DEFAULT_HOLDING_RATE = 0.20  # Yearly cost of carrying inventory, as a share of unit cost
+
+
+def has_setups(compiled):
+    return "driver_setup_hours" in compiled and bool((compiled["driver_setup_hours"] > 0).any())
+
+
+# Lot sizes for demand (..., products, years). unit_value is the unit cost the
+# inventory is carried at, run_load the hours each driver works without setups
+# (..., drivers, years), capacity the machines' available hours and rate the
+# cost per hour of every driver (..., products, drivers, years), escalated as
+# in the forecast (default: the entered rates).
+# Returns lot_size and batches (..., products, years), setup_load (..., drivers,
+# years) and lot_cost: setup plus holding cost per unit (..., products, years).
+def economic_lot_sizes(compiled, demand, unit_value, run_load, capacity, rate=None):
+    setup_hours = compiled["driver_setup_hours"]
+    rate = compiled["driver_rate"][..., None] if rate is None else rate
+    setup_cost = (rate * setup_hours[..., None]).sum(axis=-2)
+    holding = compiled["holding_rate"][..., None] * unit_value
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        economic = np.where(holding > 0, np.sqrt(2 * demand * setup_cost / holding), np.inf)
+
+        # Setup hours each machine needs at economic lot sizes vs. its spare hours
+        n_machines = capacity.shape[-2]
+        machine_setup = setup_hours[..., len(LABOR_ROLES):len(LABOR_ROLES) + n_machines]
+        setup_load = np.einsum("...py,...pm->...my", np.nan_to_num(demand / economic), machine_setup)
+        spare = capacity - run_load[..., len(LABOR_ROLES):len(LABOR_ROLES) + n_machines, :]
+        stretch = np.where(setup_load > spare, np.where(spare > 0, setup_load / spare, np.inf), 1.0)
+        uses = (machine_setup > 0)[..., None]
+        stretch = np.max(np.where(uses, stretch[..., None, :, :], 1.0), axis=-2, initial=1.0)
+
+        # Between one unit and one batch for the whole year's demand
+        lot_size = np.clip(np.nan_to_num(economic * stretch, nan=np.inf), 1.0, np.maximum(demand, 1.0))
+        fixed = ~np.isnan(compiled["lot_size"])[..., None]
+        lot_size = np.where(fixed, compiled["lot_size"][..., None], lot_size)
+        batches = np.where(demand > 0, demand / lot_size, 0.0)
+        # Products without setups or a fixed lot size keep flowing one unit at a time, at no lot cost
+        batched = (setup_cost > 0) | fixed
+        lot_cost = np.where(batched & (demand > 0), (setup_cost * batches + holding * lot_size / 2) / demand, 0.0)
+
+    return {
+        "lot_size": lot_size,
+        "batches": batches,
+        "setup_load": np.einsum("...py,...pd->...dy", batches, setup_hours),
+        "lot_cost": lot_cost,
+    }
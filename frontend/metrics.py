@@ -0,0 +1,163 @@
+import contextvars
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from perf import STAGE_LISTENERS
+
+# Prometheus-style metrics kept in process memory and exposed in the text
+# exposition format, either from a local HTTP endpoint or a file that a
+# node_exporter textfile collector picks up.
+#
+#   METRICS_PORT=9464   serve http://127.0.0.1:9464/metrics
+#   METRICS_FILE=path   rewrite the file after every rerun
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "model_stage_seconds": ("histogram", "Latency of model evaluation stages (forecast, statements, export, ...)"),
+    "model_scenarios_total": ("counter", "Scenarios evaluated by the financial engine"),
+    "model_cache_requests_total": ("counter", "Cache lookups by cache and result (hit/miss)"),
+    "model_cache_hit_ratio": ("gauge", "Share of cache lookups that were hits"),
+    "model_products": ("gauge", "Products in the evaluated model"),
+    "model_equipment": ("gauge", "Equipment items in the evaluated model"),
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_gauges = {}      # (name, labels) -> value
+_histograms = {}  # (name, labels) -> {"buckets": [...], "sum", "count"}
+_server = None
+
+# Saved model the current rerun or request is evaluating; added as a label so a
+# slow model can be told apart from the rest of the fleet
+_current_model = contextvars.ContextVar("metrics_model", default="")
+
+
+def set_current_model(model):
+    _current_model.set(model)
+
+def _labels(labels):
+    labels = dict(labels or {})
+    labels.setdefault("model", _current_model.get())
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, labels=None):
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def set_gauge(name, value, labels=None):
+    with _lock:
+        _gauges[(name, _labels(labels))] = value
+
+def observe(name, value, labels=None, buckets=LATENCY_BUCKETS):
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"bounds": buckets, "buckets": [0] * len(buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(histogram["bounds"]):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+def record_cache(cache, hit, model=None):
+    labels = {"cache": cache, "result": "hit" if hit else "miss"}
+    if model is not None:
+        labels["model"] = model
+    inc("model_cache_requests_total", labels=labels)
+
+def record_model_size(products, equipment):
+    set_gauge("model_products", products)
+    set_gauge("model_equipment", equipment)
+
+def record_stage(stage_name, seconds):
+    observe("model_stage_seconds", seconds, {"stage": stage_name})
+
+# Every perf.stage() timing also feeds the latency histogram
+STAGE_LISTENERS.append(record_stage)
+
+
+def _cache_ratios():
+    totals = {}
+    for (name, labels), value in _counters.items():
+        if name == "model_cache_requests_total":
+            labels = dict(labels)
+            key = (("cache", labels["cache"]), ("model", labels["model"]))
+            hits, total = totals.get(key, (0, 0))
+            totals[key] = (hits + (value if labels["result"] == "hit" else 0), total + value)
+    return {("model_cache_hit_ratio", key): hits / total for key, (hits, total) in totals.items() if total}
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus():
+    with _lock:
+        series = {}
+        for (name, labels), value in list(_counters.items()) + list(_gauges.items()) + list(_cache_ratios().items()):
+            series.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in _histograms.items():
+            lines = series.setdefault(name, [])
+            for bound, count in zip(histogram["bounds"], histogram["buckets"]):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+
+    output = []
+    for name, lines in series.items():
+        metric_type, help_text = METRICS.get(name, ("untyped", name))
+        output.append(f"# HELP {name} {help_text}")
+        output.append(f"# TYPE {name} {metric_type}")
+        output.extend(lines)
+    return "\n".join(output) + "\n"
+
+
+def write_metrics_file(path):
+    temp_file = path + ".tmp"
+    with open(temp_file, "w") as f:
+        f.write(render_prometheus())
+    os.replace(temp_file, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the app's console
+
+
+# Serve /metrics from a daemon thread; repeated calls (every rerun) are no-ops
+def start_metrics_server(port, host="127.0.0.1"):
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
+
+
+# Enable exporting from the environment: METRICS_PORT and/or METRICS_FILE
+def start_exporter_from_env():
+    port = os.environ.get("METRICS_PORT")
+    if port:
+        start_metrics_server(int(port), os.environ.get("METRICS_HOST", "127.0.0.1"))
+    return os.environ.get("METRICS_FILE")
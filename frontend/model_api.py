@@ -0,0 +1,327 @@
+import argparse
+import asyncio
+import copy
+import json
+import os
+import numpy as np
+from model_store import load_model, load_compiled, compile_model, migrate
+from financial_engine import (
+    forecast, utilization_rate, statement_lines, stack_compiled, equipment_debt,
+    INCOME_STATEMENT_LINES, BALANCE_SHEET_LINES, CASH_FLOW_LINES, DEFAULT_DEBT_RATIO, DEFAULT_INTEREST_RATE,
+)
+from swot_rules import evaluate_rules, swot_lists
+from capacity import machine_load, peak_utilization
+from investor_score import score_scenarios, scoring_series, explain_score
+from perf import stage
+from metrics import inc, record_cache, set_current_model
+
+# Headless model evaluation over HTTP/JSON:
+#
+#   POST /evaluate  {"model_ref": "financial_model_data.json", "overrides": {...}}
+#                   {"model": {...saved model...}, "overrides": {...}}
+#                   optionally with "debt_ratio" and "interest_rate" (defaults as in the app)
+#   GET  /health
+#
+# Overrides: {"add_equipment": [{...}], "remove_equipment": ["name"], "add_products": [{...}],
+#             "products": {"name": {"Unit Price": 30000}}, "cost_drivers": {"name": {...}}}
+#
+# Requests arriving within BATCH_WINDOW of each other are evaluated together as
+# one scenario batch by the vectorized engine.
+
+BATCH_WINDOW = 0.002  # Seconds to wait for more requests before evaluating a batch
+MAX_BATCH = 256
+MAX_BODY_BYTES = 10_000_000
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Saved models are parsed once per file version and shared between requests
+_model_cache = {}
+
+def _resolve_ref(model_dir, model_ref):
+    path = os.path.realpath(os.path.join(model_dir, model_ref))
+    if not path.startswith(os.path.realpath(model_dir) + os.sep) or not os.path.exists(path):
+        raise ApiError(404, f"Unknown model_ref '{model_ref}'")
+    return path
+
+def _cached_model(path):
+    mtime = os.stat(path).st_mtime_ns
+    cached = _model_cache.get(path)
+    record_cache("api_model", cached is not None and cached[0] == mtime, model=path)
+    if cached is None or cached[0] != mtime:
+        cached = _model_cache[path] = (mtime, load_model(path))
+    return cached[1]
+
+
+def apply_overrides(model, overrides):
+    model = copy.deepcopy(model)
+    removed = set(overrides.get("remove_equipment", []))
+    model["equipment"] = [eq for eq in model["equipment"] if eq["Name"] not in removed]
+    model["equipment"] += overrides.get("add_equipment", [])
+    model["products"] += overrides.get("add_products", [])
+    changes = overrides.get("products", {})
+    for product in model["products"]:
+        product.update(changes.get(product["Name"], {}))
+    model["cost_drivers"].update(overrides.get("cost_drivers", {}))
+    return model
+
+
+# Turn one request payload into compiled model arrays
+def compile_payload(payload, model_dir):
+    if not isinstance(payload, dict):
+        raise ApiError(400, "Request body must be a JSON object")
+    overrides = payload.get("overrides") or {}
+    if not isinstance(overrides, dict):
+        raise ApiError(400, "'overrides' must be an object")
+    if "model_ref" in payload:
+        if not isinstance(payload["model_ref"], str):
+            raise ApiError(400, "'model_ref' must be a file name")
+        path = _resolve_ref(model_dir, payload["model_ref"])
+        try:
+            if not overrides:
+                return load_compiled(path)  # Fast path: numeric arrays from the .npz sidecar
+            model = _cached_model(path)
+        except (OSError, ValueError) as error:
+            raise ApiError(500, f"Could not load model: {error}")
+    elif "model" in payload:
+        if not isinstance(payload["model"], dict):
+            raise ApiError(400, "'model' must be an object")
+        try:
+            model = migrate(copy.deepcopy(payload["model"]))
+        except (AttributeError, KeyError, TypeError, ValueError) as error:
+            raise ApiError(400, f"Invalid model: {error}")
+    else:
+        raise ApiError(400, "Request needs either 'model' or 'model_ref'")
+    try:
+        return compile_model(apply_overrides(model, overrides))
+    except (AttributeError, KeyError, TypeError, ValueError) as error:
+        raise ApiError(400, f"Invalid model or overrides: {error}")
+
+
+# Debt financing ratio and interest rate of one request payload
+def payload_financing(payload):
+    try:
+        debt_ratio = float(payload.get("debt_ratio", DEFAULT_DEBT_RATIO))
+        interest_rate = float(payload.get("interest_rate", DEFAULT_INTEREST_RATE))
+    except (TypeError, ValueError):
+        raise ApiError(400, "debt_ratio and interest_rate must be numbers")
+    if not 0 <= debt_ratio <= 1 or interest_rate < 0:
+        raise ApiError(400, "debt_ratio must be between 0 and 1 and interest_rate at least 0")
+    return debt_ratio, interest_rate
+
+
+def _series(lines, names, s):
+    return {name: lines[name][s].tolist() for name in names}
+
+# Evaluate many compiled models as one batch and build a response per model.
+# financing holds each model's (debt_ratio, interest_rate); default as in the app.
+def evaluate_batch(compiled_list, financing=None):
+    if financing is None:
+        financing = [(DEFAULT_DEBT_RATIO, DEFAULT_INTEREST_RATE)] * len(compiled_list)
+    debt_ratio, interest_rate = np.array(financing, dtype=np.float64).reshape(len(compiled_list), 2).T
+    with stage("forecast"):
+        batch = stack_compiled(compiled_list)
+        results = forecast(batch)
+        utilization = utilization_rate(results["production"], batch["equipment_capacity"])
+        _, machine_utilization = machine_load(batch, results)
+    with stage("statements"):
+        debt = equipment_debt(batch, debt_ratio)
+        lines = statement_lines(results, debt, interest_rate[:, None])
+    inc("model_scenarios_total", len(compiled_list))
+
+    responses = []
+    with stage("swot"), np.errstate(divide="ignore", invalid="ignore"):
+        flags = evaluate_rules({"revenue": results["revenue"], "cost": results["cost"], "utilization": utilization,
+                                "machine_utilization": peak_utilization(machine_utilization)})
+        scores, deductions = score_scenarios(scoring_series(lines, utilization, batch["equipment_cost"].sum(axis=-1), debt))
+        for s, compiled in enumerate(compiled_list):
+            n_products = len(compiled["product_names"])
+            revenue, cost = results["revenue"][s], results["cost"][s]
+            response = {
+                "years": results["years"].tolist(),
+                "income_statement": {
+                    "Total Revenue": revenue.tolist(),
+                    "COGS": cost.tolist(),
+                    "Product Revenue": dict(zip(compiled["product_names"].tolist(), results["product_revenue"][s, :n_products].tolist())),
+                    **_series(lines, INCOME_STATEMENT_LINES, s),
+                },
+                "balance_sheet": _series(lines, BALANCE_SHEET_LINES, s),
+                "cash_flow": _series(lines, CASH_FLOW_LINES, s),
+                "utilization_rate": utilization[s].tolist(),
+                "machine_utilization": dict(zip(compiled["equipment_names"].tolist(),
+                                                np.where(np.isnan(machine_utilization[s]), None, machine_utilization[s]).tolist())),
+            }
+            if n_products:
+                strengths, weaknesses, opportunities, threats = swot_lists(flags[:, s])
+                response["swot"] = {"strengths": strengths, "weaknesses": weaknesses,
+                                    "opportunities": opportunities, "threats": threats}
+                response["investor_sanity_check"] = int(scores[s])
+                response["investor_score_breakdown"] = explain_score(deductions[:, s])
+            responses.append(response)
+    return responses
+
+
+# Responses for request payloads, each a response dict or the ApiError of its
+# request: the valid requests are evaluated as one batch, and if the batch
+# fails they are evaluated one by one so only the failing request errors
+def evaluate_requests(payloads, model_dir="."):
+    outcomes, valid = [None] * len(payloads), []
+    for i, payload in enumerate(payloads):
+        try:
+            valid.append((i, compile_payload(payload, model_dir), payload_financing(payload)))
+        except ApiError as error:
+            outcomes[i] = error
+    if not valid:
+        return outcomes
+    indices, compiled, financing = zip(*valid)
+    try:
+        responses = evaluate_batch(list(compiled), list(financing))
+    except Exception:
+        responses = [_evaluate_one(c, f) for c, f in zip(compiled, financing)]
+    for i, response in zip(indices, responses):
+        outcomes[i] = response
+    return outcomes
+
+def _evaluate_one(compiled, financing):
+    try:
+        return evaluate_batch([compiled], [financing])[0]
+    except (IndexError, KeyError, TypeError, ValueError) as error:
+        return ApiError(400, f"Could not evaluate model: {error}")
+    except Exception as error:
+        return ApiError(500, f"Could not evaluate model: {error}")
+
+
+# Synchronous entry point: evaluate request payloads directly, without HTTP
+def evaluate_payloads(payloads, model_dir="."):
+    responses = evaluate_requests(payloads, model_dir)
+    for response in responses:
+        if isinstance(response, ApiError):
+            raise response
+    return responses
+
+
+# Collects concurrent requests and evaluates them together in a worker thread;
+# loading and compiling the models runs there too, off the event loop
+async def batch_worker(queue, model_dir):
+    loop = asyncio.get_running_loop()
+    while True:
+        pending = [await queue.get()]
+        deadline = loop.time() + BATCH_WINDOW
+        while len(pending) < MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                pending.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        payloads = [payload for payload, _ in pending]
+        try:
+            outcomes = await loop.run_in_executor(None, evaluate_requests, payloads, model_dir)
+        except Exception as error:  # Keep the worker alive
+            outcomes = [ApiError(500, str(error))] * len(pending)
+        for (_, future), outcome in zip(pending, outcomes):
+            if future.cancelled():
+                continue
+            if isinstance(outcome, ApiError):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise ApiError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?")[0], headers, body
+
+def _write_response(writer, status, payload, keep_alive):
+    reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {reasons.get(status, 'Error')}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+    )
+
+
+async def handle_connection(reader, writer, queue):
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except ApiError as error:
+                _write_response(writer, error.status, {"error": str(error)}, False)
+                break
+            except (ValueError, asyncio.IncompleteReadError):
+                _write_response(writer, 400, {"error": "Malformed HTTP request"}, False)
+                break
+            if request is None:
+                break
+            method, path, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+
+            if path == "/health":
+                status, payload = 200, {"status": "ok"}
+            elif path != "/evaluate":
+                status, payload = 404, {"error": f"No route for {path}"}
+            elif method != "POST":
+                status, payload = 405, {"error": "Use POST"}
+            else:
+                try:
+                    request_payload = json.loads(body or b"{}")
+                    future = asyncio.get_running_loop().create_future()
+                    await queue.put((request_payload, future))
+                    status, payload = 200, await future
+                except json.JSONDecodeError as error:
+                    status, payload = 400, {"error": f"Invalid JSON: {error}"}
+                except ApiError as error:
+                    status, payload = error.status, {"error": str(error)}
+
+            _write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass  # Client went away mid-request
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, model_dir="."):
+    set_current_model("api")
+    queue = asyncio.Queue()
+    worker = asyncio.create_task(batch_worker(queue, model_dir))
+    server = await asyncio.start_server(lambda r, w: handle_connection(r, w, queue), host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        worker.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless HTTP/JSON API for the manufacturing financial model")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model-dir", default=".", help="Directory that model_ref paths are resolved against")
+    args = parser.parse_args()
+    print(f"Serving model API on http://{args.host}:{args.port} (models from {os.path.abspath(args.model_dir)})")
+    asyncio.run(serve(args.host, args.port, args.model_dir))
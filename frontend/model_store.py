@@ -0,0 +1,283 @@
+import json
+import os
+import shutil
+import sys
+import numpy as np
+from catalog_editor import LABOR_ROLES, LIFECYCLE_OPTIONS, ensure_ids, parse_curve
+from metrics import record_cache
+from capacity import CALENDAR_FIELDS, CALENDAR_KEYS, capacity_table
+from financial_engine import FORECAST_YEARS
+from bom import compile_bom
+from lot_sizing import DEFAULT_HOLDING_RATE
+from assets import ASSET_FIELDS, ASSET_KEYS
+from working_capital import WORKING_CAPITAL_FIELDS, WORKING_CAPITAL_KEYS
+from tax import TAX_FIELDS, TAX_KEYS
+from demand import DEMAND_FIELDS, DEMAND_KEYS
+from escalation import escalation_rates, cumulative_index
+from energy import ENERGY_FIELDS, ENERGY_KEYS, band_hours, tariff
+from staffing import DEFAULT_SUPERVISION_SPAN, STAFFING_FIELDS, STAFFING_KEYS
+
+SCHEMA_VERSION = 1
+COMPILED_FORMAT = 14  # Bump when the sidecar array layout changes
+
+# Unified on-disk layout (schema_version 1):
+#   equipment            list of {"ID", "Name", "Cost", "Useful Life", "Max Capacity", "Financing",
+#                                 shift calendar and OEE fields (see capacity.CALENDAR_FIELDS)?,
+#                                 asset lifecycle fields (see assets.ASSET_FIELDS)?,
+#                                 power draw and shift start (see energy.ENERGY_FIELDS)?, ...}
+#   products             list of {"ID", "Name", "Initial Units", "Unit Price", "Growth Rate", "Unit Cost"?,
+#                                 "Lifecycle"?, "Launch Year"?, "Ramp Years"?, "Plateau Years"?, "Decline Rate"?,
+#                                 "End of Life Year"?, "Custom Curve"?, "Lot Size"?, "Holding Rate"?,
+#                                 working capital days (see working_capital.WORKING_CAPITAL_FIELDS)?,
+#                                 demand model (see demand.DEMAND_FIELDS)?, ...}
+#   cost_drivers         {product name: {"Equipment Costs": {equipment: {"Cost Per Hour", "Hours Per Unit",
+#                                                                    "Learning Rate"?, "Reference Units"?,
+#                                                                    "Setup Hours"?}},
+#                                        "Machinist Labor" | "Design Labor" | "Supervision": {...}}}
+#   materials            list of {"ID", "Name", "Unit Cost"} purchased parts and materials
+#   bom                  {product name: {component (product or material name): quantity per unit}}
+#   cost_ratios          {"Cost of Goods Sold": 0.5, ...} share-of-revenue ratios
+#   equipment_unit_costs {equipment type: {"Equipment Cost Per Unit", "Machinist Labor", ...}}
+#   assumptions          model-wide settings: {"Receivable Days"?, "Inventory Days"?, "Payable Days"?,
+#                                                        tax settings (see tax.TAX_FIELDS)?, "Supervision Span"?,
+#                                                        "Staffing"?: {labor role: staffing.STAFFING_FIELDS},
+#                                                        "Escalation"?: {cost center: rate or {year: rate}},
+#                                                        "Energy Tariff"?: energy.TARIFF_FIELDS, ...}
+def empty_model():
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "equipment": [],
+        "products": [],
+        "cost_drivers": {},
+        "materials": [],
+        "bom": {},
+        "cost_ratios": {},
+        "equipment_unit_costs": {},
+        "assumptions": {},
+    }
+
+
+def schema_version(data):
+    return data.get("schema_version", 0)
+
+
+# Version 0 covers every layout written by the earlier app variants:
+#   financial_model.json        {"equipment", "products"}
+#   financial_model_debug.json  {"equipment", "products", "product_costs": {product: drivers}}
+#   financial_model_data.json   {"equipment", "products", "cost_drivers": [ratio dicts]}
+#   streamlit_app.py            {"equipment", "products", "cost_drivers": {product: drivers}}
+#   Enhanced / Fixed_UI         {"equipment", "products", "cost_drivers": {equipment type: per-unit costs}}
+def migrate_v0(data):
+    model = empty_model()
+    model["equipment"] = list(data.get("equipment", []))
+    model["products"] = list(data.get("products", []))
+
+    drivers = data.get("cost_drivers", {})
+    if isinstance(drivers, list):
+        for ratios in drivers:
+            model["cost_ratios"].update(ratios)
+    else:
+        for name, entry in drivers.items():
+            if "Equipment Cost Per Unit" in entry:
+                model["equipment_unit_costs"][name] = entry
+            else:
+                model["cost_drivers"][name] = entry
+    model["cost_drivers"].update(data.get("product_costs", {}))
+
+    ensure_ids(model["equipment"])
+    ensure_ids(model["products"])
+    return model
+
+MIGRATIONS = {0: migrate_v0}
+
+
+def migrate(data):
+    version = schema_version(data)
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"Model file uses schema version {version}, newer than supported version {SCHEMA_VERSION}")
+    while version < SCHEMA_VERSION:
+        data = MIGRATIONS[version](data)
+        version = schema_version(data)
+    for key, default in empty_model().items():
+        data.setdefault(key, default)
+    return data
+
+
+# Save a model and its compiled sidecar; returns the compiled arrays
+def save_model(path, model):
+    model = {**model, "schema_version": SCHEMA_VERSION}
+    # Write to a temp file and swap it in so a save is all-or-nothing
+    temp_file = path + ".tmp"
+    with open(temp_file, "w") as f:
+        json.dump(model, f, indent=4)
+    os.replace(temp_file, path)
+    return write_compiled(path, model)
+
+
+# Load a model, migrating older layouts once: the original file is kept as
+# <path>.bak and the migrated model is written back in the current schema
+def load_model(path):
+    if not os.path.exists(path):
+        return empty_model()
+    with open(path, "r") as f:
+        data = json.load(f)
+    if schema_version(data) < SCHEMA_VERSION:
+        backup = path + ".bak"
+        if not os.path.exists(backup):
+            shutil.copy2(path, backup)
+        data = migrate(data)
+        save_model(path, data)
+        return data
+    return migrate(data)
+
+
+# Compiled sidecar: the model's numeric columns as flat arrays, so evaluation
+# paths that only need numbers can skip JSON parsing and validation
+def sidecar_path(path):
+    return os.path.splitext(path)[0] + ".npz"
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return np.array([COMPILED_FORMAT, SCHEMA_VERSION, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+def _column(items, field, default=np.nan):
+    return np.array([float(item.get(field, default)) for item in items], dtype=np.float64)
+
+def compile_model(model):
+    equipment, products, cost_drivers = model["equipment"], model["products"], model["cost_drivers"]
+    assumptions = model.get("assumptions", {})
+
+    # Driver axis: labor roles followed by every machine referenced by a product
+    equipment_names = [eq["Name"] for eq in equipment]
+    driver_names = list(LABOR_ROLES) + equipment_names
+    for drivers in cost_drivers.values():
+        driver_names += [name for name in drivers.get("Equipment Costs", {}) if name not in driver_names]
+    driver_index = {name: i for i, name in enumerate(driver_names)}
+
+    driver_rate = np.zeros((len(products), len(driver_names)))
+    driver_hours = np.zeros((len(products), len(driver_names)))
+    driver_learning_rate = np.ones((len(products), len(driver_names)))
+    driver_reference_units = np.full((len(products), len(driver_names)), np.nan)
+    driver_setup_hours = np.zeros((len(products), len(driver_names)))
+    for p, product in enumerate(products):
+        drivers = cost_drivers.get(product["Name"], {})
+        entries = [(role, drivers[role]) for role in LABOR_ROLES if role in drivers]
+        entries += list(drivers.get("Equipment Costs", {}).items())
+        for name, values in entries:
+            driver_rate[p, driver_index[name]] = values.get("Cost Per Hour", 0.0)
+            driver_hours[p, driver_index[name]] = values.get("Hours Per Unit", 0.0)
+            driver_learning_rate[p, driver_index[name]] = values.get("Learning Rate", 1.0)
+            driver_reference_units[p, driver_index[name]] = values.get("Reference Units", np.nan)
+            driver_setup_hours[p, driver_index[name]] = values.get("Setup Hours", 0.0)
+
+    # Lifecycle profiles; custom curve points are NaN-padded to the longest curve
+    lifecycle_kind = np.array([LIFECYCLE_OPTIONS.index(p.get("Lifecycle") or LIFECYCLE_OPTIONS[0]) for p in products], dtype=np.int64)
+    curves = [parse_curve(p["Custom Curve"]) if kind == LIFECYCLE_OPTIONS.index("Custom") else ([], [])
+              for p, kind in zip(products, lifecycle_kind)]
+    n_points = max((len(years) for years, _ in curves), default=0)
+    curve_years = np.full((len(products), n_points), np.nan)
+    curve_values = np.full((len(products), n_points), np.nan)
+    for p, (years, values) in enumerate(curves):
+        curve_years[p, :len(years)] = years
+        curve_values[p, :len(values)] = values
+
+    # Bill of materials over products followed by materials (see bom.py)
+    materials = model.get("materials", [])
+    node_index = {name: i for i, name in enumerate([p["Name"] for p in products] + [m["Name"] for m in materials])}
+    edges = [(node_index[parent], node_index[component], quantity)
+             for parent, components in model.get("bom", {}).items() if node_index.get(parent, len(products)) < len(products)
+             for component, quantity in components.items() if component in node_index]
+    parents, children, quantities = zip(*edges) if edges else ((), (), ())
+    bom = compile_bom(parents, children, quantities, len(products) + len(materials))
+
+    # Shift calendars and the machine x year capacity table for the forecast
+    calendar = {key: _column(equipment, field, CALENDAR_FIELDS[field]) for field, key in CALENDAR_KEYS.items()}
+
+    # Power draw and the scheduled hours of every machine in each tariff band
+    energy = {key: _column(equipment, field, ENERGY_FIELDS[field]) for field, key in ENERGY_KEYS.items()}
+    tariff_rate, tariff_week_band = tariff(assumptions.get("Energy Tariff", {}))
+
+    # Yearly escalation rates and their cumulative index per cost center
+    escalation_rate = escalation_rates(assumptions.get("Escalation", {}), FORECAST_YEARS)
+
+    return {
+        **calendar,
+        **{key: _column(equipment, field, ASSET_FIELDS[field]) for field, key in ASSET_KEYS.items()},
+        "capacity_years": FORECAST_YEARS,
+        "capacity_hours": capacity_table(calendar, FORECAST_YEARS),
+        **energy,
+        "tariff_rate": tariff_rate,
+        "tariff_week_band": tariff_week_band,
+        "energy_band_hours": band_hours(calendar, energy["energy_shift_start"], tariff_week_band, FORECAST_YEARS),
+        "escalation_years": FORECAST_YEARS,
+        "escalation_rate": escalation_rate,
+        "escalation_index": cumulative_index(escalation_rate),
+        "equipment_names": np.array(equipment_names, dtype=str),
+        "equipment_cost": _column(equipment, "Cost", 0.0),
+        "equipment_life": _column(equipment, "Useful Life", 1.0),
+        "equipment_capacity": _column(equipment, "Max Capacity", 0.0),
+        "product_names": np.array([p["Name"] for p in products], dtype=str),
+        "initial_units": _column(products, "Initial Units", 0.0),
+        "unit_price": _column(products, "Unit Price", 0.0),
+        "unit_cost": _column(products, "Unit Cost"),
+        "growth_rate": _column(products, "Growth Rate", 0.0),
+        "driver_names": np.array(driver_names, dtype=str),
+        "driver_rate": driver_rate,
+        "driver_hours": driver_hours,
+        "driver_learning_rate": driver_learning_rate,
+        "driver_reference_units": driver_reference_units,
+        "driver_setup_hours": driver_setup_hours,
+        "lot_size": _column(products, "Lot Size"),
+        "holding_rate": _column(products, "Holding Rate", DEFAULT_HOLDING_RATE),
+        **{key: _column(products, field, DEMAND_FIELDS[field]) for field, key in DEMAND_KEYS.items() if key != "reference_price"},
+        "reference_price": np.array([float(p.get("Reference Price", p.get("Unit Price", 0.0))) for p in products], dtype=np.float64),
+        **{key: _column(products, field, assumptions.get(field, WORKING_CAPITAL_FIELDS[field]))
+           for field, key in WORKING_CAPITAL_KEYS.items()},
+        **{key: np.float64(assumptions.get(field, TAX_FIELDS[field])) for field, key in TAX_KEYS.items()},
+        **{key: _column([assumptions.get("Staffing", {}).get(role, {}) for role in LABOR_ROLES], field, STAFFING_FIELDS[field])
+           for field, key in STAFFING_KEYS.items()},
+        "supervision_span": np.float64(assumptions.get("Supervision Span", DEFAULT_SUPERVISION_SPAN)),
+        "lifecycle_kind": lifecycle_kind,
+        "launch_year": _column(products, "Launch Year"),
+        "ramp_years": _column(products, "Ramp Years", 3.0),
+        "plateau_years": _column(products, "Plateau Years"),
+        "decline_rate": _column(products, "Decline Rate", 0.0),
+        "eol_year": _column(products, "End of Life Year"),
+        "curve_years": curve_years,
+        "curve_values": curve_values,
+        "material_names": np.array([m["Name"] for m in materials], dtype=str),
+        "material_cost": _column(materials, "Unit Cost", 0.0),
+        **bom,
+    }
+
+def write_compiled(path, model):
+    compiled = compile_model(model)
+    temp_file = sidecar_path(path) + ".tmp"
+    with open(temp_file, "wb") as f:
+        np.savez(f, fingerprint=_fingerprint(path), **compiled)
+    os.replace(temp_file, sidecar_path(path))
+    return compiled
+
+# Numeric arrays for a saved model, read from the sidecar when it matches the
+# JSON file and rebuilt (and rewritten) when it is missing or stale
+def load_compiled(path):
+    sidecar = sidecar_path(path)
+    if os.path.exists(path) and os.path.exists(sidecar):
+        with np.load(sidecar, allow_pickle=False) as arrays:
+            if np.array_equal(arrays["fingerprint"], _fingerprint(path)):
+                record_cache("compiled_sidecar", True, model=path)
+                return {key: arrays[key] for key in arrays.files if key != "fingerprint"}
+    record_cache("compiled_sidecar", False, model=path)
+    model = load_model(path)
+    if not os.path.exists(path):
+        return compile_model(model)
+    return write_compiled(path, model)
+
+
+# One-time migration of existing save files: python model_store.py <file> ...
+if __name__ == "__main__":
+    for file_path in sys.argv[1:]:
+        with open(file_path, "r") as f:
+            version = schema_version(json.load(f))
+        load_compiled(file_path)
+        print(f"{file_path}: schema {version} -> {SCHEMA_VERSION}, compiled to {sidecar_path(file_path)}")
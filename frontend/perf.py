@@ -0,0 +1,139 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+import pandas as pd
+
+PERF_LOG_FILE = "performance.log"
+PERF_LOG_MAX_BYTES = 1_000_000
+PERF_LOG_BACKUPS = 3
+
+# One JSON line per rerun, rotated so production logging stays bounded
+perf_logger = logging.getLogger("manufacturing_model.perf")
+perf_logger.setLevel(logging.INFO)
+perf_logger.propagate = False
+
+_current_run = contextvars.ContextVar("perf_run", default=None)
+_totals_lock = threading.Lock()
+STAGE_TOTALS = {}  # Process-wide {stage: {"calls", "seconds"}} across all reruns
+
+# Callbacks receiving (stage, seconds) for every timed stage, e.g. metrics export
+STAGE_LISTENERS = []
+
+
+def _ensure_log_handler():
+    if not perf_logger.handlers:
+        handler = RotatingFileHandler(PERF_LOG_FILE, maxBytes=PERF_LOG_MAX_BYTES, backupCount=PERF_LOG_BACKUPS)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        perf_logger.addHandler(handler)
+
+
+# Start collecting stage timings for the current rerun; memory deltas are only
+# traced on request since tracemalloc slows every allocation down
+def start_run(trace_memory=False):
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    run = {"started": time.perf_counter(), "stages": {}, "trace_memory": trace_memory, "finished": False,
+           "lock": threading.Lock()}
+    _current_run.set(run)
+    return run
+
+
+# Timing for code that can rerun on its own, e.g. a Streamlit fragment: joins the
+# rerun in progress, or records and logs a run of its own. Also usable as a decorator.
+@contextmanager
+def run_scope(page):
+    run = _current_run.get()
+    if run is not None and not run["finished"]:
+        yield run
+        return
+    run = start_run(trace_memory=tracemalloc.is_tracing())
+    try:
+        yield run
+    finally:
+        finish_run(page)
+
+
+@contextmanager
+def stage(name):
+    run = _current_run.get()
+    trace_memory = run is not None and run["trace_memory"]
+    memory_before = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if run is not None:
+            # Work on another thread (e.g. the recalculator) shares the rerun's run;
+            # once that run is logged, its stages only count towards the totals
+            with run["lock"]:
+                if not run["finished"]:
+                    record = run["stages"].setdefault(name, {"calls": 0, "seconds": 0.0, "memory": 0})
+                    record["calls"] += 1
+                    record["seconds"] += seconds
+                    if trace_memory:
+                        record["memory"] += tracemalloc.get_traced_memory()[0] - memory_before
+        with _totals_lock:
+            totals = STAGE_TOTALS.setdefault(name, {"calls": 0, "seconds": 0.0})
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+        for listener in STAGE_LISTENERS:
+            listener(name, seconds)
+
+
+# Close the current rerun: write it to the rotating log and return its stage table
+def finish_run(page=None):
+    run = _current_run.get()
+    if run is None:
+        return None
+    _current_run.set(None)
+    with run["lock"]:
+        run["finished"] = True
+    total = time.perf_counter() - run["started"]
+
+    _ensure_log_handler()
+    perf_logger.info(json.dumps({
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "page": page,
+        "total_ms": round(total * 1000, 2),
+        "stages": {name: {"calls": r["calls"], "ms": round(r["seconds"] * 1000, 2), "memory_kb": round(r["memory"] / 1024, 1)}
+                   for name, r in run["stages"].items()},
+    }))
+    return stage_table(run, total)
+
+
+def stage_table(run, total):
+    rows = []
+    for name, record in run["stages"].items():
+        totals = STAGE_TOTALS.get(name, {"calls": 0})
+        rows.append({
+            "Stage": name,
+            "Calls": record["calls"],
+            "Time (ms)": record["seconds"] * 1000,
+            "Share (%)": record["seconds"] / total * 100 if total > 0 else 0.0,
+            "Memory Δ (KB)": record["memory"] / 1024 if run["trace_memory"] else None,
+            "Process Calls": totals["calls"],
+        })
+    rows.append({"Stage": "total rerun", "Calls": 1, "Time (ms)": total * 1000, "Share (%)": 100.0,
+                 "Memory Δ (KB)": None, "Process Calls": None})
+    return pd.DataFrame(rows)
+
+
+# Optional debug panel in the sidebar; render last so it covers the whole rerun
+def render_panel(table):
+    import streamlit as st
+
+    if table is None:
+        return
+    with st.sidebar.expander("⏱ Performance", expanded=True):
+        st.dataframe(table.style.format({"Time (ms)": "{:,.1f}", "Share (%)": "{:.0f}", "Memory Δ (KB)": "{:,.1f}",
+                                         "Process Calls": "{:,.0f}"}, na_rep="–"),
+                     hide_index=True, use_container_width=True)
+        st.caption(f"Logged to {PERF_LOG_FILE}")
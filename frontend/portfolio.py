@@ -0,0 +1,174 @@
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from model_store import load_compiled
+from financial_engine import forecast, statement_lines, equipment_debt
+from working_capital import DAYS_PER_YEAR, trailing_balance
+
+# Multi-plant portfolio. Every plant is an ordinary model save file with its own
+# equipment, products and assumptions; the portfolio file lists the plants and
+# the intercompany transfers between them:
+#
+#   plants      list of {"Name", "Model": save file, relative to the portfolio file}
+#   transfers   list of {"From": selling plant, "To": buying plant,
+#                        "Product": product of the selling plant, "Share": share of its sales}
+#
+# Plants are evaluated in parallel worker processes, each reading its compiled
+# sidecar, so a portfolio takes about as long as its slowest plant. Each
+# transfer is then booked in the buying plant: its cost of the transfer is
+# added to COGS (the buyer uses what it buys within the year, so no profit
+# is left in inventory), and the open balance at the seller's receivable days
+# is added to payables. The consolidated statements are the sum of the
+# plant statements less the intercompany sales, from revenue and COGS, and
+# less the open balances, from receivables and payables.
+
+PORTFOLIO_FILE = "portfolio.json"
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+_executor = None
+
+
+def empty_portfolio():
+    return {"plants": [], "transfers": []}
+
+
+def load_portfolio(path):
+    if not os.path.exists(path):
+        return empty_portfolio()
+    with open(path, "r") as f:
+        return {**empty_portfolio(), **json.load(f)}
+
+
+def save_portfolio(path, portfolio):
+    temp_file = path + ".tmp"
+    with open(temp_file, "w") as f:
+        json.dump(portfolio, f, indent=4)
+    os.replace(temp_file, path)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Workers are kept between evaluations so only the first one pays for process start-up
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+# Evaluation tasks, one per plant, after checking the plants and transfers
+def plant_tasks(portfolio, portfolio_path, debt_ratio=0.0, interest_rate=0.0):
+    names = [plant["Name"] for plant in portfolio["plants"]]
+    if len(set(names)) != len(names):
+        raise ValueError("Plant names must be unique")
+    sales = {name: [] for name in names}
+    for transfer in portfolio["transfers"]:
+        if transfer["From"] not in sales or transfer["To"] not in sales:
+            raise ValueError(f"Transfer of '{transfer['Product']}' between unknown plants '{transfer['From']}' and '{transfer['To']}'")
+        if transfer["From"] == transfer["To"]:
+            raise ValueError(f"Transfer of '{transfer['Product']}' from plant '{transfer['From']}' to itself")
+        if not 0 <= float(transfer["Share"]) <= 1:
+            raise ValueError(f"Transfer share of '{transfer['Product']}' must be between 0 and 1")
+        sales[transfer["From"]].append((transfer["Product"], float(transfer["Share"]), transfer["To"]))
+    base = os.path.dirname(os.path.abspath(portfolio_path))
+    return [(plant["Name"], os.path.join(base, plant["Model"]), sales[plant["Name"]], debt_ratio, interest_rate)
+            for plant in portfolio["plants"]]
+
+
+# Runs inside a worker process: one plant's statements and its intercompany sales
+def evaluate_plant(task):
+    name, path, sales, debt_ratio, interest_rate = task
+    if not os.path.exists(path):
+        raise ValueError(f"Plant '{name}': model file '{path}' not found")
+    compiled = load_compiled(path)
+    results = forecast(compiled)
+    debt = equipment_debt(compiled, debt_ratio)
+
+    product_names = compiled["product_names"].tolist()
+    transfers = []
+    for product, share, buyer in sales:
+        if product not in product_names:
+            raise ValueError(f"Plant '{name}' has no product '{product}' to transfer")
+        p = product_names.index(product)
+        flow = share * results["product_revenue"][p]
+        balance = trailing_balance(flow, compiled["receivable_days"][p], DAYS_PER_YEAR)
+        transfers.append({"to": buyer, "sales": flow, "balance": balance})
+    return {
+        "name": name,
+        "years": results["years"],
+        "product_names": product_names,
+        "product_revenue": results["product_revenue"],
+        "results": {key: results.get(key) for key in ("years", "revenue", "cost", "assets", "working_capital", "tax")},
+        "debt": debt,
+        "interest_rate": interest_rate,
+        "lines": statement_lines(results, debt, interest_rate),
+        "transfers": transfers,
+    }
+
+
+# Books every plant's intercompany purchases in its COGS and payables and
+# restates its statements; returns the sales and open balances to eliminate
+def book_purchases(plants):
+    by_name = {plant["name"]: plant for plant in plants}
+    years = plants[0]["years"]
+    for plant in plants[1:]:
+        if not np.array_equal(plant["years"], years):
+            raise ValueError(f"Plant '{plant['name']}' forecasts different years")
+    purchases = {name: np.zeros(len(years)) for name in by_name}
+    payables = {name: np.zeros(len(years)) for name in by_name}
+    sales, balance = np.zeros(len(years)), np.zeros(len(years))
+    for plant in plants:
+        for transfer in plant["transfers"]:
+            purchases[transfer["to"]] += transfer["sales"]
+            payables[transfer["to"]] += transfer["balance"]
+            sales += transfer["sales"]
+            balance += transfer["balance"]
+
+    for plant in plants:
+        if not purchases[plant["name"]].any():
+            continue
+        results = {**plant["results"], "cost": plant["results"]["cost"] + purchases[plant["name"]]}
+        capital = results["working_capital"]
+        payable = capital["payable"] + payables[plant["name"]]
+        net = capital["receivable"] + capital["inventory"] - payable
+        results["working_capital"] = {**capital, "payable": payable, "net": net, "change": np.diff(net, axis=-1, prepend=0.0)}
+        plant["results"] = results
+        plant["lines"] = statement_lines(results, plant["debt"], plant["interest_rate"])
+    return {"Intercompany Sales": sales, "Intercompany Balances": balance}
+
+
+# Plant statements summed, less the intercompany eliminations
+def consolidate(plants, eliminations):
+    lines = {line: sum(plant["lines"][line] for plant in plants) for line in plants[0]["lines"]}
+    for line in ("Total Revenue", "COGS"):
+        lines[line] = lines[line] - eliminations["Intercompany Sales"]
+    for line in ("Accounts Receivable", "Assets", "Accounts Payable", "Liabilities"):
+        lines[line] = lines[line] - eliminations["Intercompany Balances"]
+    return lines
+
+
+# Per-plant and consolidated statements of a portfolio. workers=1 evaluates
+# the plants in this process.
+def evaluate_portfolio(portfolio, portfolio_path=PORTFOLIO_FILE, debt_ratio=0.0, interest_rate=0.0, workers=None):
+    tasks = plant_tasks(portfolio, portfolio_path, debt_ratio, interest_rate)
+    if not tasks:
+        raise ValueError("The portfolio has no plants")
+    workers = min(MAX_WORKERS if workers is None else workers, len(tasks))
+    if workers <= 1:
+        plants = [evaluate_plant(task) for task in tasks]
+    else:
+        plants = list(_get_executor().map(evaluate_plant, tasks))
+    eliminations = book_purchases(plants)
+    consolidated = consolidate(plants, eliminations)
+    return {"years": plants[0]["years"], "plants": plants, "consolidated": consolidated, "eliminations": eliminations}
+
+
+# Consolidated net income of a portfolio: python portfolio.py <portfolio file>
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else PORTFOLIO_FILE
+    evaluation = evaluate_portfolio(load_portfolio(path), path)
+    for plant in evaluation["plants"]:
+        print(f"{plant['name']}: net income {np.round(plant['lines']['Net Income']).tolist()}")
+    print(f"Consolidated: net income {np.round(evaluation['consolidated']['Net Income']).tolist()}, "
+          f"intercompany sales {np.round(evaluation['eliminations']['Intercompany Sales']).tolist()}")
@@ -0,0 +1,120 @@
+import contextvars
+import threading
+import time
+
+DEBOUNCE_SECONDS = 0.3  # Quiet time after the last input change before recalculating
+
+
+class Cancelled(Exception):
+    pass
+
+
+# Recalculates on a background thread for the most recently requested inputs.
+# Rapid requests are debounced into one run, a run whose inputs have been
+# superseded is abandoned at its next check_cancelled() call, and the last good
+# result stays available while a newer one is computed. The thread only lives
+# while there is work: it starts on a request and exits once nothing is left
+# to compute, so a dropped session leaves no thread behind.
+class Recalculator:
+    def __init__(self, compute, debounce=DEBOUNCE_SECONDS):
+        self._compute = compute
+        self._debounce = debounce
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._requested = None  # (generation, key, args, context, requested_at)
+        self._result = None     # (key, value)
+        self._error = None      # (key, exception)
+        self._running = False   # A worker thread is alive
+        self._closed = False
+
+    # Ask for a result for these inputs; identical repeated requests are no-ops
+    def request(self, key, *args):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Recalculator is closed")
+            if self._requested is not None and self._requested[1] == key:
+                return
+            if self._requested is None and self._result is not None and self._result[0] == key:
+                return
+            self._generation += 1  # Supersedes any run in flight
+            if self._result is not None and self._result[0] == key:
+                self._requested = None  # Back to the inputs already shown
+            else:
+                self._requested = (self._generation, key, args, contextvars.copy_context(), time.monotonic())
+                if not self._running:
+                    self._running = True
+                    threading.Thread(target=self._run, name="recalculator", daemon=True).start()
+            self._condition.notify_all()
+
+    # Abandon any run in flight and let the worker thread exit
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._generation += 1
+            self._requested = None
+            self._condition.notify_all()
+
+    # Latest finished result as (key, value), or None before the first one
+    def result(self):
+        with self._condition:
+            return self._result
+
+    def error(self, key):
+        with self._condition:
+            return self._error_for(key)
+
+    def _error_for(self, key):
+        return self._error[1] if self._error is not None and self._error[0] == key else None
+
+    def pending(self):
+        with self._condition:
+            return self._requested is not None
+
+    # Block until the result for key is ready, an error occurs or the timeout expires
+    def wait(self, key, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not (self._result is not None and self._result[0] == key) and self._error_for(key) is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self._result
+
+    def _run(self):
+        while True:
+            # Debounce: wait until the requested inputs have been quiet long enough
+            with self._condition:
+                while True:
+                    if self._requested is None:
+                        self._running = False  # Nothing left to do; request() starts a new thread
+                        self._condition.notify_all()
+                        return
+                    generation, key, args, context, requested_at = self._requested
+                    quiet = requested_at + self._debounce - time.monotonic()
+                    if quiet <= 0:
+                        break
+                    self._condition.wait(quiet)
+
+            def check_cancelled():
+                if self._generation != generation:
+                    raise Cancelled()
+
+            try:
+                # Run in the requester's context so perf stages and metric labels carry over
+                value = context.run(self._compute, *args, check_cancelled=check_cancelled)
+            except Cancelled:
+                continue
+            except Exception as error:  # Keep the thread alive; the page shows the error
+                with self._condition:
+                    if self._generation == generation:
+                        self._error = (key, error)
+                        self._requested = None
+                    self._condition.notify_all()
+                continue
+            with self._condition:
+                if self._generation == generation:
+                    self._result = (key, value)
+                    self._error = None
+                    self._requested = None
+                self._condition.notify_all()
@@ -0,0 +1,184 @@
+import heapq
+import math
+from collections import deque
+import numpy as np
+from catalog_editor import LABOR_ROLES
+from financial_engine import forecast
+
+# Discrete-event simulation of one year on the shop floor. Jobs are batches of
+# the units to make of each product (sales plus what other products consume
+# through the BOM), released at random through the year; each visits the
+# machines its cost drivers use, in equipment-list order, and waits in a FIFO
+# queue when the machine is busy. Processing time is the setup hours plus
+# batch size x hours per unit (after learning, see
+# financial_engine.learning_hours), scaled by the share of the calendar year the
+# machine is actually available (shift calendar and OEE), so the simulated
+# clock runs in calendar hours.
+
+HOURS_PER_YEAR = 8760.0
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_REPLICATIONS = 8
+
+ARRIVE, FINISH = 0, 1
+
+
+# The picklable inputs of one simulated year: per product the batch size,
+# batch count and route, per route step the machine and hours per batch
+# (setup plus run time). Without a batch size products run in the forecast's
+# lot sizes (see lot_sizing), or DEFAULT_BATCH_SIZE when there are no setups.
+def shop_inputs(compiled, year_index=0, batch_size=None):
+    results = forecast(compiled)
+    n_equipment = len(compiled["equipment_names"])
+    machines = slice(len(LABOR_ROLES), len(LABOR_ROLES) + n_equipment)
+    # Hours per unit in the simulated year, with the learning the forecast applies
+    unit_hours = results["unit_hours"] if results["unit_hours"].ndim == 2 else results["unit_hours"][..., year_index]
+    hours, setup_hours = unit_hours[:, machines], compiled["driver_setup_hours"][:, machines]
+    capacity = results["capacity_hours"][:, year_index]
+    with np.errstate(divide="ignore"):
+        time_scale = np.where(capacity > 0, HOURS_PER_YEAR / capacity, np.inf)
+
+    products = []
+    for p, name in enumerate(compiled["product_names"]):
+        route = [int(m) for m in np.flatnonzero((hours[p] > 0) | (setup_hours[p] > 0))]
+        lot = batch_size or (DEFAULT_BATCH_SIZE if results["lot_size"] is None else results["lot_size"][p, year_index])
+        # Equal batches that make the year's units without overshooting by a whole lot
+        batches = math.ceil(results["production_units"][p, year_index] / max(lot, 1))
+        lot = math.ceil(results["production_units"][p, year_index] / batches) if batches else 1
+        if route and batches:
+            products.append({"name": str(name), "batch_size": lot, "batches": batches, "route": route,
+                             "batch_hours": [float((hours[p, m] * lot + setup_hours[p, m]) * time_scale[m]) for m in route]})
+    return {"machines": compiled["equipment_names"].tolist(), "products": products, "year": int(results["years"][year_index])}
+
+
+# Simulate one replication with a heap-based event calendar
+def simulate(inputs, seed=None, variability=0.2, horizon=HOURS_PER_YEAR):
+    rng = np.random.default_rng(seed)
+    n_machines = len(inputs["machines"])
+    events, sequence = [], 0
+
+    # Batch releases: uniform over the year, i.e. a Poisson process per product
+    jobs = []
+    for product_index, product in enumerate(inputs["products"]):
+        for release in rng.uniform(0, horizon, product["batches"]):
+            jobs.append({"product": product_index, "step": 0, "released": release, "queued": release})
+    for job_id, job in enumerate(jobs):
+        events.append((job["released"], job_id, ARRIVE, job_id))
+    heapq.heapify(events)
+    sequence = len(jobs)
+
+    # Lognormal processing times with the given coefficient of variation
+    sigma = math.sqrt(math.log(1 + variability ** 2))
+    in_process = [None] * n_machines  # Job in process per machine
+    queues = [deque() for _ in range(n_machines)]
+    busy_time = np.zeros(n_machines)
+    queue_area = np.zeros(n_machines)
+    last_change = np.zeros(n_machines)
+    max_queue = np.zeros(n_machines, dtype=int)
+    wait_time = np.zeros(n_machines)
+    processed = np.zeros(n_machines, dtype=int)
+    lead_times = [[] for _ in inputs["products"]]
+    wip_area, wip, wip_changed = 0.0, 0, 0.0
+
+    def start(machine, job_id, now):
+        nonlocal sequence
+        job = jobs[job_id]
+        product = inputs["products"][job["product"]]
+        duration = product["batch_hours"][job["step"]] * (rng.lognormal(-sigma ** 2 / 2, sigma) if variability else 1.0)
+        wait_time[machine] += now - job["queued"]
+        in_process[machine] = job_id
+        busy_time[machine] += min(duration, max(horizon - now, 0.0))
+        sequence += 1
+        heapq.heappush(events, (now + duration, sequence, FINISH, job_id))
+
+    def enqueue(job_id, now):
+        job = jobs[job_id]
+        machine = inputs["products"][job["product"]]["route"][job["step"]]
+        job["queued"] = now
+        if in_process[machine] is None:
+            start(machine, job_id, now)
+        else:
+            queue_area[machine] += len(queues[machine]) * (now - last_change[machine])
+            last_change[machine] = now
+            queues[machine].append(job_id)
+            max_queue[machine] = max(max_queue[machine], len(queues[machine]))
+
+    while events:
+        now, _, kind, job_id = heapq.heappop(events)
+        if now > horizon:
+            break
+        job = jobs[job_id]
+        if kind == ARRIVE:
+            wip_area += wip * (now - wip_changed)
+            wip, wip_changed = wip + 1, now
+            enqueue(job_id, now)
+            continue
+
+        product = inputs["products"][job["product"]]
+        machine = product["route"][job["step"]]
+        processed[machine] += 1
+        in_process[machine] = None
+        if queues[machine]:
+            queue_area[machine] += len(queues[machine]) * (now - last_change[machine])
+            last_change[machine] = now
+            start(machine, queues[machine].popleft(), now)
+
+        job["step"] += 1
+        if job["step"] < len(product["route"]):
+            enqueue(job_id, now)
+        else:
+            lead_times[job["product"]].append(now - job["released"])
+            wip_area += wip * (now - wip_changed)
+            wip, wip_changed = wip - 1, now
+
+    queue_area += np.array([len(q) for q in queues]) * (horizon - last_change)
+    wip_area += wip * (horizon - wip_changed)
+    completed = np.array([len(times) for times in lead_times])
+    return {
+        "utilization": busy_time / horizon * 100,
+        "average_queue": queue_area / horizon,
+        "max_queue": max_queue,
+        "average_wait": np.divide(wait_time, processed, out=np.zeros(n_machines), where=processed > 0),
+        "batches_processed": processed,
+        "completed_units": completed * np.array([p["batch_size"] for p in inputs["products"]], dtype=int),
+        "lead_time": np.array([np.mean(times) if times else np.nan for times in lead_times]),
+        "lead_time_p95": np.array([np.percentile(times, 95) if times else np.nan for times in lead_times]),
+        "average_wip": wip_area / horizon,
+    }
+
+
+# Mean and 95% confidence half-width of every statistic across replications
+def summarize_replications(inputs, replications):
+    def stat(key):
+        values = np.array([r[key] for r in replications], dtype=float)
+        mean = np.nanmean(values, axis=0) if len(values) else values
+        half_width = 1.96 * np.nanstd(values, axis=0, ddof=1) / np.sqrt(len(values)) if len(values) > 1 else np.zeros_like(mean)
+        return np.nan_to_num(mean).tolist(), np.nan_to_num(half_width).tolist()
+
+    machines = {"machine": inputs["machines"]}
+    for key in ("utilization", "average_queue", "max_queue", "average_wait", "batches_processed"):
+        machines[key], machines[key + "_ci"] = stat(key)
+    products = {"product": [p["name"] for p in inputs["products"]], "batch_size": [p["batch_size"] for p in inputs["products"]],
+                "planned_units": [p["batches"] * p["batch_size"] for p in inputs["products"]]}
+    for key in ("completed_units", "lead_time", "lead_time_p95"):
+        products[key], products[key + "_ci"] = stat(key)
+    wip, wip_ci = stat("average_wip")
+    return {"year": inputs["year"], "replications": len(replications), "machines": machines, "products": products, "average_wip": wip, "average_wip_ci": wip_ci}
+
+
+# Job-queue entry point (see job_queue.JOB_KINDS): the job already runs in a
+# worker process, so replications run one after another in it and the
+# summary is refreshed as each one finishes
+def run_shop_floor(compiled, params, progress):
+    inputs = shop_inputs(compiled, int(params.get("year_index", 0)), int(params.get("batch_size") or 0) or None)
+    n_replications = int(params.get("replications", DEFAULT_REPLICATIONS))
+    seeds = np.random.SeedSequence(params.get("seed")).spawn(n_replications)
+    variability = float(params.get("variability", 0.2))
+
+    replications = []
+    for seed in seeds:
+        replications.append(simulate(inputs, seed, variability))
+        progress(len(replications) / n_replications, f"{len(replications)} of {n_replications} replications",
+                 summarize_replications(inputs, replications))
+
+    arrays = {key: np.array([r[key] for r in replications]) for key in replications[0]} if replications else {}
+    return summarize_replications(inputs, replications), arrays
@@ -0,0 +1,150 @@
+import numpy as np
+from financial_engine import FORECAST_YEARS, LIFECYCLE_FIELDS, forecast, statement_lines, utilization_rate
+from capacity import CALENDAR_KEYS, machine_load, peak_utilization
+from assets import ASSET_KEYS
+from working_capital import WORKING_CAPITAL_KEYS
+from tax import TAX_KEYS
+from staffing import STAFFING_KEYS
+from demand import DEMAND_KEYS
+from energy import ENERGY_KEYS
+from swot_rules import SWOT_RULES, evaluate_rules, swot_series, flag_counts, flag_frequencies
+from investor_score import score_scenarios, scoring_series, score_distribution
+
+SUMMARY_LINES = ["Total Revenue", "COGS", "EBITDA", "Net Income", "Peak Machine Utilization (%)"]
+PERCENTILES = [5, 50, 95]
+CHUNK_SCENARIOS = 5000
+
+SHARED_FIELDS = ["driver_rate", "driver_hours", "driver_learning_rate", "driver_reference_units", "driver_setup_hours",
+                 "lot_size", "holding_rate", "curve_years", "curve_values", "capacity_years", "capacity_hours",
+                 "escalation_years", "escalation_rate", "escalation_index", "tariff_rate", "tariff_week_band", "energy_band_hours",
+                 "material_names", "material_cost", "bom_parent", "bom_child", "bom_quantity", "bom_level",
+                 "equipment_cost", "equipment_life",
+                 ] + LIFECYCLE_FIELDS + list(CALENDAR_KEYS.values()) + list(ASSET_KEYS.values()) + \
+                list(WORKING_CAPITAL_KEYS.values()) + list(TAX_KEYS.values()) + list(STAFFING_KEYS.values()) + ["supervision_span"] + \
+                list(DEMAND_KEYS.values()) + list(ENERGY_KEYS.values())
+
+SWEEP_FIELDS = {"Unit Price": "unit_price", "Initial Units": "initial_units", "Growth Rate": "growth_rate"}
+
+
+# A scenario batch built from one compiled model: product arrays get a leading
+# scenario axis, equipment arrays are shared by every scenario
+def scenario_batch(compiled, n, **product_arrays):
+    n_products = len(compiled["initial_units"])
+    batch = {
+        "initial_units": np.broadcast_to(compiled["initial_units"], (n, n_products)),
+        "growth_rate": np.broadcast_to(compiled["growth_rate"], (n, n_products)),
+        "unit_price": np.broadcast_to(compiled["unit_price"], (n, n_products)),
+        "unit_cost": np.broadcast_to(compiled["unit_cost"], (n, n_products)),
+        "equipment_capacity": compiled["equipment_capacity"],
+        # Cost drivers, lifecycle profiles, the bill of materials and equipment are shared by every scenario
+        **{field: compiled[field] for field in SHARED_FIELDS},
+    }
+    batch.update(product_arrays)
+    return batch
+
+
+# Random draws around the model's inputs: lognormal volume and price shocks and
+# a normal shock on each product's growth rate
+def sample_scenarios(compiled, n, rng, volume_sd=0.15, price_sd=0.10, growth_sd=0.05):
+    shape = (n, len(compiled["initial_units"]))
+    return scenario_batch(
+        compiled, n,
+        initial_units=compiled["initial_units"] * rng.lognormal(0.0, volume_sd, shape),
+        unit_price=compiled["unit_price"] * rng.lognormal(0.0, price_sd, shape),
+        growth_rate=compiled["growth_rate"] + rng.normal(0.0, growth_sd, shape),
+    )
+
+
+def evaluate_scenarios(batch, years=FORECAST_YEARS):
+    results = forecast(batch, years)
+    lines = statement_lines(results)
+    lines["Utilization (%)"] = utilization_rate(results["production"], batch["equipment_capacity"])
+    lines["Peak Machine Utilization (%)"] = peak_utilization(machine_load(batch, results)[1])
+    return lines
+
+
+def summarize(outcomes):
+    return {line: {str(p): values.tolist() for p, values in zip(PERCENTILES, np.percentile(outcomes[line], PERCENTILES, axis=0))}
+            for line in SUMMARY_LINES}
+
+
+# Monte Carlo over the model's volume, price and growth assumptions. Runs in
+# chunks, reporting percentiles of the scenarios finished so far after each one.
+# Returns a JSON-able summary and the per-scenario (scenarios x years) arrays.
+def run_monte_carlo(compiled, params, progress):
+    n_scenarios = int(params.get("n_scenarios", 10000))
+    chunk_size = int(params.get("chunk_size", CHUNK_SCENARIOS))
+    rng = np.random.default_rng(params.get("seed"))
+    shocks = {key: params[key] for key in ("volume_sd", "price_sd", "growth_sd") if key in params}
+
+    outcomes = {line: np.empty((n_scenarios, len(FORECAST_YEARS))) for line in SUMMARY_LINES + ["Utilization (%)"]}
+    scores = np.empty(n_scenarios)
+    swot_counts = np.zeros(len(SWOT_RULES))
+    investment = compiled["equipment_cost"].sum()
+    for start in range(0, n_scenarios, chunk_size):
+        stop = min(start + chunk_size, n_scenarios)
+        lines = evaluate_scenarios(sample_scenarios(compiled, stop - start, rng, **shocks))
+        for line, values in outcomes.items():
+            values[start:stop] = lines[line]
+        scores[start:stop] = score_scenarios(scoring_series(lines, lines["Utilization (%)"], investment))[0]
+        swot_counts += flag_counts(evaluate_rules(swot_series(lines)))
+        progress(stop / n_scenarios, f"{stop:,} of {n_scenarios:,} scenarios",
+                 monte_carlo_summary({line: values[:stop] for line, values in outcomes.items()}, scores[:stop], swot_counts))
+    return monte_carlo_summary(outcomes, scores, swot_counts), {**outcomes, "Investor Score": scores}
+
+
+def monte_carlo_summary(outcomes, scores, swot_counts):
+    n_scenarios = len(outcomes["Net Income"])
+    return {
+        "years": FORECAST_YEARS.tolist(),
+        "n_scenarios": n_scenarios,
+        "percentiles": summarize(outcomes),
+        "loss_probability": (outcomes["Net Income"] < 0).mean(axis=0).tolist(),
+        "swot": flag_frequencies(swot_counts, n_scenarios),
+        "investor_score": score_distribution(scores),
+    }
+
+
+# Sweep one product input over a list of values, all evaluated as one batch per
+# chunk; returns total revenue and net income over the horizon for each value
+def run_sweep(compiled, params, progress):
+    product_index = list(compiled["product_names"]).index(params["product"])
+    field = SWEEP_FIELDS[params["field"]]
+    values = np.asarray(params["values"], dtype=float)
+    chunk_size = int(params.get("chunk_size", CHUNK_SCENARIOS))
+
+    totals = {"Total Revenue": np.empty(len(values)), "Net Income": np.empty(len(values))}
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        swept = np.array(np.broadcast_to(compiled[field], (len(chunk), len(compiled[field]))))
+        swept[:, product_index] = chunk
+        lines = evaluate_scenarios(scenario_batch(compiled, len(chunk), **{field: swept}))
+        for line in totals:
+            totals[line][start:start + len(chunk)] = lines[line].sum(axis=-1)
+        done = start + len(chunk)
+        progress(done / len(values), f"{done:,} of {len(values):,} values",
+                 {"values": values[:done].tolist(), **{line: t[:done].tolist() for line, t in totals.items()}})
+
+    summary = {"product": params["product"], "field": params["field"], "values": values.tolist(),
+               **{line: t.tolist() for line, t in totals.items()}}
+    return summary, {"values": values, **totals}
+
+
+# Horizon totals for one product over a grid of its prices, evaluated as one
+# batch per chunk: units sold, its revenue and gross margin, and the gross
+# margin of the whole model (other products share its machines)
+def price_curve(compiled, product, prices, years=FORECAST_YEARS, chunk_size=CHUNK_SCENARIOS):
+    product_index = list(compiled["product_names"]).index(product)
+    prices = np.asarray(prices, dtype=float)
+    curve = {line: np.empty(len(prices)) for line in ("Units", "Revenue", "Gross Margin", "Total Gross Margin")}
+    for start in range(0, len(prices), chunk_size):
+        chunk = prices[start:start + chunk_size]
+        swept = np.array(np.broadcast_to(compiled["unit_price"], (len(chunk), len(compiled["unit_price"]))))
+        swept[:, product_index] = chunk
+        results = forecast(scenario_batch(compiled, len(chunk), unit_price=swept), years)
+        rows = slice(start, start + len(chunk))
+        curve["Units"][rows] = results["units"][:, product_index].sum(axis=-1)
+        curve["Revenue"][rows] = results["product_revenue"][:, product_index].sum(axis=-1)
+        curve["Gross Margin"][rows] = curve["Revenue"][rows] - results["product_cost"][:, product_index].sum(axis=-1)
+        curve["Total Gross Margin"][rows] = (results["revenue"] - results["cost"]).sum(axis=-1)
+    return {"Unit Price": prices, **curve}
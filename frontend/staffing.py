@@ -0,0 +1,79 @@
+import numpy as np
+from catalog_editor import LABOR_ROLES
+from escalation import LABOR
+
+# Headcount plan per labor role from the forecast labor hours. Each role's
+# hours become FTEs at its yearly Hours Per FTE; supervision is at least one
+# supervisor per Supervision Span direct FTEs. Headcount rounds FTEs up, and
+# every increase over the Current Headcount (default: the first year's
+# headcount, so the starting workforce is not hired) is hired. Hires join
+# evenly through the year they are needed, so their requisitions open evenly
+# over the same span Hiring Lead Months earlier, split between the years that
+# span covers (requisitions that should have opened before the forecast show
+# as late in its first year). Labor cost pays the whole headcount at each role's
+# hours-weighted cost per hour, with the hours after learning that the
+# forecast costs, escalated with the Labor index. All outputs are
+# (..., roles, years) arrays over any scenario axes.
+
+STAFFING_FIELDS = {  # per-role staffing field: default
+    "Hours Per FTE": 1800.0,
+    "Hiring Lead Months": 3.0,
+    "Current Headcount": np.nan,
+}
+STAFFING_KEYS = {field: "staff_" + field.lower().replace(" ", "_") for field in STAFFING_FIELDS}
+DEFAULT_SUPERVISION_SPAN = 10.0  # Direct FTEs per supervisor
+
+
+def has_staffing(compiled):
+    return "staff_hours_per_fte" in compiled
+
+
+def staffing_plan(compiled, results):
+    n_roles = len(LABOR_ROLES)
+    hours = results["driver_load"][..., :n_roles, :]
+    units = results["production_units"]
+    hours_per_fte = compiled["staff_hours_per_fte"][..., None]
+
+    # Cost per hour of each role, weighted by the hours each product needs
+    role_hours = results["unit_hours"][..., :n_roles, :] if results["unit_hours"].ndim > compiled["driver_hours"].ndim \
+        else results["unit_hours"][..., :n_roles, None]
+    role_hours = units[..., None, :] * role_hours
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = (role_hours * compiled["driver_rate"][..., :n_roles, None]).sum(axis=-3) / role_hours.sum(axis=-3)
+        fte = np.where(hours_per_fte > 0, hours / hours_per_fte, 0.0)
+    rate = np.nan_to_num(rate)
+    if results.get("escalation") is not None:
+        rate = rate * results["escalation"][..., LABOR, None, :]
+
+    supervision = LABOR_ROLES.index("Supervision")
+    direct = np.delete(fte, supervision, axis=-2).sum(axis=-2)
+    fte[..., supervision, :] = np.maximum(fte[..., supervision, :], direct / np.asarray(compiled["supervision_span"])[..., None])
+
+    headcount = np.ceil(np.maximum(fte - 1e-9, 0.0))
+    current = compiled["staff_current_headcount"][..., None]
+    current = np.where(np.isnan(current), headcount[..., :1], current)
+    hires = np.maximum(np.diff(headcount, axis=-1, prepend=current), 0.0)
+
+    # A lead of whole years plus a fraction opens a year's requisitions (1 - fraction)
+    # in the year the whole years reach back to and fraction in the year before it
+    n_years = hires.shape[-1]
+    lead = np.maximum(compiled["staff_hiring_lead_months"], 0.0)[..., None] / 12
+    whole = np.floor(lead).astype(np.int64)
+    fraction = lead - whole
+    padded = np.concatenate([hires, np.zeros_like(hires)], axis=-1)  # No hires after the forecast
+    needed = np.broadcast_to(np.minimum(np.arange(n_years) + whole, 2 * n_years - 1), hires.shape)
+    later = np.broadcast_to(np.minimum(np.arange(n_years) + whole + 1, 2 * n_years - 1), hires.shape)
+    requisitions = (1 - fraction) * np.take_along_axis(padded, needed, axis=-1) + fraction * np.take_along_axis(padded, later, axis=-1)
+    late_hires = (hires * np.clip(lead - np.arange(n_years), 0.0, 1.0)).sum(axis=-1)
+    requisitions[..., 0] += late_hires
+
+    return {
+        "hours": hours,
+        "fte": fte,
+        "headcount": headcount,
+        "hires": hires,
+        "requisitions": requisitions,
+        "late_hires": late_hires,
+        "rate": rate,
+        "labor_cost": headcount * hours_per_fte * rate,
+    }
@@ -1,245 +1,926 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import json
 import os
+from model_store import load_model, save_model, compile_model, load_compiled
+from financial_engine import (
+    forecast, utilization_rate, equipment_debt, statement_lines, income_statement, balance_sheet, cash_flow,
+    tax_schedule, export_to_excel, unit_costs, FORECAST_YEARS, DEFAULT_DEBT_RATIO, DEFAULT_INTEREST_RATE,
+)
+from perf import stage, start_run, finish_run, run_scope, render_panel
+from metrics import set_current_model, record_cache, record_model_size, inc, start_exporter_from_env, write_metrics_file
+from catalog_import import import_catalog, FINANCING_OPTIONS
+from catalog_editor import (
+    EQUIPMENT_COLUMNS, PRODUCT_COLUMNS, DRIVER_KEY, LABOR_ROLES, LIFECYCLE_OPTIONS, new_item_id, ensure_ids, lifecycle_errors,
+    MATERIAL_COLUMNS, BOM_KEY, catalog_frame, drivers_frame, bom_frame, bom_from_frame, bom_errors, diff_frames, diff_size,
+    apply_catalog_diff, apply_driver_diff, apply_bom_diff,
+)
+from bom import has_bom, roll_up, where_used, reprice
+from lot_sizing import DEFAULT_HOLDING_RATE
+from assets import asset_schedule
+from demand import has_demand
+from escalation import ESCALATION_CENTERS, escalation_rates
+from energy import ENERGY_FIELDS, TARIFF_BANDS, TARIFF_FIELDS, shift_start_costs
+from working_capital import WORKING_CAPITAL_FIELDS
+from tax import TAX_FIELDS
+from staffing import DEFAULT_SUPERVISION_SPAN, STAFFING_FIELDS, staffing_plan
+from job_queue import submit_job, list_jobs, cancel_job, recover_jobs, ACTIVE_STATUSES
+from simulation import SWEEP_FIELDS, PERCENTILES, price_curve
+from shop_floor import DEFAULT_REPLICATIONS
+from recalc import Recalculator
+from swot_rules import evaluate_rules, swot_lists
+from capacity import CALENDAR_FIELDS, machine_load, peak_utilization
+from investor_score import score_scenarios, scoring_series, explain_score
+from portfolio import PORTFOLIO_FILE, load_portfolio, save_portfolio, evaluate_portfolio
 
 SAVE_FILE = "financial_model_data.json"  # Ensuring the original data file name remains
 
-# Function to save and load data
-def save_model(equipment_list, product_list, cost_drivers):
-    data = {"equipment": equipment_list, "products": product_list, "cost_drivers": cost_drivers}
-    with open(SAVE_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-
-def load_model():
-    if os.path.exists(SAVE_FILE):
-        with open(SAVE_FILE, "r") as f:
-            return json.load(f)
-    return {"equipment": [], "products": [], "cost_drivers": {}}
-
-def generate_swot_analysis(revenue_forecast, cost_forecast, utilization_rate):
-    strengths, weaknesses, opportunities, threats = [], [], [], []
-
-    # Strengths
-    if max(utilization_rate) < 80:
-        strengths.append("Capacity available for expansion")
-    if max(revenue_forecast) / max(cost_forecast) > 1.5:
-        strengths.append("Strong revenue-to-cost ratio")
-
-    # Weaknesses
-    if min(utilization_rate) > 90:
-        weaknesses.append("High equipment utilization may lead to bottlenecks")
-    if min(revenue_forecast) / min(cost_forecast) < 1:
-        weaknesses.append("Revenue barely covers costs in early years")
-
-    # Opportunities
-    if max(revenue_forecast) > 2 * min(revenue_forecast):
-        opportunities.append("Strong revenue growth potential")
-    if min(utilization_rate) < 50:
-        opportunities.append("Potential to add more production capacity")
-
-    # Threats
-    if min(revenue_forecast) < min(cost_forecast):
-        threats.append("Potential losses in early years")
-    if max(utilization_rate) > 95:
-        threats.append("Risk of overcapacity and downtime issues")
-
-    return strengths, weaknesses, opportunities, threats
-
-def investor_sanity_check(revenue_forecast, cost_forecast, utilization_rate):
-    score = 100
-
-    # Penalize overly optimistic growth assumptions
-    if max(revenue_forecast) / min(revenue_forecast) > 5:
-        score -= 15
-
-    # Penalize high utilization with no extra investment
-    if max(utilization_rate) > 95:
-        score -= 10
-
-    # Penalize revenue/cost ratio being too low
-    if min(revenue_forecast) / min(cost_forecast) < 1:
-        score -= 20
+# Session-state backed catalog: the save file is read once per session and
+# every catalog edit writes it back exactly once
+def get_catalog():
+    if "catalog" not in st.session_state:
+        with stage("load_model"):
+            catalog = load_model(SAVE_FILE)
+            ensure_ids(catalog["equipment"])
+            ensure_ids(catalog["products"])
+            ensure_ids(catalog["materials"])
+        st.session_state["catalog"] = catalog
+        st.session_state["catalog_revision"] = 0
+        st.session_state["catalog_file"] = _file_version(SAVE_FILE)
+    return st.session_state["catalog"]
+
+def _file_version(path):
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+# Saving compiles the catalog for the sidecar; those arrays are the session's
+# engine arrays too
+def persist_catalog():
+    catalog = get_catalog()
+    compiled = save_model(SAVE_FILE, catalog)
+    st.session_state["catalog_revision"] += 1
+    st.session_state["catalog_file"] = _file_version(SAVE_FILE)
+    st.session_state["compiled"] = compiled
+    st.session_state["compiled_revision"] = st.session_state["catalog_revision"]
+
+# Engine arrays for the current catalog: from the save file's compiled sidecar
+# while the session's catalog is the file as saved, otherwise compiled
+def get_compiled():
+    revision = st.session_state["catalog_revision"]
+    hit = st.session_state.get("compiled_revision") == revision
+    record_cache("compiled_model", hit)
+    if not hit:
+        if st.session_state["catalog_file"] is not None and st.session_state["catalog_file"] == _file_version(SAVE_FILE):
+            with stage("load_compiled"):
+                compiled = load_compiled(SAVE_FILE)
+        else:
+            compiled = compile_model(get_catalog())
+        st.session_state["compiled"] = compiled
+        st.session_state["compiled_revision"] = revision
+    return st.session_state["compiled"]
+
+# Analysis on a management page, computed only while its section is switched
+# on and kept in session state until the catalog or the inputs change
+def cached_analysis(name, inputs, compute):
+    key = (st.session_state["catalog_revision"],) + tuple(inputs)
+    cached = st.session_state.get(name)
+    hit = cached is not None and cached[0] == key
+    record_cache(name, hit)
+    if not hit:
+        cached = st.session_state[name] = (key, compute())
+    return cached[1]
+
+# Spreadsheet-style editing: edits stay client-side until "Save Changes", then
+# the diff against the original table is applied and saved as one batch
+def catalog_grid(kind, original, key, column_config, apply_diff, validate=None):
+    # Keying the editor on the catalog revision drops stale edits after a save
+    editor_key = f"{kind}_editor_{st.session_state['catalog_revision']}"
+    with st.form(f"{kind}_grid"):
+        edited = st.data_editor(original, key=editor_key, num_rows="dynamic", hide_index=True,
+                                disabled=[key] if key == "ID" else [], column_config=column_config,
+                                use_container_width=True)
+        if st.form_submit_button("💾 Save Changes"):
+            problems = validate(edited) if validate else []
+            if problems:
+                st.error("Not saved:\n\n" + "\n\n".join(problems))
+                return
+            diff = diff_frames(original, edited, key)
+            if diff_size(diff):
+                apply_diff(diff)
+                persist_catalog()
+                st.rerun(scope="fragment")  # Redraw the grid from the saved catalog
+            st.info("No changes to save.")
+
+# Bulk upsert of a spreadsheet export; the whole file is applied and saved once
+def bulk_import_section(kind):
+    with st.expander("📥 Bulk Import (CSV/Excel)"):
+        uploaded_file = st.file_uploader("Upload Catalog File", type=["csv", "xlsx"], key=f"import_{kind}")
+        if uploaded_file is not None and st.button("Import", key=f"import_{kind}_submit"):
+            result = import_catalog(uploaded_file, kind, get_catalog())
+            if result["inserted"] or result["updated"]:
+                persist_catalog()
+            st.success(f"Imported {result['rows']:,} rows: {result['inserted']:,} added, {result['updated']:,} updated.")
+            if not result["errors"].empty:
+                st.warning(f"{len(result['errors']):,} row errors were skipped.")
+                st.dataframe(result["errors"], hide_index=True, use_container_width=True)
+
+# Management pages run as fragments so catalog edits rerun only the page body,
+# not the sidebar or the financial statements
+@st.fragment
+@run_scope("Manage Equipment")
+def manage_equipment_page():
+    catalog = get_catalog()
+    equipment_list = catalog["equipment"]
+
+    bulk_import_section("equipment")
+
+    st.header("📋 Equipment List & Management")
+    catalog_grid("equipment", catalog_frame(equipment_list, EQUIPMENT_COLUMNS), "ID", {
+        "Cost": st.column_config.NumberColumn("Cost ($)", min_value=0, format="$%d"),
+        "Useful Life": st.column_config.NumberColumn(min_value=1, step=1),
+        "Max Capacity": st.column_config.NumberColumn(min_value=1, step=1),
+        "Financing": st.column_config.SelectboxColumn(options=FINANCING_OPTIONS),
+        "Shifts Per Day": st.column_config.NumberColumn(min_value=0, max_value=4, step=1),
+        "Hours Per Shift": st.column_config.NumberColumn(min_value=0, max_value=24, step=0.5),
+        "Days Per Week": st.column_config.NumberColumn(min_value=5, max_value=7, step=1),
+        "Holidays": st.column_config.NumberColumn(min_value=0, max_value=365, step=1),
+        "Maintenance Hours": st.column_config.NumberColumn(help="Planned maintenance hours per year", min_value=0, step=1),
+        "Availability": st.column_config.NumberColumn(min_value=0, max_value=1, step=0.01),
+        "Performance": st.column_config.NumberColumn(min_value=0, max_value=1, step=0.01),
+        "Quality": st.column_config.NumberColumn(min_value=0, max_value=1, step=0.01),
+        "Power kW": st.column_config.NumberColumn(min_value=0, step=1, help="Electric draw while running"),
+        "Idle kW": st.column_config.NumberColumn(min_value=0, step=1, help="Electric draw while scheduled but not running"),
+        "Shift Start": st.column_config.NumberColumn(min_value=0, max_value=23, step=1, help="Hour of day the first shift starts; blank = 6"),
+        "Purchase Year": st.column_config.NumberColumn(min_value=1900, step=1, format="%d", help="Blank = first forecast year"),
+        "Salvage Rate": st.column_config.NumberColumn(min_value=0, max_value=1, step=0.01, help="Resale value at end of life, share of cost"),
+        "Maintenance Rate": st.column_config.NumberColumn(min_value=0, max_value=1, step=0.005, help="First-year maintenance, share of cost"),
+        "Maintenance Growth": st.column_config.NumberColumn(min_value=0, max_value=1, step=0.01, help="Yearly maintenance increase with age"),
+    }, lambda diff: apply_catalog_diff(catalog, "equipment", diff))
+
+    asset_plan_section(catalog)
+
+    # Equipment Purchases
+    st.header("📋 Add Equipment")
+    with st.form("equipment_form", clear_on_submit=True):
+        eq_name = st.text_input("Equipment Name")
+        eq_cost = st.number_input("Cost ($)", min_value=10000, value=500000, step=10000)
+        eq_lifetime = st.number_input("Useful Life (years)", min_value=1, value=10, step=1)
+        max_capacity = st.number_input("Max Production Capacity (units/year)", min_value=1, value=10000, step=100)
+
+        # Shift calendar and OEE determine the machine's available hours
+        st.subheader("🗓 Shift Calendar & OEE")
+        col1, col2, col3, col4 = st.columns(4)
+        calendar = {
+            "Shifts Per Day": col1.number_input("Shifts Per Day", min_value=0, max_value=4, value=CALENDAR_FIELDS["Shifts Per Day"]),
+            "Hours Per Shift": col1.number_input("Hours Per Shift", min_value=0.0, max_value=24.0, value=float(CALENDAR_FIELDS["Hours Per Shift"]), step=0.5),
+            "Days Per Week": col2.selectbox("Days Per Week", [5, 6, 7]),
+            "Holidays": col2.number_input("Holidays Per Year", min_value=0, max_value=365, value=CALENDAR_FIELDS["Holidays"]),
+            "Maintenance Hours": col3.number_input("Planned Maintenance (hours/year)", min_value=0, value=CALENDAR_FIELDS["Maintenance Hours"], step=8),
+            "Availability": col3.slider("Availability (%)", min_value=0, max_value=100, value=100) / 100,
+            "Performance": col4.slider("Performance (%)", min_value=0, max_value=100, value=100) / 100,
+            "Quality": col4.slider("Quality (%)", min_value=0, max_value=100, value=100) / 100,
+        }
+        # Energy use is priced by the hour under the tariff, so the shift start matters
+        col1, col2, col3 = st.columns(3)
+        calendar.update({
+            "Power kW": col1.number_input("Power Draw Running (kW)", min_value=0.0, value=0.0, step=1.0),
+            "Idle kW": col2.number_input("Power Draw Idle (kW)", min_value=0.0, value=0.0, step=1.0),
+            "Shift Start": col3.number_input("First Shift Starts (hour)", min_value=0, max_value=23, value=int(ENERGY_FIELDS["Shift Start"])),
+        })
 
-    # Ensure score stays between 0-100%
-    score = max(0, min(score, 100))
+        # Replacement, resale and maintenance over the machine's life
+        st.subheader("🔧 Asset Lifecycle")
+        col1, col2, col3, col4 = st.columns(4)
+        purchase_year = col1.number_input("Purchase Year (0 = first forecast year)", min_value=0, value=0, step=1)
+        lifecycle = {
+            "Salvage Rate": col2.slider("Salvage Value (% of cost)", min_value=0, max_value=100, value=0) / 100,
+            "Maintenance Rate": col3.slider("First-Year Maintenance (% of cost)", min_value=0.0, max_value=20.0, value=0.0, step=0.5) / 100,
+            "Maintenance Growth": col4.slider("Maintenance Growth With Age (%/year)", min_value=0, max_value=50, value=0) / 100,
+        }
+        if purchase_year:
+            lifecycle["Purchase Year"] = purchase_year
+        submit_eq = st.form_submit_button("Add Equipment")
+
+        if submit_eq and eq_name:
+            equipment_list.append({"ID": new_item_id(), "Name": eq_name, "Cost": eq_cost, "Useful Life": eq_lifetime, "Max Capacity": max_capacity, **calendar, **lifecycle})
+            persist_catalog()
+            st.success(f"Equipment '{eq_name}' added successfully!")
+
+# Replacement capex, salvage, maintenance and depreciation of the equipment
+# list over a long planning horizon
+def asset_plan_section(catalog):
+    if not catalog["equipment"]:
+        return
+    st.header("🔧 Asset Lifecycle Plan")
+    if not st.toggle("Show asset lifecycle plan", key="show_asset_plan"):
+        return
+    horizon = st.slider("Planning Horizon (years)", min_value=5, max_value=50, value=30)
+    years = np.arange(FORECAST_YEARS[0], FORECAST_YEARS[0] + horizon)
+
+    def compute():
+        schedule = asset_schedule(get_compiled(), years)
+        return pd.DataFrame({"Capex": schedule["capex"].sum(axis=0), "Salvage": schedule["salvage"].sum(axis=0),
+                             "Maintenance": schedule["maintenance"].sum(axis=0), "Depreciation": schedule["depreciation"].sum(axis=0),
+                             "Replacements": schedule["replacements"].sum(axis=0)}, index=pd.Index(years, name="Year"))
+
+    plan = cached_analysis("asset_plan", (horizon,), compute)
+    st.bar_chart(plan[["Capex", "Maintenance"]])
+    with st.expander("Yearly plan"):
+        st.dataframe(plan.style.format({col: "${:,.0f}" for col in plan.columns if col != "Replacements"}), use_container_width=True)
+
+# Driver fields for a learning curve entered in percent; 100% means no learning
+def learning_curve(percent):
+    return {"Learning Rate": percent / 100} if percent < 100 else {}
+
+# Revenue and margin of one product over a grid of its prices; volumes follow
+# its price elasticity and market cap and are held to machine capacity
+def price_response_section(catalog):
+    st.header("📈 Price Response")
+    product_names = [p["Name"] for p in catalog["products"]]
+    if not product_names or not st.toggle("Show price response", key="show_price_response"):
+        return
+    col1, col2 = st.columns(2)
+    product = col1.selectbox("Product", product_names, key="price_response_product")
+    low, high = col2.slider("Price range (% of current price)", min_value=10, max_value=300, value=(50, 200), step=5)
+
+    def compute():
+        compiled = get_compiled()
+        price = compiled["unit_price"][list(compiled["product_names"]).index(product)]
+        with stage("price_curve"):
+            curve = pd.DataFrame(price_curve(compiled, product, np.linspace(price * low / 100, price * high / 100, 200))).set_index("Unit Price")
+        return curve, price, has_demand(compiled)
+
+    curve, price, responsive = cached_analysis("price_response", (product, low, high), compute)
+    if not responsive:
+        st.caption("No product has a price elasticity or market size, so volumes do not respond to price.")
+    best = curve["Gross Margin"].idxmax()
+    st.metric("Margin-maximizing price", f"${best:,.2f}", f"{best / price - 1:+.0%} vs. current" if price else None)
+    st.line_chart(curve[["Revenue", "Gross Margin", "Total Gross Margin"]])
+    st.line_chart(curve[["Units"]])
+
+# Purchased materials, the multi-level BOM and the rolled-up unit costs, with
+# a what-if on one component's cost that reprices only the products using it
+def bill_of_materials_section(catalog):
+    product_list, materials, bom = catalog["products"], catalog["materials"], catalog["bom"]
+    product_names = [p["Name"] for p in product_list]
+
+    st.header("🧩 Materials & Bill of Materials")
+    catalog_grid("materials", catalog_frame(materials, MATERIAL_COLUMNS), "ID", {
+        "Unit Cost": st.column_config.NumberColumn("Unit Cost ($)", min_value=0),
+    }, lambda diff: apply_catalog_diff(catalog, "materials", diff),
+       lambda edited: bom_errors(bom, product_list, edited.dropna(subset=["Name"]).to_dict("records")))
+
+    st.caption("One unit of the product consumes Quantity units of the component, which is another product or a material.")
+    catalog_grid("bom", bom_frame(bom), BOM_KEY, {
+        "Product": st.column_config.SelectboxColumn(options=product_names, required=True),
+        "Component": st.column_config.SelectboxColumn(options=product_names + [m["Name"] for m in materials], required=True),
+        "Quantity": st.column_config.NumberColumn(min_value=0, required=True),
+    }, lambda diff: apply_bom_diff(bom, diff),
+       lambda edited: bom_errors(bom_from_frame(edited), product_list, materials))
+
+    if not bom or not st.toggle("Show rolled-up unit costs", key="show_rolled_costs"):
+        return
+
+    def compute():
+        compiled = get_compiled()
+        if not has_bom(compiled):
+            return None
+        own_cost = np.concatenate([unit_costs(compiled), compiled["material_cost"]])
+        return own_cost, roll_up(compiled, own_cost)
+
+    costs = cached_analysis("bom_roll_up", (), compute)
+    if costs is None:
+        return
+    own_cost, rolled = costs
+    nodes = product_names + [m["Name"] for m in materials]
+    col1, col2 = st.columns(2)
+    component = col1.selectbox("What-If Component", nodes)
+    node = nodes.index(component)
+    new_cost = col2.number_input("What-If Own Unit Cost ($)", min_value=0.0, value=float(own_cost[node]))
+    used = cached_analysis("bom_where_used", (node,), lambda: where_used(get_compiled(), node))
+    repriced = reprice(rolled, used, new_cost - own_cost[node])
+    st.dataframe(pd.DataFrame({"Product": product_names, "Own Unit Cost": own_cost[:len(product_names)],
+                               "Rolled Unit Cost": rolled[:len(product_names)], "What-If Unit Cost": repriced[:len(product_names)]})
+                 .style.format(precision=2), hide_index=True, use_container_width=True)
+
+@st.fragment
+@run_scope("Manage Products")
+def manage_products_page():
+    catalog = get_catalog()
+    equipment_list = catalog["equipment"]
+    product_list = catalog["products"]
+    cost_drivers = catalog["cost_drivers"]
+
+    bulk_import_section("products")
+
+    st.header("📦 Product List & Management")
+    catalog_grid("products", catalog_frame(product_list, PRODUCT_COLUMNS), "ID", {
+        "Initial Units": st.column_config.NumberColumn(min_value=1, step=1),
+        "Unit Price": st.column_config.NumberColumn("Unit Price ($)", min_value=0),
+        "Unit Cost": st.column_config.NumberColumn("Unit Cost ($)", min_value=0),
+        "Growth Rate": st.column_config.NumberColumn(min_value=-0.99, step=0.01),
+        "Lifecycle": st.column_config.SelectboxColumn(options=LIFECYCLE_OPTIONS),
+        "Launch Year": st.column_config.NumberColumn(min_value=1900, step=1, format="%d"),
+        "Ramp Years": st.column_config.NumberColumn(min_value=0, step=0.5),
+        "Plateau Years": st.column_config.NumberColumn(min_value=0, step=0.5),
+        "Decline Rate": st.column_config.NumberColumn(min_value=0, max_value=1, step=0.01),
+        "End of Life Year": st.column_config.NumberColumn(min_value=1900, step=1, format="%d"),
+        "Custom Curve": st.column_config.TextColumn(help="Year: volume multiplier pairs, e.g. 2025: 0.2, 2027: 1, 2032: 0.4"),
+        "Lot Size": st.column_config.NumberColumn(min_value=1, step=1, help="Units per production batch; blank = economic lot size"),
+        "Holding Rate": st.column_config.NumberColumn(min_value=0, max_value=1, step=0.01,
+                                                      help=f"Yearly inventory carrying cost as a share of unit cost; blank = {DEFAULT_HOLDING_RATE:.0%}"),
+        "Reference Price": st.column_config.NumberColumn("Reference Price ($)", min_value=0,
+                                                         help="Price at which the product sells its forecast volume; blank = Unit Price"),
+        "Price Elasticity": st.column_config.NumberColumn(max_value=0, step=0.1, help="% volume change per % price change, e.g. -1.5; blank = none"),
+        "Market Size": st.column_config.NumberColumn(min_value=0, step=1, help="Units the market buys in the first year; blank = no cap"),
+        "Market Growth": st.column_config.NumberColumn(min_value=-0.99, step=0.01, help="Yearly market growth; blank = the product's Growth Rate"),
+        **{field: st.column_config.NumberColumn(min_value=0, step=1, help="Days outstanding for this product; blank = the model-wide days")
+           for field in WORKING_CAPITAL_FIELDS},
+    }, lambda diff: apply_catalog_diff(catalog, "products", diff),
+       lambda edited: [problem for row in edited.to_dict("records")
+                       for problem in lifecycle_errors({k: v for k, v in row.items() if not pd.isna(v)})])
+
+    st.header("⚙️ Cost Drivers")
+    catalog_grid("cost_drivers", drivers_frame(cost_drivers), DRIVER_KEY, {
+        "Product": st.column_config.SelectboxColumn(options=[p["Name"] for p in product_list], required=True),
+        "Driver": st.column_config.SelectboxColumn(options=LABOR_ROLES + [eq["Name"] for eq in equipment_list], required=True),
+        "Cost Per Hour": st.column_config.NumberColumn("Cost Per Hour ($)", min_value=0),
+        "Hours Per Unit": st.column_config.NumberColumn(min_value=0),
+        "Setup Hours": st.column_config.NumberColumn(min_value=0, help="Changeover hours per production batch"),
+        "Learning Rate": st.column_config.NumberColumn(min_value=0.5, max_value=1, step=0.01,
+                                                       help="Hours multiplier per doubling of cumulative volume, e.g. 0.85; blank = no learning"),
+        "Reference Units": st.column_config.NumberColumn(min_value=1, step=1,
+                                                         help="Cumulative units at which Hours Per Unit applies; blank = first year's volume"),
+    }, lambda diff: apply_driver_diff(cost_drivers, diff))
+
+    bill_of_materials_section(catalog)
+    price_response_section(catalog)
+
+    # Product Ramp-Up
+    st.header("📋 Add New Product")
+    with st.form("product_form", clear_on_submit=True):
+        product_name = st.text_input("Product Name")
+        initial_units = st.number_input("Initial Production Volume (units/year)", min_value=1, value=1000, step=100)
+        unit_price = st.number_input("Unit Selling Price ($)", min_value=1, value=100, step=1)
+        growth_rate = st.slider("Annual Production Growth (%)", min_value=1, max_value=50, value=10) / 100
+
+        # Lifecycle profile; S-curve and custom volumes are multiples of the initial volume
+        lifecycle = {"Lifecycle": st.selectbox("Volume Lifecycle", LIFECYCLE_OPTIONS)}
+        col1, col2, col3 = st.columns(3)
+        launch_year = col1.number_input("Launch Year (0 = already launched)", min_value=0, value=0, step=1)
+        eol_year = col1.number_input("End of Life Year (0 = none)", min_value=0, value=0, step=1)
+        ramp_years = col2.number_input("S-Curve Ramp Years", min_value=0.0, value=3.0, step=0.5)
+        plateau_years = col2.number_input("S-Curve Plateau Years (0 = no decline)", min_value=0.0, value=0.0, step=0.5)
+        decline_rate = col3.slider("S-Curve Annual Decline (%)", min_value=0, max_value=100, value=0) / 100
+        custom_curve = col3.text_input("Custom Curve (year: multiplier, ...)", placeholder="2025: 0.2, 2027: 1, 2032: 0.4")
+        if launch_year:
+            lifecycle["Launch Year"] = launch_year
+        if eol_year:
+            lifecycle["End of Life Year"] = eol_year
+        if lifecycle["Lifecycle"] == "S-Curve":
+            lifecycle.update({"Ramp Years": ramp_years, "Decline Rate": decline_rate})
+            if plateau_years:
+                lifecycle["Plateau Years"] = plateau_years
+        elif lifecycle["Lifecycle"] == "Custom":
+            lifecycle["Custom Curve"] = custom_curve
+        # Batch economics; without a lot size, machines with setup hours run economic lots
+        col1, col2 = st.columns(2)
+        lot_size = col1.number_input("Lot Size (units, 0 = economic lot size)", min_value=0, value=0, step=10)
+        holding_rate = col2.slider("Inventory Holding Cost (%/year)", min_value=0, max_value=100, value=int(DEFAULT_HOLDING_RATE * 100)) / 100
+        lots = {"Holding Rate": holding_rate, **({"Lot Size": lot_size} if lot_size else {})}
+        # Demand; volumes respond to price around the entered price, up to the market size
+        col1, col2 = st.columns(2)
+        elasticity = col1.number_input("Price Elasticity (0 = volume ignores price)", max_value=0.0, value=0.0, step=0.1)
+        market_size = col2.number_input("Market Size (units in the first year, 0 = no cap)", min_value=0, value=0, step=100)
+        lots.update({**({"Price Elasticity": elasticity} if elasticity else {}), **({"Market Size": market_size} if market_size else {})})
+        selected_equipment = st.multiselect("Select Equipment Used", [eq["Name"] for eq in equipment_list])
+
+        # Cost Drivers for Each Equipment Selected
+        st.header("📋 Enter Cost Drivers Equipment")
+        equipment_cost_inputs = {}
+        for eq_name in selected_equipment:
+            st.subheader(f"⚙️ Cost Drivers for {eq_name}")
+            cost_per_hour = st.number_input(f"{eq_name} - Cost Per Hour ($)", min_value=0.01, value=50.00, step=0.01)
+            hours_per_unit = st.number_input(f"{eq_name} - Hours Per Unit Produced", min_value=0.01, value=1.00, step=0.01)
+            setup_hours = st.number_input(f"{eq_name} - Setup Hours Per Batch", min_value=0.0, value=0.0, step=0.25)
+            learning_rate = st.number_input(f"{eq_name} - Learning Curve (%)", min_value=50, max_value=100, value=100, step=1)
+            equipment_cost_inputs[eq_name] = {"Cost Per Hour": cost_per_hour, "Hours Per Unit": hours_per_unit,
+                                              **({"Setup Hours": setup_hours} if setup_hours else {}), **learning_curve(learning_rate)}
+
+        # Labor & Supervision Costs
+        st.subheader("👷 Labor & Supervision Costs")
+        machinist_cost_per_hour = st.number_input("Machinist Labor Cost Per Hour ($)", min_value=0.01, value=30.00, step=0.01)
+        machinist_hours_per_unit = st.number_input("Machinist Hours Per Unit", min_value=0.01, value=2.00, step=0.01)
+        design_cost_per_hour = st.number_input("Design Labor Cost Per Hour ($)", min_value=0.01, value=40.00, step=0.01)
+        design_hours_per_unit = st.number_input("Design Hours Per Unit", min_value=0.01, value=1.00, step=0.01)
+        supervision_cost_per_hour = st.number_input("Supervision Cost Per Hour ($)", min_value=0.01, value=20.00, step=0.01)
+        supervision_hours_per_unit = st.number_input("Supervision Hours Per Unit", min_value=0.01, value=0.50, step=0.01)
+        st.caption("Learning curve: hours per unit fall to this share with every doubling of cumulative volume (100% = no learning).")
+        col1, col2, col3 = st.columns(3)
+        machinist_learning = col1.number_input("Machinist Learning Curve (%)", min_value=50, max_value=100, value=100, step=1)
+        design_learning = col2.number_input("Design Learning Curve (%)", min_value=50, max_value=100, value=100, step=1)
+        supervision_learning = col3.number_input("Supervision Learning Curve (%)", min_value=50, max_value=100, value=100, step=1)
+
+        submit_product = st.form_submit_button("Add Product & Cost Drivers")
+
+        lifecycle_problems = lifecycle_errors({"Name": product_name, **lifecycle})
+        if submit_product and product_name and lifecycle_problems:
+            st.error(lifecycle_problems[0])
+        elif submit_product and product_name:
+            product_list.append({"ID": new_item_id(), "Name": product_name, "Initial Units": initial_units, "Unit Price": unit_price, "Growth Rate": growth_rate,
+                                 **({} if lifecycle["Lifecycle"] == "Compound Growth" and len(lifecycle) == 1 else lifecycle), **lots})
+            
+            cost_drivers[product_name] = {
+                "Equipment Costs": equipment_cost_inputs,
+                "Machinist Labor": {"Cost Per Hour": machinist_cost_per_hour, "Hours Per Unit": machinist_hours_per_unit, **learning_curve(machinist_learning)},
+                "Design Labor": {"Cost Per Hour": design_cost_per_hour, "Hours Per Unit": design_hours_per_unit, **learning_curve(design_learning)},
+                "Supervision": {"Cost Per Hour": supervision_cost_per_hour, "Hours Per Unit": supervision_hours_per_unit, **learning_curve(supervision_learning)}
+            }
+
+            persist_catalog()
+            st.success(f"Product '{product_name}' and cost drivers added successfully!")
+
+# Everything the statements page shows, computed off the script thread by the
+# session's Recalculator; check_cancelled() abandons runs for superseded inputs
+def evaluate_statements(compiled, debt_ratio, interest_rate, check_cancelled):
+    inc("model_scenarios_total")
+    with stage("forecast"):
+        results = forecast(compiled, check_cancelled=check_cancelled)
+        utilization = utilization_rate(results["production"], compiled["equipment_capacity"])
+        _, machine_utilization = machine_load(compiled, results)
+    check_cancelled()
+
+    with stage("statements"):
+        lines = statement_lines(results, equipment_debt(compiled, debt_ratio), interest_rate)
+        staffing = staffing_frames(compiled, results)
+        check_cancelled()
+        energy = energy_frames(compiled, results)
+        check_cancelled()
+        evaluation = {
+            "machine_hours": pd.DataFrame(results["driver_load"].T, columns=compiled["driver_names"],
+                                          index=pd.Index(results["years"], name="Year")).loc[:, lambda df: df.sum() > 0],
+            "machine_utilization": pd.DataFrame(machine_utilization.T, columns=compiled["equipment_names"],
+                                                index=pd.Index(results["years"], name="Year")),
+            "lot_sizes": None if results["lot_size"] is None else
+                         pd.DataFrame(results["lot_size"].T, columns=compiled["product_names"], index=pd.Index(results["years"], name="Year")),
+            "income": income_statement(results, compiled["product_names"], lines),
+            "balance": balance_sheet(results, lines),
+            "cash": cash_flow(results, lines),
+            "taxes": tax_schedule(results, lines),
+            "staffing": staffing,
+            "energy": energy,
+        }
+    check_cancelled()
+
+    if len(compiled["product_names"]) > 0:
+        with stage("swot"), np.errstate(divide="ignore", invalid="ignore"):
+            evaluation["swot"] = swot_lists(evaluate_rules({"revenue": results["revenue"], "cost": results["cost"], "utilization": utilization,
+                                                            "machine_utilization": peak_utilization(machine_utilization)}))
+            debt = equipment_debt(compiled, debt_ratio)
+            scores, deductions = score_scenarios(scoring_series(lines, utilization, compiled["equipment_cost"].sum(), debt))
+            evaluation["score"] = int(scores)
+            evaluation["score_breakdown"] = explain_score(deductions)
+    return evaluation
+
+# Energy cost per machine and year, and the yearly energy cost with every
+# machine's first shift starting at each hour; None without powered machines
+def energy_frames(compiled, results):
+    if results["energy"] is None:
+        return None
+    years = pd.Index(results["years"], name="Year")
+    starts = np.arange(24)
+    by_start = shift_start_costs(compiled, results, starts).sum(axis=-2)
+    return {
+        "cost": pd.DataFrame(results["energy"]["cost"].T, columns=compiled["equipment_names"], index=years).loc[:, lambda df: df.sum() > 0],
+        "band_share": pd.Series(results["energy"]["band_kwh"].sum(axis=(-1, -2)), index=TARIFF_BANDS) / max(results["energy"]["kwh"].sum(), 1e-9),
+        "shift_starts": pd.DataFrame(by_start.T, columns=[f"{start:02d}:00" for start in starts], index=years),
+    }
+
+# Year x role tables of the staffing plan; None when no product needs labor
+def staffing_frames(compiled, results):
+    plan = staffing_plan(compiled, results)
+    if not plan["hours"].any():
+        return None
+    tables = {"Headcount": "headcount", "Hires": "hires", "Requisitions Opened": "requisitions", "Labor Cost": "labor_cost"}
+    return {title: pd.DataFrame(plan[key].T, columns=LABOR_ROLES, index=pd.Index(results["years"], name="Year"))
+            for title, key in tables.items()}
+
+def get_recalculator():
+    if "recalculator" not in st.session_state:
+        st.session_state["recalculator"] = Recalculator(evaluate_statements)
+    return st.session_state["recalculator"]
+
+# Shown while a newer result is being computed; reruns the page once it is ready
+@st.fragment(run_every=0.25)
+def recalculation_status(key):
+    recalculator = get_recalculator()
+    if recalculator.result()[0] == key or recalculator.error(key) is not None:
+        st.rerun()
+    st.caption("⏳ Recalculating… showing the last result until the new one is ready.")
+
+# Model-wide days outstanding; products may override them in the product list
+def working_capital_settings():
+    assumptions = get_catalog().setdefault("assumptions", {})
+    with st.expander("🔄 Working Capital"), st.form("working_capital_form"):
+        st.caption("Receivables build from revenue, inventory and payables from COGS over the days below.")
+        columns = st.columns(len(WORKING_CAPITAL_FIELDS))
+        days = {field: column.number_input(field, min_value=0, value=int(assumptions.get(field, default)), step=1)
+                for column, (field, default) in zip(columns, WORKING_CAPITAL_FIELDS.items())}
+        if st.form_submit_button("Save Working Capital Days"):
+            assumptions.update(days)
+            persist_catalog()
+
+# Hours per FTE and hiring lead time per labor role, and the supervision span
+def staffing_settings():
+    assumptions = get_catalog().setdefault("assumptions", {})
+    staffing = assumptions.get("Staffing", {})
+    with st.expander("👷 Staffing"), st.form("staffing_form"):
+        columns = st.columns(len(LABOR_ROLES))
+        roles = {role: {field: column.number_input(f"{role} – {field}", min_value=0.0, step=1.0,
+                                                   value=None if np.isnan(value := float(staffing.get(role, {}).get(field, default))) else value)
+                        for field, default in STAFFING_FIELDS.items()}
+                 for column, role in zip(columns, LABOR_ROLES)}
+        st.caption("A blank Current Headcount starts from the first year's headcount.")
+        span = st.number_input("Supervision Span (direct FTEs per supervisor)", min_value=1.0,
+                               value=float(assumptions.get("Supervision Span", DEFAULT_SUPERVISION_SPAN)), step=1.0)
+        if st.form_submit_button("Save Staffing Settings"):
+            roles = {role: {field: value for field, value in fields.items() if value is not None} for role, fields in roles.items()}
+            assumptions.update({"Staffing": roles, "Supervision Span": span})
+            persist_catalog()
+
+# Yearly escalation rate per cost center; the forecast applies their
+# cumulative index to rates, costs and prices from the second year on
+def escalation_settings():
+    assumptions = get_catalog().setdefault("assumptions", {})
+    rates = escalation_rates(assumptions.get("Escalation", {}), FORECAST_YEARS)
+    with st.expander("📈 Escalation"), st.form("escalation_form"):
+        st.caption("Yearly increase (%) of each cost center and of selling prices; entered values apply in the first year.")
+        years = [str(y) for y in FORECAST_YEARS[1:]]
+        table = pd.DataFrame(rates[:, 1:] * 100, index=pd.Index(ESCALATION_CENTERS, name="Cost Center"), columns=years)
+        edited = st.data_editor(table, column_config={year: st.column_config.NumberColumn(min_value=-50.0, max_value=100.0, step=0.5, format="%.1f%%")
+                                                      for year in years})
+        if st.form_submit_button("Save Escalation"):
+            assumptions["Escalation"] = {center: {year: rate / 100 for year, rate in row.items()}
+                                         for center, row in edited.fillna(0.0).iterrows()}
+            persist_catalog()
+
+# Time-of-use energy tariff: rate per band and the weekday peak windows
+def tariff_settings():
+    assumptions = get_catalog().setdefault("assumptions", {})
+    settings = {**TARIFF_FIELDS, **assumptions.get("Energy Tariff", {})}
+    with st.expander("⚡ Energy Tariff"), st.form("tariff_form"):
+        st.caption("Weekday hours between the starts and ends are mid-peak and on-peak; all other hours and weekends are off-peak.")
+        columns = st.columns(len(TARIFF_BANDS))
+        values = {f"{band} Rate": column.number_input(f"{band} ($/kWh)", min_value=0.0, value=float(settings[f"{band} Rate"]), step=0.01, format="%.3f")
+                  for column, band in zip(columns, TARIFF_BANDS)}
+        col1, col2 = st.columns(2)
+        for column, band in ((col1, "Mid-Peak"), (col2, "On-Peak")):
+            for edge in ("Start", "End"):
+                field = f"{band} {edge}"
+                values[field] = column.number_input(f"{field} (hour)", min_value=0, max_value=24, value=int(settings[field]))
+        if st.form_submit_button("Save Tariff"):
+            assumptions["Energy Tariff"] = values
+            persist_catalog()
+
+# Model-wide tax settings; losses carry forward, capped at the limit each year
+def tax_settings():
+    assumptions = get_catalog().setdefault("assumptions", {})
+    settings = {**TAX_FIELDS, **assumptions}
+    with st.expander("🧾 Taxes"), st.form("tax_form"):
+        col1, col2 = st.columns(2)
+        values = {
+            "Tax Rate": col1.number_input("Tax Rate (%)", min_value=0.0, max_value=100.0, value=settings["Tax Rate"] * 100, step=0.5) / 100,
+            "Loss Carryforward Limit": col1.number_input("Loss Carryforward Limit (% of taxable income)", min_value=0.0, max_value=100.0,
+                                                         value=settings["Loss Carryforward Limit"] * 100, step=5.0) / 100,
+            "Bonus Depreciation": col2.number_input("Bonus Depreciation (% expensed when bought)", min_value=0.0, max_value=100.0,
+                                                    value=settings["Bonus Depreciation"] * 100, step=5.0) / 100,
+            "Opening Loss Carryforward": col2.number_input("Opening Loss Carryforward ($)", min_value=0.0,
+                                                           value=float(settings["Opening Loss Carryforward"]), step=10000.0),
+        }
+        if st.form_submit_button("Save Tax Settings"):
+            assumptions.update(values)
+            persist_catalog()
+
+def financial_statements_page(debt_ratio, interest_rate):
+    st.header("📊 Financial Statements")
+    working_capital_settings()
+    tax_settings()
+    staffing_settings()
+    escalation_settings()
+    tariff_settings()
+    compiled = get_compiled()
+    record_model_size(len(compiled["product_names"]), len(compiled["equipment_names"]))
+
+    # Slider drags send a burst of reruns; the recalculator debounces them and
+    # only the latest inputs are computed
+    key = (st.session_state["catalog_revision"], debt_ratio, interest_rate)
+    recalculator = get_recalculator()
+    recalculator.request(key, compiled, debt_ratio, interest_rate)
+    result = recalculator.wait(key, timeout=None if recalculator.result() is None else 0)
+    error = recalculator.error(key)
+    if error is not None:
+        st.error(f"Recalculation failed: {error}")
+    if result is None:
+        return
+    if result[0] != key and error is None:
+        recalculation_status(key)
+    evaluation = result[1]
+    financial_df = evaluation["income"]
+
+    with stage("rendering"):
+        st.subheader("📊 Income Statement")
+        st.dataframe(financial_df.style.format("${:,.0f}"), use_container_width=True)
 
-    return score
+        # Balance Sheet & Cash Flow Statement
+        st.subheader("📄 Balance Sheet")
+        st.dataframe(evaluation["balance"].style.format("${:,.0f}"))
 
-def export_to_excel(financial_model):
-    file_path = "financial_report.xlsx"
-    financial_model.to_excel(file_path, index=False)
-    return file_path
+        st.subheader("💰 Cash Flow Statement")
+        st.dataframe(evaluation["cash"].style.format("${:,.0f}"))
+
+        st.subheader("🧾 Taxes")
+        st.caption("Tax depreciation in place of book depreciation; losses are carried forward, not booked as a tax benefit.")
+        st.dataframe(evaluation["taxes"].style.format("${:,.0f}"))
+
+        if not evaluation["machine_hours"].empty:
+            st.subheader("⏱ Labor & Machine Hours")
+            st.dataframe(evaluation["machine_hours"].style.format("{:,.0f}"))
+        if not evaluation["machine_utilization"].empty:
+            st.subheader("🏭 Machine Utilization (% of available hours)")
+            st.caption("Available hours come from each machine's shift calendar, planned maintenance and OEE.")
+            st.dataframe(evaluation["machine_utilization"].style.format("{:.0f}%", na_rep="–"))
+        if evaluation["staffing"] is not None:
+            st.subheader("👷 Staffing Plan")
+            st.caption("Labor hours at each role's hours per FTE, rounded up to whole people. Hires join evenly through the year "
+                       "they are needed and requisitions open one hiring lead time earlier (late ones in the first year).")
+            formats = {"Labor Cost": "${:,.0f}", "Requisitions Opened": "{:,.1f}"}
+            for tab, (title, table) in zip(st.tabs(list(evaluation["staffing"])), evaluation["staffing"].items()):
+                tab.dataframe(table.style.format(formats.get(title, "{:,.0f}")))
+        if evaluation["energy"] is not None:
+            energy = evaluation["energy"]
+            st.subheader("⚡ Energy Cost")
+            st.caption("Time-of-use cost of each machine's power draw over its scheduled hours; included in unit costs. Share of kWh by band: "
+                       + ", ".join(f"{band} {share:.0%}" for band, share in energy["band_share"].items()))
+            st.dataframe(energy["cost"].style.format("${:,.0f}"))
+            st.caption("Total energy cost if every machine's first shift started at each hour of the day:")
+            st.dataframe(energy["shift_starts"].style.format("${:,.0f}").highlight_min(axis=1, color="#c8e6c9"))
+        if evaluation["lot_sizes"] is not None:
+            st.subheader("📦 Lot Sizes (units per batch)")
+            st.caption("Economic lot sizes balance setup cost against inventory holding cost, enlarged where setups would overload a machine.")
+            st.dataframe(evaluation["lot_sizes"].style.format("{:,.0f}"))
+
+        if "swot" in evaluation:
+            strengths, weaknesses, opportunities, threats = evaluation["swot"]
+            st.subheader("🧭 SWOT Analysis")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write("**Strengths**", strengths)
+                st.write("**Opportunities**", opportunities)
+            with col2:
+                st.write("**Weaknesses**", weaknesses)
+                st.write("**Threats**", threats)
+
+            st.subheader("Investor Sanity Check")
+            st.metric("Believability Score", f"{evaluation['score']}%")
+            if evaluation["score_breakdown"]:
+                st.dataframe(pd.DataFrame(evaluation["score_breakdown"]).rename(columns=str.title),
+                             hide_index=True, use_container_width=True)
+            else:
+                st.caption("No scoring criteria fired.")
+
+    # Export Financial Report
+    with stage("export"):
+        report_path = export_to_excel(financial_df)
+    with open(report_path, "rb") as f:
+        st.download_button(label="Download Report (Excel)", data=f.read(), file_name="Financial_Report.xlsx", mime="application/vnd.ms-excel")
+
+def percentile_table(years, percentiles, line):
+    return pd.DataFrame({"Year": years, **{f"P{p}": percentiles[line][str(p)] for p in PERCENTILES}}).set_index("Year")
+
+# Jobs run in worker processes; this fragment polls the job table once a second
+# so progress and partial results update without rerunning the whole page
+@st.fragment(run_every=1)
+def job_list():
+    jobs = list_jobs()
+    if not jobs:
+        st.info("No simulation jobs yet.")
+        return
+    for job in jobs:
+        if job["kind"] == "monte_carlo":
+            label = "Monte Carlo"
+        elif job["kind"] == "shop_floor":
+            label = f"Shop floor, batches of {job['params']['batch_size']}" if job["params"].get("batch_size") else "Shop floor, economic lots"
+        else:
+            label = f"Sweep of {job['params']['product']} {job['params']['field']}"
+        with st.expander(f"#{job['id']} {label} — {job['status']}", expanded=job["status"] in ACTIVE_STATUSES):
+            if job["status"] in ACTIVE_STATUSES:
+                st.progress(job["progress"], text=job["message"] or "Waiting for a worker...")
+                st.button("Cancel", key=f"cancel_job_{job['id']}", on_click=cancel_job, args=(job["id"],))
+            if job["status"] == "failed":
+                st.error(job["error"])
+            summary = job["result"] or job["partial"]
+            if not summary:
+                continue
+            if job["status"] != "done":
+                st.caption("Partial results")
+            if job["kind"] == "monte_carlo":
+                st.caption(f"{summary['n_scenarios']:,} scenarios")
+                for line in ("Total Revenue", "Net Income", "Peak Machine Utilization (%)"):
+                    if line not in summary["percentiles"]:  # Jobs saved before the line existed
+                        continue
+                    st.write(f"**{line}**")
+                    st.line_chart(percentile_table(summary["years"], summary["percentiles"], line))
+                st.write("**Probability of a net loss by year**")
+                st.dataframe(pd.DataFrame({"Year": summary["years"], "Loss Probability": summary["loss_probability"]})
+                             .style.format({"Loss Probability": "{:.1%}"}), hide_index=True)
+                if "investor_score" in summary:
+                    distribution = summary["investor_score"]
+                    st.write(f"**Believability score distribution** (mean {distribution['mean']:.0f}%)")
+                    st.bar_chart(pd.DataFrame({"Scenarios": distribution["counts"]},
+                                              index=[f"{low}-{high}" for low, high in zip(distribution["bins"], distribution["bins"][1:])]))
+                if "swot" in summary:
+                    st.write("**SWOT flags across scenarios**")
+                    swot = pd.DataFrame(summary["swot"]).rename(columns=str.title).sort_values("Frequency", ascending=False)
+                    st.dataframe(swot.style.format({"Frequency": "{:.0%}"}), hide_index=True, use_container_width=True)
+            elif job["kind"] == "shop_floor":
+                st.caption(f"{summary['year']}, {summary['replications']} replications; ± is the 95% confidence half-width")
+                machines = summary["machines"]
+                st.write("**Machines**")
+                st.dataframe(pd.DataFrame({
+                    "Machine": machines["machine"],
+                    "Utilization (%)": machines["utilization"], "± Utilization": machines["utilization_ci"],
+                    "Batches Processed": machines["batches_processed"],
+                    "Average Queue": machines["average_queue"], "Max Queue": machines["max_queue"],
+                    "Average Wait (h)": machines["average_wait"], "± Wait": machines["average_wait_ci"],
+                }).style.format(precision=1), hide_index=True, use_container_width=True)
+                products = summary["products"]
+                st.write(f"**Products** (average work in process {summary['average_wip']:.1f} batches)")
+                st.dataframe(pd.DataFrame({
+                    "Product": products["product"], "Batch Size": products.get("batch_size"), "Planned Units": products["planned_units"],
+                    "Completed Units": products["completed_units"],
+                    "Lead Time (h)": products["lead_time"], "± Lead Time": products["lead_time_ci"],
+                    "Lead Time P95 (h)": products["lead_time_p95"],
+                }).style.format(precision=1), hide_index=True, use_container_width=True)
+            else:
+                sweep = pd.DataFrame({"Value": summary["values"], "Total Revenue": summary["Total Revenue"],
+                                      "Net Income": summary["Net Income"]}).set_index("Value")
+                st.line_chart(sweep)
+
+def simulations_page():
+    st.header("🎲 Simulations")
+    recover_jobs()
+    compiled = get_compiled()
+    product_names = compiled["product_names"].tolist()
+    if not product_names:
+        st.info("Add products before running simulations.")
+    else:
+        monte_carlo_tab, sweep_tab, shop_floor_tab = st.tabs(["Monte Carlo", "Parameter Sweep", "Shop Floor"])
+        with monte_carlo_tab, st.form("monte_carlo_form"):
+            n_scenarios = st.number_input("Scenarios", min_value=100, max_value=5_000_000, value=100_000, step=10_000)
+            volume_sd = st.slider("Volume Volatility (%)", min_value=0, max_value=100, value=15) / 100
+            price_sd = st.slider("Price Volatility (%)", min_value=0, max_value=100, value=10) / 100
+            growth_sd = st.slider("Growth Rate Volatility (pts)", min_value=0, max_value=50, value=5) / 100
+            seed = st.number_input("Random Seed", min_value=0, value=0, step=1)
+            if st.form_submit_button("Run in Background"):
+                job_id = submit_job("monte_carlo", SAVE_FILE, {"n_scenarios": int(n_scenarios), "volume_sd": volume_sd,
+                                                               "price_sd": price_sd, "growth_sd": growth_sd, "seed": int(seed)})
+                st.success(f"Submitted job #{job_id}.")
+        with sweep_tab, st.form("sweep_form"):
+            product = st.selectbox("Product", product_names)
+            field = st.selectbox("Input", list(SWEEP_FIELDS))
+            current = float(compiled[SWEEP_FIELDS[field]][product_names.index(product)])
+            low = st.number_input("From", value=current * 0.5)
+            high = st.number_input("To", value=current * 1.5)
+            steps = st.number_input("Steps", min_value=2, max_value=1_000_000, value=1000, step=100)
+            if st.form_submit_button("Run in Background"):
+                job_id = submit_job("sweep", SAVE_FILE, {"product": product, "field": field,
+                                                         "values": np.linspace(low, high, int(steps)).tolist()})
+                st.success(f"Submitted job #{job_id}.")
+        with shop_floor_tab, st.form("shop_floor_form"):
+            st.caption("Simulates a year of batches flowing through the machines each product's cost drivers use.")
+            year = st.selectbox("Year", FORECAST_YEARS.tolist())
+            batch_size = st.number_input("Batch Size (units, 0 = the forecast's lot sizes)", min_value=0, value=0, step=10)
+            variability = st.slider("Processing Time Variability (CV %)", min_value=0, max_value=100, value=20) / 100
+            replications = st.number_input("Replications", min_value=1, max_value=1000, value=DEFAULT_REPLICATIONS)
+            seed = st.number_input("Random Seed", min_value=0, value=0, step=1, key="shop_floor_seed")
+            if st.form_submit_button("Run in Background"):
+                job_id = submit_job("shop_floor", SAVE_FILE, {"year_index": FORECAST_YEARS.tolist().index(year), "batch_size": int(batch_size),
+                                                              "variability": variability, "replications": int(replications),
+                                                              "seed": int(seed)})
+                st.success(f"Submitted job #{job_id}.")
+
+    st.subheader("Jobs")
+    job_list()
+
+# Plants and intercompany transfers of the portfolio file; the current model
+# is the first plant of a new portfolio
+def portfolio_editor():
+    portfolio = load_portfolio(PORTFOLIO_FILE)
+    if not portfolio["plants"]:
+        portfolio["plants"] = [{"Name": "Main Plant", "Model": SAVE_FILE}]
+    with st.form("portfolio_form"):
+        st.caption("Each plant is a model save file (relative to the portfolio file) with its own equipment, products and assumptions.")
+        plants = st.data_editor(pd.DataFrame(portfolio["plants"], columns=["Name", "Model"]), num_rows="dynamic",
+                                hide_index=True, use_container_width=True, key="portfolio_plants")
+        st.caption("Intercompany transfers: the share of a selling plant's product sales that goes to another plant.")
+        plant_names = [plant["Name"] for plant in portfolio["plants"]]
+        transfers = st.data_editor(
+            pd.DataFrame(portfolio["transfers"], columns=["From", "To", "Product", "Share"]), num_rows="dynamic",
+            hide_index=True, use_container_width=True, key="portfolio_transfers",
+            column_config={
+                "From": st.column_config.SelectboxColumn(options=plant_names),
+                "To": st.column_config.SelectboxColumn(options=plant_names),
+                "Share": st.column_config.NumberColumn(min_value=0, max_value=1, step=0.05),
+            })
+        if st.form_submit_button("Save Portfolio"):
+            portfolio = {
+                "plants": plants.dropna(subset=["Name", "Model"]).to_dict("records"),
+                "transfers": transfers.dropna().to_dict("records"),
+            }
+            save_portfolio(PORTFOLIO_FILE, portfolio)
+            st.rerun()
+    return portfolio
+
+def plant_portfolio_page(debt_ratio, interest_rate):
+    st.header("🏭 Plant Portfolio")
+    portfolio = portfolio_editor()
+    try:
+        with stage("portfolio"):
+            evaluation = evaluate_portfolio(portfolio, PORTFOLIO_FILE, debt_ratio, interest_rate)
+    except (ValueError, KeyError) as error:
+        st.error(f"Portfolio evaluation failed: {error}")
+        return
+    inc("model_scenarios_total", len(evaluation["plants"]))
+
+    years = {"years": evaluation["years"], "product_revenue": []}
+    with stage("rendering"):
+        st.subheader("📊 Consolidated Statements")
+        st.caption("Plant statements summed; intercompany sales are eliminated from revenue and COGS and the open intercompany "
+                   "balances from receivables and payables.")
+        consolidated = evaluation["consolidated"]
+        eliminations = pd.DataFrame({"Year": evaluation["years"], **evaluation["eliminations"]})
+        for tab, table in zip(st.tabs(["Income Statement", "Balance Sheet", "Cash Flow", "Eliminations"]),
+                              [income_statement(years, [], consolidated), balance_sheet(years, consolidated),
+                               cash_flow(years, consolidated), eliminations]):
+            tab.dataframe(table.set_index("Year").style.format("${:,.0f}"), use_container_width=True)
+
+        st.subheader("Net Income by Plant")
+        st.dataframe(pd.DataFrame({plant["name"]: plant["lines"]["Net Income"] for plant in evaluation["plants"]},
+                                  index=pd.Index(evaluation["years"], name="Year")).style.format("${:,.0f}"), use_container_width=True)
+        for plant in evaluation["plants"]:
+            with st.expander(f"{plant['name']} Statements"):
+                results = {"years": plant["years"], "product_revenue": plant["product_revenue"]}
+                for tab, table in zip(st.tabs(["Income Statement", "Balance Sheet", "Cash Flow"]),
+                                      [income_statement(results, plant["product_names"], plant["lines"]),
+                                       balance_sheet(results, plant["lines"]), cash_flow(results, plant["lines"])]):
+                    tab.dataframe(table.set_index("Year").style.format("${:,.0f}"), use_container_width=True)
 
 def manufacturing_expansion_app():
     st.title("Manufacturing Financial Model")
     
      # Sidebar Navigation
     st.sidebar.header("Navigation")
-    page = st.sidebar.radio("Select a Page", ["Financial Statements", "Manage Equipment", "Manage Products"])
+    page = st.sidebar.radio("Select a Page", ["Financial Statements", "Manage Equipment", "Manage Products", "Simulations", "Plant Portfolio"])
+    show_performance = st.sidebar.checkbox("🔍 Show Performance Panel", value=False)
+    start_run(trace_memory=show_performance)
+    set_current_model(SAVE_FILE)
+    metrics_file = start_exporter_from_env()
 
     st.sidebar.header("User Inputs")
     # User Input Fields
     initial_revenue = st.sidebar.number_input("Initial Annual Revenue ($)", min_value=0, value=0, step=50000)
     initial_costs = st.sidebar.number_input("Initial Annual Costs ($)", min_value=0, value=0, step=50000)
     annual_revenue_growth = st.sidebar.slider("Annual Revenue Growth (%)", min_value=1, max_value=50, value=15) / 100
-    annual_cost_growth = st.sidebar.slider("Annual Cost Growth (%)", min_value=1, max_value=50, value=10) / 100
 
     # Financing Inputs
-    debt_ratio = st.sidebar.slider("Debt Financing Ratio (%)", min_value=0, max_value=100, value=50) / 100
-    interest_rate = st.sidebar.slider("Annual Interest Rate (%)", min_value=1, max_value=20, value=10) / 100
+    debt_ratio = st.sidebar.slider("Debt Financing Ratio (%)", min_value=0, max_value=100, value=round(DEFAULT_DEBT_RATIO * 100)) / 100
+    interest_rate = st.sidebar.slider("Annual Interest Rate (%)", min_value=1, max_value=20, value=round(DEFAULT_INTEREST_RATE * 100)) / 100
 
     # Load saved data if available
-    saved_data = load_model()
-    equipment_list = saved_data["equipment"]
-    product_list = saved_data["products"]
-    cost_drivers = saved_data["cost_drivers"]
-
-   
+    get_catalog()
 
     if page == "Manage Equipment":
-        st.header("📋 Equipment List & Management")
-        if equipment_list:
-            for i, eq in enumerate(equipment_list):
-                col1, col2 = st.columns([2,2])  # Adjust width for button alignment
-                with col1:
-                    st.write(f"🔹 {eq['Name']} - Cost: ${eq['Cost']:,.2f}")
-                with col2:
-                    if st.button(f"❌ Remove", key=f"del_eq_{i}"):
-                        del equipment_list[i]
-                        save_model(equipment_list, product_list, cost_drivers)
-                        st.experimental_rerun()  # Refresh UI
-        else:
-            st.info("No equipment added yet.")
-
-        # Equipment Purchases
-        st.header("📋 Add Equipment")
-        with st.form("equipment_form", clear_on_submit=True):
-            eq_name = st.text_input("Equipment Name")
-            eq_cost = st.number_input("Cost ($)", min_value=10000, value=500000, step=10000)
-            eq_lifetime = st.number_input("Useful Life (years)", min_value=1, value=10, step=1)
-            max_capacity = st.number_input("Max Production Capacity (units/year)", min_value=1, value=10000, step=100)
-            submit_eq = st.form_submit_button("Add Equipment")
-
-            if submit_eq and eq_name:
-                equipment_list.append({"Name": eq_name, "Cost": eq_cost, "Useful Life": eq_lifetime, "Max Capacity": max_capacity})
-                save_model(equipment_list, product_list, cost_drivers)
-                st.success(f"Equipment '{eq_name}' added successfully!")
+        with stage("rendering"):
+            manage_equipment_page()
 
     elif page == "Manage Products":
-        st.header("📦 Product List & Management")
-        if product_list:
-            for i, prod in enumerate(product_list):
-                col1, col2 = st.columns([2, 2])  # Adjust width for button alignment
-                with col1:
-                    st.write(f"🛠 {prod['Name']} - Price: ${prod['Unit Price']:,.2f}")
-                with col2:
-                    if st.button(f"❌ Remove", key=f"del_prod_{i}"):
-                        del product_list[i]
-                        save_model(equipment_list, product_list, cost_drivers)
-                        st.experimental_rerun()  # Refresh UI
-        else:
-            st.info("No products added yet.")
-
-        # Product Ramp-Up
-        st.header("📋 Add New Product")
-        with st.form("product_form", clear_on_submit=True):
-            product_name = st.text_input("Product Name")
-            initial_units = st.number_input("Initial Production Volume (units/year)", min_value=1, value=1000, step=100)
-            unit_price = st.number_input("Unit Selling Price ($)", min_value=1, value=100, step=1)
-            growth_rate = st.slider("Annual Production Growth (%)", min_value=1, max_value=50, value=10) / 100
-            selected_equipment = st.multiselect("Select Equipment Used", [eq["Name"] for eq in equipment_list])
-
-            # Cost Drivers for Each Equipment Selected
-            st.header("📋 Enter Cost Drivers Equipment")
-            equipment_cost_inputs = {}
-            for eq_name in selected_equipment:
-                st.subheader(f"⚙️ Cost Drivers for {eq_name}")
-                cost_per_hour = st.number_input(f"{eq_name} - Cost Per Hour ($)", min_value=0.01, value=50.00, step=0.01)
-                hours_per_unit = st.number_input(f"{eq_name} - Hours Per Unit Produced", min_value=0.01, value=1.00, step=0.01)
-                equipment_cost_inputs[eq_name] = {"Cost Per Hour": cost_per_hour, "Hours Per Unit": hours_per_unit}
-
-            # Labor & Supervision Costs
-            st.subheader("👷 Labor & Supervision Costs")
-            machinist_cost_per_hour = st.number_input("Machinist Labor Cost Per Hour ($)", min_value=0.01, value=30.00, step=0.01)
-            machinist_hours_per_unit = st.number_input("Machinist Hours Per Unit", min_value=0.01, value=2.00, step=0.01)
-            design_cost_per_hour = st.number_input("Design Labor Cost Per Hour ($)", min_value=0.01, value=40.00, step=0.01)
-            design_hours_per_unit = st.number_input("Design Hours Per Unit", min_value=0.01, value=1.00, step=0.01)
-            supervision_cost_per_hour = st.number_input("Supervision Cost Per Hour ($)", min_value=0.01, value=20.00, step=0.01)
-            supervision_hours_per_unit = st.number_input("Supervision Hours Per Unit", min_value=0.01, value=0.50, step=0.01)
-
-            submit_product = st.form_submit_button("Add Product & Cost Drivers")
-
-            if submit_product and product_name:
-                product_list.append({"Name": product_name, "Initial Units": initial_units, "Unit Price": unit_price, "Growth Rate": growth_rate})
-                
-                cost_drivers[product_name] = {
-                    "Equipment Costs": equipment_cost_inputs,
-                    "Machinist Labor": {"Cost Per Hour": machinist_cost_per_hour, "Hours Per Unit": machinist_hours_per_unit},
-                    "Design Labor": {"Cost Per Hour": design_cost_per_hour, "Hours Per Unit": design_hours_per_unit},
-                    "Supervision": {"Cost Per Hour": supervision_cost_per_hour, "Hours Per Unit": supervision_hours_per_unit}
-                }
-
-                save_model(equipment_list, product_list, cost_drivers)
-                st.success(f"Product '{product_name}' and cost drivers added successfully!")
-                
-    elif page == "Financial Statements":
-        st.header("📊 Financial Statements")
-
-        # Financial Projections
-        years = np.arange(2025, 2030)
-        revenue_forecast, cost_forecast, total_production = [], [], []
-        product_revenue_breakdown = {p["Name"]: [] for p in product_list}
-
-        for year_idx in range(len(years)):
-            yearly_revenue, yearly_cost, yearly_production = 0, 0, 0
-
-            for product in product_list:
-                units_produced = product["Initial Units"] * (1 + product["Growth Rate"]) ** year_idx
-                yearly_revenue += units_produced * product["Unit Price"]
-                yearly_cost += units_produced * product["Unit Cost"]
-                yearly_production += units_produced
-                product_revenue_breakdown[product["Name"]].append(units_produced * product["Unit Price"])
-
-            revenue_forecast.append(yearly_revenue)
-            cost_forecast.append(yearly_cost)
-            total_production.append(yearly_production)
-
-        # Income Statement
-        financial_df = pd.DataFrame({"Year": years, "Total Revenue": revenue_forecast, "COGS": cost_forecast})
+        with stage("rendering"):
+            manage_products_page()
 
-        for product_name, rev_list in product_revenue_breakdown.items():
-            financial_df[product_name + " Revenue"] = rev_list
+    elif page == "Financial Statements":
+        financial_statements_page(debt_ratio, interest_rate)
 
-        financial_df["Gross Profit"] = financial_df["Total Revenue"] - financial_df["COGS"]
-        financial_df["Operating Expenses"] = financial_df["COGS"] * 0.20  # Placeholder for OpEx
-        financial_df["EBITDA"] = financial_df["Gross Profit"] - financial_df["Operating Expenses"]
-        financial_df["Depreciation"] = financial_df["COGS"] * 0.05  # Placeholder for Depreciation
-        financial_df["EBIT"] = financial_df["EBITDA"] - financial_df["Depreciation"]
-        financial_df["Net Income"] = financial_df["EBIT"] * 0.75  # Assuming 25% Tax
+    elif page == "Simulations":
+        with stage("rendering"):
+            simulations_page()
 
-        st.subheader("📊 Income Statement")
-        st.dataframe(financial_df.style.format("${:,.0f}"), use_container_width=True)
+    elif page == "Plant Portfolio":
+        plant_portfolio_page(debt_ratio, interest_rate)
 
-        # Balance Sheet & Cash Flow Statement
-        st.subheader("📄 Balance Sheet")
-        balance_sheet = pd.DataFrame({
-            "Year": years,
-            "Assets": np.array(financial_df["Total Revenue"]) * 0.6,  # Placeholder assumption
-            "Liabilities": np.array(financial_df["Total Revenue"]) * 0.3,  # Placeholder assumption
-            "Equity": np.array(financial_df["Total Revenue"]) * 0.3  # Placeholder
-        })
-        st.dataframe(balance_sheet.style.format("${:,.0f}"))
-
-        st.subheader("💰 Cash Flow Statement")
-        cash_flow = pd.DataFrame({
-            "Year": years,
-            "Operating Cash Flow": financial_df["EBITDA"] * 0.8,  # Placeholder assumption
-            "Investing Cash Flow": financial_df["EBITDA"] * -0.2,  # Placeholder assumption
-            "Financing Cash Flow": financial_df["EBITDA"] * 0.1  # Placeholder assumption
-        })
-        st.dataframe(cash_flow.style.format("${:,.0f}"))
+    performance_table = finish_run(page)
+    if show_performance:
+        render_panel(performance_table)
+    if metrics_file:
+        write_metrics_file(metrics_file)
 
 if __name__ == "__main__":
     manufacturing_expansion_app()
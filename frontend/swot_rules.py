@@ -0,0 +1,144 @@
+import ast
+import operator
+import numpy as np
+
+# SWOT rules are data. Each rule compares a metric against a threshold:
+#
+#   metric     expression over yearly series (revenue, cost, utilization, ...)
+#              using + - * / and the reductions max/min/mean/sum/first/last,
+#              which reduce over the year axis
+#   aggregate  reduction applied if the metric still has a year axis
+#   op         comparison against the threshold
+#
+# Rules are compiled once to NumPy operations and evaluated over arrays with
+# any leading scenario axes, so a whole simulation batch is judged at once.
+# Rules reading a series the caller did not provide never fire.
+
+SWOT_CATEGORIES = ["strengths", "weaknesses", "opportunities", "threats"]
+
+SWOT_RULES = [
+    {"category": "strengths", "metric": "utilization", "aggregate": "max", "op": "<", "threshold": 80,
+     "message": "Capacity available for expansion"},
+    {"category": "strengths", "metric": "max(revenue) / max(cost)", "op": ">", "threshold": 1.5,
+     "message": "Strong revenue-to-cost ratio"},
+    {"category": "weaknesses", "metric": "utilization", "aggregate": "min", "op": ">", "threshold": 90,
+     "message": "High equipment utilization may lead to bottlenecks"},
+    {"category": "weaknesses", "metric": "min(revenue) / min(cost)", "op": "<", "threshold": 1,
+     "message": "Revenue barely covers costs in early years"},
+    {"category": "opportunities", "metric": "max(revenue) / min(revenue)", "op": ">", "threshold": 2,
+     "message": "Strong revenue growth potential"},
+    {"category": "opportunities", "metric": "utilization", "aggregate": "min", "op": "<", "threshold": 50,
+     "message": "Potential to add more production capacity"},
+    {"category": "threats", "metric": "min(revenue) - min(cost)", "op": "<", "threshold": 0,
+     "message": "Potential losses in early years"},
+    {"category": "threats", "metric": "utilization", "aggregate": "max", "op": ">", "threshold": 95,
+     "message": "Risk of overcapacity and downtime issues"},
+    {"category": "threats", "metric": "machine_utilization", "aggregate": "max", "op": ">", "threshold": 100,
+     "message": "A machine needs more hours than its shift calendar provides"},
+]
+
+REDUCTIONS = {
+    "max": lambda values: values.max(axis=-1),
+    "min": lambda values: values.min(axis=-1),
+    "mean": lambda values: values.mean(axis=-1),
+    "sum": lambda values: values.sum(axis=-1),
+    "first": lambda values: values[..., 0],
+    "last": lambda values: values[..., -1],
+}
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+_COMPARISONS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+# Turn a metric expression into a function of the series dict. Only names,
+# numbers, arithmetic and the reductions above are accepted.
+def compile_metric(expression):
+    def build(node):
+        if isinstance(node, ast.Expression):
+            return build(node.body)
+        if isinstance(node, ast.Name):
+            return lambda series: series[node.id]
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return lambda series: node.value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            operand = build(node.operand)
+            return lambda series: -operand(series)
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            left, right, op = build(node.left), build(node.right), _BINARY[type(node.op)]
+            return lambda series: op(left(series), right(series))
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in REDUCTIONS
+                and len(node.args) == 1 and not node.keywords):
+            argument, reduce = build(node.args[0]), REDUCTIONS[node.func.id]
+            return lambda series: reduce(np.asarray(argument(series)))
+        raise ValueError(f"Unsupported SWOT metric expression: {expression!r}")
+
+    return build(ast.parse(expression, mode="eval"))
+
+
+# Series names a metric expression reads
+def metric_inputs(expression):
+    tree = ast.parse(expression, mode="eval")
+    functions = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and id(node) not in functions}
+
+
+# The metric/aggregate/op/threshold part of a rule as a function of the series
+def compile_condition(rule):
+    metric = compile_metric(rule["metric"])
+    aggregate = REDUCTIONS[rule["aggregate"]] if rule.get("aggregate") else None
+    compare, threshold = _COMPARISONS[rule["op"]], rule["threshold"]
+
+    # series values are (..., years); the rule yields one flag per scenario
+    inputs = metric_inputs(rule["metric"])
+
+    def evaluate(series):
+        if not inputs <= series.keys():
+            return np.zeros(np.shape(next(iter(series.values())))[:-1], dtype=bool)
+        values = np.asarray(metric(series))
+        if aggregate is not None:
+            values = aggregate(values)
+        return compare(values, threshold)
+
+    return evaluate
+
+def compile_rule(rule):
+    if rule["category"] not in SWOT_CATEGORIES:
+        raise ValueError(f"Unknown SWOT category '{rule['category']}'")
+    return compile_condition(rule)
+
+def compile_rules(rules):
+    return [compile_rule(rule) for rule in rules]
+
+COMPILED_SWOT_RULES = compile_rules(SWOT_RULES)
+
+
+# Flags as a (rules, ...) boolean array; NaN metrics (e.g. 0 / 0) never fire
+def evaluate_rules(series, rules=SWOT_RULES, compiled_rules=None):
+    if compiled_rules is None:
+        compiled_rules = COMPILED_SWOT_RULES if rules is SWOT_RULES else compile_rules(rules)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.stack([np.asarray(rule(series)) for rule in compiled_rules])
+
+
+# Rule inputs from statement lines (see simulation.evaluate_scenarios)
+def swot_series(lines):
+    return {"revenue": lines["Total Revenue"], "cost": lines["COGS"], "utilization": lines["Utilization (%)"],
+            "machine_utilization": lines["Peak Machine Utilization (%)"], "ebitda": lines["EBITDA"], "net_income": lines["Net Income"]}
+
+
+# Messages of the fired rules for one scenario, grouped by category
+def swot_lists(flags, rules=SWOT_RULES):
+    grouped = {category: [] for category in SWOT_CATEGORIES}
+    for rule, fired in zip(rules, flags):
+        if fired:
+            grouped[rule["category"]].append(rule["message"])
+    return tuple(grouped[category] for category in SWOT_CATEGORIES)
+
+
+# Number of scenarios in which each rule fired; counts from several chunks of
+# a simulation can simply be added up
+def flag_counts(flags):
+    return flags.reshape(len(flags), -1).sum(axis=1)
+
+def flag_frequencies(counts, n_scenarios, rules=SWOT_RULES):
+    return [{"category": rule["category"], "message": rule["message"], "frequency": count / n_scenarios if n_scenarios else 0.0}
+            for rule, count in zip(rules, np.asarray(counts).tolist())]
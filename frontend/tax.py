@@ -0,0 +1,79 @@
+import numpy as np
+
+# Income taxes with loss carryforwards and depreciation timing differences.
+# Taxable income is pre-tax income with tax depreciation in place of book
+# depreciation: Bonus Depreciation expenses that share of each purchase's
+# depreciable cost in the year it is bought, the rest follows the book
+# schedule. Losses are carried forward and may offset at most Loss
+# Carryforward Limit of a later year's taxable income. The carryforward
+# balance depends on every earlier year, so the years are a loop and the
+# scenarios the vectorized axis.
+#
+# Tax expense is the current tax plus deferred tax on the depreciation
+# timing differences. Neither losses nor deferred tax are booked as a benefit:
+# a pre-tax loss year has no tax expense and no year's expense is negative.
+# The deferred tax those limits hold back is carried forward and recognized
+# in the first years with room for it.
+
+TAX_FIELDS = {  # assumptions field: default
+    "Tax Rate": 0.25,
+    "Loss Carryforward Limit": 0.80,  # Share of taxable income losses may offset
+    "Bonus Depreciation": 0.0,
+    "Opening Loss Carryforward": 0.0,
+}
+TAX_KEYS = {field: field.lower().replace(" ", "_") for field in TAX_FIELDS}
+
+
+# Tax depreciation (..., years) from the asset schedules (see assets.py)
+def tax_depreciation(compiled, assets):
+    bonus = compiled["bonus_depreciation"][..., None, None]
+    depreciable = assets["capex"] * (1 - compiled["asset_salvage_rate"][..., None])
+    return (bonus * depreciable + (1 - bonus) * assets["depreciation"]).sum(axis=-2)
+
+
+# Tax settings of a compiled model or batch and its tax depreciation, for income_taxes
+def tax_inputs(compiled, assets):
+    settings = {key: compiled[key] for key in TAX_KEYS.values() if key != "bonus_depreciation"}
+    settings["tax_depreciation"] = tax_depreciation(compiled, assets)
+    return settings
+
+
+# Taxes for pre-tax income and book and tax depreciation (..., years). Rates
+# and limits broadcast against (..., years), opening losses against (...).
+def income_taxes(pre_tax, book_depreciation, tax_depreciation=None, tax_rate=TAX_FIELDS["Tax Rate"],
+                 loss_carryforward_limit=TAX_FIELDS["Loss Carryforward Limit"],
+                 opening_loss_carryforward=TAX_FIELDS["Opening Loss Carryforward"]):
+    timing = np.zeros_like(pre_tax) if tax_depreciation is None else tax_depreciation - book_depreciation
+    income = pre_tax - timing
+    limit = np.broadcast_to(np.asarray(loss_carryforward_limit)[..., None], income.shape)
+    rate = np.asarray(tax_rate)[..., None]
+
+    loss = np.broadcast_to(np.asarray(opening_loss_carryforward, dtype=np.float64), income.shape[:-1]).copy()
+    taxable = np.empty_like(income)
+    carryforward = np.empty_like(income)
+    for t in range(income.shape[-1]):
+        profit = np.maximum(income[..., t], 0.0)
+        used = np.minimum(loss, limit[..., t] * profit)
+        loss += np.maximum(-income[..., t], 0.0) - used
+        taxable[..., t] = profit - used
+        carryforward[..., t] = loss
+
+    current = rate * taxable
+    timing_tax = rate * timing
+    loss_year = pre_tax <= 0
+    pending = np.zeros(income.shape[:-1])
+    deferred = np.empty_like(income)
+    deferred_carryforward = np.empty_like(income)
+    for t in range(income.shape[-1]):
+        due = timing_tax[..., t] + pending
+        deferred[..., t] = np.where(loss_year[..., t], -current[..., t], np.maximum(due, -current[..., t]))
+        pending = due - deferred[..., t]
+        deferred_carryforward[..., t] = pending
+    return {
+        "taxable_income": taxable,
+        "loss_carryforward": carryforward,
+        "current": current,
+        "deferred": deferred,
+        "deferred_carryforward": deferred_carryforward,
+        "expense": current + deferred,
+    }
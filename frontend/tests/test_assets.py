@@ -0,0 +1,32 @@
+import numpy as np
+from assets import asset_schedule
+
+YEARS = np.arange(2025, 2031)
+
+
+def _machine(purchase_year=np.nan, life=3.0):
+    return {"equipment_cost": np.array([1000.0]), "equipment_life": np.array([life]),
+            "asset_purchase_year": np.array([purchase_year]), "asset_salvage_rate": np.array([0.1]),
+            "asset_maintenance_rate": np.array([0.02]), "asset_maintenance_growth": np.array([0.5])}
+
+
+# Replaced like for like at the end of its life, with the old unit sold for salvage
+def test_replacement_cycle():
+    schedule = asset_schedule(_machine(), YEARS)
+    np.testing.assert_array_equal(schedule["age"][0], [0, 1, 2, 0, 1, 2])
+    np.testing.assert_allclose(schedule["capex"][0], [1000, 0, 0, 1000, 0, 0])
+    np.testing.assert_allclose(schedule["salvage"][0], [0, 0, 0, 100, 0, 0])
+    np.testing.assert_allclose(schedule["depreciation"][0], 300.0)
+    np.testing.assert_allclose(schedule["book_value"][0], [700, 400, 100, 700, 400, 100])
+    np.testing.assert_allclose(schedule["maintenance"][0], [20, 30, 45, 20, 30, 45])
+
+
+def test_purchase_inside_and_before_the_horizon():
+    later = asset_schedule(_machine(purchase_year=2027), YEARS)
+    np.testing.assert_array_equal(later["in_service"][0], [False, False, True, True, True, True])
+    np.testing.assert_allclose(later["capex"][0], [0, 0, 1000, 0, 0, 1000])
+
+    # Bought in 2024: starts mid-cycle at age 1, without capex in the horizon until replacement
+    earlier = asset_schedule(_machine(purchase_year=2024), YEARS)
+    np.testing.assert_array_equal(earlier["age"][0], [1, 2, 0, 1, 2, 0])
+    np.testing.assert_allclose(earlier["capex"][0], [0, 0, 1000, 0, 0, 1000])
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from model_store import compile_model, empty_model
+from bom import bom_levels, requirements, rolled_unit_cost
+
+
+# A bike of two wheels and a frame; a wheel of 36 spokes
+def _compiled(**bom):
+    model = empty_model()
+    model["products"] = [{"ID": 1, "Name": "Bike", "Initial Units": 100, "Unit Price": 300.0, "Growth Rate": 0.0, "Unit Cost": 50.0},
+                         {"ID": 2, "Name": "Wheel", "Initial Units": 10, "Unit Price": 40.0, "Growth Rate": 0.0, "Unit Cost": 10.0}]
+    model["materials"] = [{"ID": 1, "Name": "Spoke", "Unit Cost": 0.5}, {"ID": 2, "Name": "Frame", "Unit Cost": 30.0}]
+    model["bom"] = bom or {"Bike": {"Wheel": 2, "Frame": 1}, "Wheel": {"Spoke": 36}}
+    return compile_model(model)
+
+
+def test_rolled_cost_matches_the_dense_inverse():
+    compiled = _compiled()
+    own = np.array([50.0, 10.0])
+    np.testing.assert_allclose(rolled_unit_cost(compiled, own), [50 + 2 * (10 + 36 * 0.5) + 30, 10 + 36 * 0.5])
+
+    # c = (I - A)^-1 own cost over products and materials
+    a = np.zeros((4, 4))
+    a[compiled["bom_parent"], compiled["bom_child"]] = compiled["bom_quantity"]
+    dense = np.linalg.solve(np.eye(4) - a, np.concatenate([own, compiled["material_cost"]]))
+    np.testing.assert_allclose(rolled_unit_cost(compiled, own), dense[:2])
+
+    # By year, with material prices per year
+    by_year = rolled_unit_cost(compiled, np.stack([own, own], axis=-1), True, np.array([[0.5, 1.0], [30.0, 30.0]]))
+    np.testing.assert_allclose(by_year[1], [28.0, 46.0])
+
+
+def test_requirements_explode_sales_through_every_level():
+    production, materials = requirements(_compiled(), np.array([[100.0], [10.0]]))
+    np.testing.assert_allclose(production[:, 0], [100, 210])
+    np.testing.assert_allclose(materials[:, 0], [210 * 36, 100])
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        bom_levels(np.array([0, 1]), np.array([1, 0]), 2)
+    with pytest.raises(ValueError, match="cycle"):
+        _compiled(Bike={"Wheel": 1}, Wheel={"Bike": 1})
@@ -0,0 +1,21 @@
+import numpy as np
+from capacity import capacity_table, machine_utilization, peak_utilization, working_days
+
+
+def test_working_days_per_week_pattern():
+    # 2025 starts on a Wednesday; 2028 is a leap year starting on a Saturday
+    np.testing.assert_array_equal(working_days([2025, 2028], np.array([5, 6, 7])), [[261, 260], [313, 313], [365, 366]])
+
+
+def test_available_hours_from_calendar_and_oee():
+    calendar = {"calendar_days_per_week": np.array([5, 7]), "calendar_shifts_per_day": np.array([2, 3]),
+                "calendar_hours_per_shift": np.array([8, 8]), "calendar_holidays": np.array([10, 0]),
+                "calendar_maintenance_hours": np.array([100, 0]), "calendar_availability": np.array([0.9, 1.0]),
+                "calendar_performance": np.array([0.95, 1.0]), "calendar_quality": np.array([0.99, 1.0])}
+    np.testing.assert_allclose(capacity_table(calendar, [2025]), [[((261 - 10) * 16 - 100) * 0.9 * 0.95 * 0.99], [365 * 24]])
+
+
+# Machines without capacity count as idle for the peak
+def test_peak_utilization():
+    utilization = machine_utilization(np.array([[50.0, 90.0], [10.0, 0.0]]), np.array([[100.0, 100.0], [0.0, 0.0]]))
+    np.testing.assert_allclose(peak_utilization(utilization), [50.0, 90.0])
@@ -0,0 +1,39 @@
+import numpy as np
+from catalog_editor import EQUIPMENT_COLUMNS, apply_catalog_diff, catalog_frame, diff_frames, diff_size
+
+
+def _catalog():
+    return {
+        "equipment": [{"ID": "a", "Name": "Lathe", "Cost": 1000, "Useful Life": 5, "Max Capacity": 100, "Holidays": 12},
+                      {"ID": "b", "Name": "Mill", "Cost": 2000, "Useful Life": 8, "Max Capacity": 50}],
+        "products": [],
+        "cost_drivers": {"Part": {"Equipment Costs": {"Lathe": {"Cost Per Hour": 60.0, "Hours Per Unit": 2.0},
+                                                      "Mill": {"Cost Per Hour": 80.0, "Hours Per Unit": 1.0}}}},
+    }
+
+
+# A grid edit becomes the smallest diff, and applying it keeps the cost drivers
+# in step with renamed and removed machines
+def test_grid_edit_round_trip():
+    catalog = _catalog()
+    original = catalog_frame(catalog["equipment"], EQUIPMENT_COLUMNS)
+    edited = original.copy()
+    edited.loc[0, ["Name", "Holidays"]] = ["CNC Lathe", np.nan]
+    edited = edited.drop(index=1)
+    edited.loc[2, ["Name", "Cost", "Useful Life", "Max Capacity"]] = ["Press", 500, 4, 20]
+
+    diff = diff_frames(original, edited, "ID")
+    assert diff_size(diff) == 3
+    assert diff["deleted"] == ["b"]
+    assert diff["updated"]["a"]["Name"] == "CNC Lathe" and "Holidays" not in diff["updated"]["a"]
+
+    apply_catalog_diff(catalog, "equipment", diff)
+    lathe, press = catalog["equipment"]
+    assert lathe == {"ID": "a", "Name": "CNC Lathe", "Cost": 1000, "Useful Life": 5, "Max Capacity": 100}
+    assert press["Name"] == "Press" and press["ID"] not in ("a", "b")
+    assert catalog["cost_drivers"]["Part"]["Equipment Costs"] == {"CNC Lathe": {"Cost Per Hour": 60.0, "Hours Per Unit": 2.0}}
+
+
+def test_unchanged_grid_has_no_diff():
+    original = catalog_frame(_catalog()["equipment"], EQUIPMENT_COLUMNS)
+    assert diff_size(diff_frames(original, original.copy(), "ID")) == 0
@@ -0,0 +1,40 @@
+import io
+from catalog_import import import_catalog
+
+
+def _catalog():
+    return {"equipment": [{"ID": 1, "Name": "Lathe", "Cost": 1000.0, "Useful Life": 5, "Max Capacity": 100, "Financing": "Cash Purchase"}],
+            "products": [], "cost_drivers": {}}
+
+
+# Rows are validated a chunk at a time; error rows are numbered as in the file
+def test_equipment_import_across_chunks():
+    csv = io.StringIO("name, Cost, Useful Life, Max Capacity, Financing\n"
+                      "Lathe, 2000, 8, 150,\n"
+                      "Mill, abc, 10, 200,\n"
+                      "Press, 5000, 0, 300,\n"
+                      "Drill, 300, 4, 50, FMV Lease\n"
+                      "Drill, 350, 4, 60, Barter\n")
+    catalog = _catalog()
+    report = import_catalog(csv, "equipment", catalog, chunk_rows=2)
+
+    assert (report["rows"], report["inserted"], report["updated"]) == (5, 1, 1)
+    assert report["errors"][["Row", "Column"]].values.tolist() == [[3, "Cost"], [4, "Useful Life"], [6, "Financing"]]
+    lathe, drill = catalog["equipment"]
+    assert (lathe["ID"], lathe["Cost"], lathe["Useful Life"]) == (1, 2000.0, 8)
+    assert (drill["Name"], drill["Cost"], drill["Financing"]) == ("Drill", 300.0, "FMV Lease")
+
+
+def test_product_import_builds_cost_drivers():
+    csv = io.StringIO("Name,Initial Units,Unit Price,Machinist Cost Per Hour,Machinist Hours Per Unit,"
+                      "Lathe - Cost Per Hour,Lathe - Hours Per Unit,Lathe - Setup Hours\n"
+                      "Part,100,50,40,1.5,60,2,3\n"
+                      "Plain,10,5,,,,,\n")
+    catalog = _catalog()
+    report = import_catalog(csv, "products", catalog)
+
+    assert report["errors"].empty and report["inserted"] == 2
+    assert catalog["products"][1]["Growth Rate"] == 0.10  # Default for a missing optional column
+    assert catalog["cost_drivers"] == {"Part": {"Machinist Labor": {"Cost Per Hour": 40.0, "Hours Per Unit": 1.5},
+                                                "Equipment Costs": {"Lathe": {"Cost Per Hour": 60.0, "Hours Per Unit": 2.0,
+                                                                              "Setup Hours": 3.0}}}}
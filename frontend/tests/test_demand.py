@@ -0,0 +1,36 @@
+import numpy as np
+from model_store import compile_model, empty_model
+from demand import capacity_constrained, has_demand, price_demand
+
+YEARS = np.arange(2025, 2028)
+
+
+def _compiled(**demand):
+    model = empty_model()
+    model["equipment"] = [{"ID": 1, "Name": "Lathe", "Cost": 100000, "Useful Life": 10, "Max Capacity": 5000}]
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": 1000, "Unit Price": 90.0, "Growth Rate": 0.1,
+                          "Reference Price": 100.0, **demand},
+                         {"ID": 2, "Name": "Other", "Initial Units": 500, "Unit Price": 50.0, "Growth Rate": 0.0}]
+    model["cost_drivers"] = {"Part": {"Equipment Costs": {"Lathe": {"Cost Per Hour": 50.0, "Hours Per Unit": 1.0}}}}
+    return compile_model(model)
+
+
+def test_demand_follows_the_price_elasticity_up_to_the_market():
+    units = np.array([[1000.0, 1100.0, 1210.0], [500.0, 500.0, 500.0]])
+    elastic = _compiled(**{"Price Elasticity": -2.0})
+    assert has_demand(elastic)
+    np.testing.assert_allclose(price_demand(elastic, units, YEARS)[0], units[0] * 0.9 ** -2)
+    # Products without a demand model keep their volumes
+    np.testing.assert_allclose(price_demand(elastic, units, YEARS)[1], units[1])
+
+    capped = _compiled(**{"Price Elasticity": -2.0, "Market Size": 1300, "Market Growth": 0.05})
+    np.testing.assert_allclose(price_demand(capped, units, YEARS)[0], np.minimum(units[0] * 0.9 ** -2, 1300 * 1.05 ** np.arange(3)))
+    assert not has_demand(_compiled())
+
+
+# Only the products using an overloaded machine are cut back, by the overload ratio
+def test_sales_are_cut_back_to_machine_capacity():
+    compiled = _compiled(**{"Price Elasticity": -1.0})
+    demand = np.array([[1000.0, 2000.0], [500.0, 500.0]])
+    sales = capacity_constrained(compiled, demand, np.array([[1500.0, 1500.0]]))
+    np.testing.assert_allclose(sales, [[1000.0, 1500.0], [500.0, 500.0]])
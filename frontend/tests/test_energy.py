@@ -0,0 +1,42 @@
+import datetime
+import numpy as np
+from energy import TARIFF_BANDS, band_hours, tariff
+
+YEARS = np.array([2025, 2028])
+
+
+# Hour by hour: every working day's shift from its start, Monday to Friday
+def _brute_force(shift_start, shift_hours, year, week_bands):
+    hours = np.zeros(len(TARIFF_BANDS))
+    start_of_year = datetime.datetime(year, 1, 1)
+    day = start_of_year - datetime.timedelta(days=1)
+    while day.year <= year:
+        if day.weekday() < 5:
+            for h in range(shift_hours):
+                t = day + datetime.timedelta(hours=shift_start + h)
+                if t.year == year:
+                    hours[week_bands[t.weekday() * 24 + t.hour]] += 1
+        day += datetime.timedelta(days=1)
+    return hours
+
+
+def test_band_hours_match_an_hourly_count():
+    _, week_bands = tariff({})
+    calendar = {"calendar_days_per_week": np.array([5.0, 5.0]), "calendar_shifts_per_day": np.array([1.0, 1.0]),
+                "calendar_hours_per_shift": np.array([8.0, 8.0]), "calendar_holidays": np.array([0.0, 0.0])}
+    starts = np.array([6.0, 22.0])  # A day shift and a night shift running past midnight
+    hours = band_hours(calendar, starts, week_bands, YEARS)
+    for m, start in enumerate(starts):
+        for y, year in enumerate(YEARS):
+            np.testing.assert_allclose(hours[:, m, y], _brute_force(int(start), 8, int(year), week_bands))
+
+    # 2025 has 261 weekdays; the day shift is off-peak from 6 to 7 and mid-peak after
+    np.testing.assert_allclose(hours[:, 0, 0], [261, 261 * 7, 0])
+
+
+def test_holidays_come_off_the_working_days():
+    _, week_bands = tariff({})
+    calendar = {"calendar_days_per_week": np.array([7.0]), "calendar_shifts_per_day": np.array([3.0]),
+                "calendar_hours_per_shift": np.array([8.0]), "calendar_holidays": np.array([10.0])}
+    hours = band_hours(calendar, np.array([0.0]), week_bands, YEARS[:1])
+    assert hours.sum() == 24 * (365 - 10)
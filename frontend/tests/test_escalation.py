@@ -0,0 +1,39 @@
+import numpy as np
+from model_store import compile_model, empty_model
+from escalation import ESCALATION_CENTERS, LABOR, MATERIALS, SELLING_PRICES, escalation_index, escalation_rates, has_escalation
+from financial_engine import FORECAST_YEARS, forecast
+
+
+def _model(escalation=None):
+    model = empty_model()
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": 100, "Unit Price": 50.0, "Growth Rate": 0.0, "Unit Cost": 20.0}]
+    if escalation is not None:
+        model["assumptions"]["Escalation"] = escalation
+    return model
+
+
+# Years without a rate keep the last one; the index is 1.0 in the first year
+def test_rates_carry_forward_into_a_cumulative_index():
+    rates = escalation_rates({"Labor": {"2026": 0.1, "2028": 0.0}, "Materials": 0.05}, FORECAST_YEARS)
+    np.testing.assert_allclose(rates[LABOR], [0.0, 0.1, 0.1, 0.0, 0.0])
+
+    compiled = compile_model(_model({"Labor": {"2026": 0.1, "2028": 0.0}, "Materials": 0.05}))
+    index = escalation_index(compiled, FORECAST_YEARS)
+    np.testing.assert_allclose(index[LABOR], [1.0, 1.1, 1.21, 1.21, 1.21])
+    np.testing.assert_allclose(index[MATERIALS], 1.05 ** np.arange(len(FORECAST_YEARS)))
+    np.testing.assert_allclose(index[SELLING_PRICES], 1.0)
+    # Later years continue at the last rate
+    np.testing.assert_allclose(escalation_index(compiled, [2025, 2031])[MATERIALS], [1.0, 1.05 ** 6])
+
+
+def test_only_configured_escalation_changes_the_forecast():
+    plain = compile_model(_model())
+    assert not has_escalation(plain)
+    assert not has_escalation(compile_model(_model({center: 0.0 for center in ESCALATION_CENTERS})))
+    assert forecast(plain)["escalation"] is None
+
+    escalated = compile_model(_model({"Materials": 0.1, "Selling Prices": 0.02}))
+    assert has_escalation(escalated)
+    results = forecast(escalated)
+    np.testing.assert_allclose(results["cost"], 100 * 20.0 * 1.1 ** np.arange(len(FORECAST_YEARS)))
+    np.testing.assert_allclose(results["revenue"], 100 * 50.0 * 1.02 ** np.arange(len(FORECAST_YEARS)))
@@ -0,0 +1,77 @@
+import numpy as np
+from model_store import compile_model, empty_model
+from financial_engine import (FORECAST_YEARS, forecast, stack_compiled, statement_lines, equipment_debt, income_statement,
+                              generate_swot_analysis, investor_sanity_check, has_learning, learning_hours)
+
+
+def _model(**product):
+    model = empty_model()
+    model["equipment"] = [{"ID": 1, "Name": "Lathe", "Cost": 400000, "Useful Life": 10, "Max Capacity": 5000}]
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": 1000, "Unit Price": 500.0, "Growth Rate": 0.1,
+                          "Unit Cost": 200.0, **product}]
+    return model
+
+
+# Interest on the equipment debt comes out of pre-tax income; the debt is a liability
+def test_interest_expense_on_equipment_debt():
+    compiled = compile_model(_model())
+    results = forecast(compiled)
+    unlevered = statement_lines(results)
+    levered = statement_lines(results, equipment_debt(compiled, 0.5), 0.08)
+
+    np.testing.assert_allclose(levered["Interest Expense"], 0.5 * 400000 * 0.08)
+    np.testing.assert_allclose(levered["Pre-Tax Income"], unlevered["Pre-Tax Income"] - 16000)
+    np.testing.assert_allclose(levered["Liabilities"] - unlevered["Liabilities"], 200000)
+
+
+def test_interest_rate_per_scenario():
+    compiled = compile_model(_model())
+    results = forecast(stack_compiled([compiled, compiled]))
+    lines = statement_lines(results, np.array([100.0, 100.0]), np.array([[0.05], [0.10]]))
+    np.testing.assert_allclose(lines["Interest Expense"][:, 0], [5.0, 10.0])
+
+
+# The vectorized forecast matches the per-product, per-year loop it replaced
+def test_forecast_matches_compounded_growth():
+    compiled = compile_model(_model())
+    results = forecast(compiled)
+    t = FORECAST_YEARS - FORECAST_YEARS[0]
+    np.testing.assert_allclose(results["product_revenue"][0], 1000 * 1.1 ** t * 500.0)
+    np.testing.assert_allclose(results["revenue"], 1000 * 1.1 ** t * 500.0)
+    np.testing.assert_allclose(results["cost"], 1000 * 1.1 ** t * 200.0)
+
+
+def test_statement_frames_and_swot_helpers():
+    compiled = compile_model(_model())
+    results = forecast(compiled)
+    statement = income_statement(results, ["Part"], statement_lines(results))
+    assert statement["Year"].tolist() == FORECAST_YEARS.tolist()
+    np.testing.assert_allclose(statement["Part Revenue"], results["product_revenue"][0])
+    np.testing.assert_allclose(statement["Gross Profit"], results["revenue"] - results["cost"])
+
+    strengths, weaknesses, opportunities, threats = generate_swot_analysis(results["revenue"], results["cost"], 0.5)
+    assert "Strong revenue-to-cost ratio" in strengths
+    assert 0 <= investor_sanity_check(results["revenue"], results["cost"], 0.5) <= 100
+
+
+# Each doubling of cumulative volume past the reference units multiplies hours
+# by the learning rate; cumulative volume is taken mid-year
+def test_learning_hours_follow_wrights_law():
+    model = _model(**{"Growth Rate": 0.0})
+    del model["products"][0]["Unit Cost"]
+    model["cost_drivers"] = {"Part": {"Equipment Costs": {"Lathe": {"Cost Per Hour": 50.0, "Hours Per Unit": 2.0,
+                                                                    "Learning Rate": 0.8, "Reference Units": 250}}}}
+    compiled = compile_model(model)
+    assert has_learning(compiled)
+    units = np.full((1, len(FORECAST_YEARS)), 1000.0)
+    cumulative = 1000.0 * np.arange(len(FORECAST_YEARS)) + 500.0
+    lathe = compiled["driver_hours"].shape[-1] - 1
+    hours = learning_hours(compiled, units)[0, lathe]
+    np.testing.assert_allclose(hours, 2.0 * 0.8 ** np.log2(cumulative / 250))
+    assert hours[0] == 2.0 * 0.8
+
+    # Below the reference volume hours stay at the standard
+    np.testing.assert_allclose(learning_hours(compiled, np.full((1, 2), 100.0))[0, lathe], 2.0)
+    # The forecast costs the learned hours
+    results = forecast(compiled)
+    np.testing.assert_allclose(results["unit_cost"][0], 50.0 * hours)
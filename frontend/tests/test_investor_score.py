@@ -0,0 +1,25 @@
+import numpy as np
+from investor_score import SCORING_CRITERIA, score_scenarios, scoring_series
+
+LEVERAGE = [criterion["name"] for criterion in SCORING_CRITERIA].index("Leverage")
+
+
+def _lines(ebitda):
+    ebitda = np.asarray(ebitda, dtype=float)
+    return {"Total Revenue": np.full(ebitda.shape, 1000.0), "COGS": np.full(ebitda.shape, 500.0), "EBITDA": ebitda,
+            "Operating Cash Flow": ebitda}
+
+
+def _leverage_points(ebitda, debt):
+    series = scoring_series(_lines(ebitda), np.zeros(np.shape(ebitda)), 0.0, np.asarray(debt, dtype=float))
+    return score_scenarios(series)[1][LEVERAGE]
+
+
+def test_leverage_on_peak_ebitda():
+    np.testing.assert_array_equal(_leverage_points([[100.0, 120.0], [100.0, 120.0]], [400.0, 500.0]), [0, 10])
+
+
+# Debt with EBITDA that never turns positive is the most leveraged case, not the least
+def test_loss_making_plan_with_debt_is_leveraged():
+    ebitda = [[-50.0, -20.0], [0.0, 0.0], [-50.0, -20.0], [10.0, 20.0]]
+    np.testing.assert_array_equal(_leverage_points(ebitda, [1e6, 1.0, 0.0, 50.0]), [10, 10, 0, 0])
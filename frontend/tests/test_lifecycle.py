@@ -0,0 +1,34 @@
+import numpy as np
+from model_store import compile_model, empty_model
+from financial_engine import FORECAST_YEARS, forecast
+
+AGE = FORECAST_YEARS - FORECAST_YEARS[0]
+
+
+def _units(**lifecycle):
+    model = empty_model()
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": 1000, "Unit Price": 10.0, "Growth Rate": 0.1,
+                          "Unit Cost": 5.0, **lifecycle}]
+    return forecast(compile_model(model))["units"][0]
+
+
+# Compound growth counts from the first forecast year; nothing sells before
+# launch or after end of life
+def test_compound_growth_between_launch_and_end_of_life():
+    np.testing.assert_allclose(_units(), 1000 * 1.1 ** AGE)
+    np.testing.assert_allclose(_units(**{"Launch Year": 2026, "End of Life Year": 2028}),
+                               np.where((FORECAST_YEARS >= 2026) & (FORECAST_YEARS <= 2028), 1000 * 1.1 ** AGE, 0.0))
+
+
+# An S-curve ramps to Initial Units over Ramp Years, holds for Plateau Years,
+# then declines by Decline Rate a year
+def test_s_curve_ramp_plateau_and_decline():
+    units = _units(**{"Lifecycle": "S-Curve", "Ramp Years": 2, "Plateau Years": 1, "Decline Rate": 0.2})
+    ramp = 1 / (1 + np.exp(-4 * (AGE - 1)))
+    np.testing.assert_allclose(units, 1000 * ramp * 0.8 ** np.maximum(AGE - 3, 0))
+    assert units[1] == 500.0
+
+
+def test_custom_curve_interpolates_its_points():
+    units = _units(**{"Lifecycle": "Custom", "Custom Curve": "2027: 1.0, 2025: 0.2"})
+    np.testing.assert_allclose(units, [200, 600, 1000, 1000, 1000])
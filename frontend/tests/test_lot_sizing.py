@@ -0,0 +1,41 @@
+import numpy as np
+from model_store import compile_model, empty_model
+from catalog_editor import LABOR_ROLES
+from lot_sizing import economic_lot_sizes
+
+LATHE = len(LABOR_ROLES)
+
+
+# One product on a lathe: setup cost S = 2 h x $50, holding H = 20% x $100
+def _lots(capacity, lot_size=None):
+    model = empty_model()
+    model["equipment"] = [{"ID": 1, "Name": "Lathe", "Cost": 100000, "Useful Life": 10, "Max Capacity": 5000}]
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": 1000, "Unit Price": 200.0, "Growth Rate": 0.0,
+                          **({} if lot_size is None else {"Lot Size": lot_size})}]
+    model["cost_drivers"] = {"Part": {"Equipment Costs": {"Lathe": {"Cost Per Hour": 50.0, "Hours Per Unit": 0.1, "Setup Hours": 2.0}}}}
+    compiled = compile_model(model)
+    demand = np.array([[1000.0]])
+    run_load = np.zeros((compiled["driver_hours"].shape[-1], 1))
+    run_load[LATHE] = 100.0
+    return economic_lot_sizes(compiled, demand, np.array([[100.0]]), run_load, np.array([[capacity]]))
+
+
+def test_economic_lot_size():
+    lots = _lots(capacity=1000.0)
+    # Q* = sqrt(2 x 1000 x 100 / 20)
+    np.testing.assert_allclose(lots["lot_size"], [[100.0]])
+    np.testing.assert_allclose(lots["batches"], [[10.0]])
+    np.testing.assert_allclose(lots["setup_load"][LATHE], [20.0])
+    # Setup cost per unit plus holding the average half lot
+    np.testing.assert_allclose(lots["lot_cost"], [[(10 * 100 + 20 * 100 / 2) / 1000]])
+
+
+# With 10 spare lathe hours the 20 setup hours at Q* do not fit, so lots double
+def test_lots_stretch_to_fit_spare_capacity():
+    lots = _lots(capacity=110.0)
+    np.testing.assert_allclose(lots["lot_size"], [[200.0]])
+    np.testing.assert_allclose(lots["setup_load"][LATHE], [10.0])
+
+
+def test_entered_lot_size_overrides_the_optimizer():
+    np.testing.assert_allclose(_lots(capacity=1000.0, lot_size=250)["batches"], [[4.0]])
@@ -0,0 +1,35 @@
+import contextvars
+import metrics
+from perf import stage
+
+
+def _exposition(model):
+    def record():
+        metrics.set_current_model(model)
+        metrics.observe("model_stage_seconds", 0.003, {"stage": "forecast"})
+        metrics.observe("model_stage_seconds", 0.2, {"stage": "forecast"})
+        metrics.record_cache("compiled", True)
+        metrics.record_cache("compiled", True)
+        metrics.record_cache("compiled", False)
+        with stage("statements"):
+            pass
+        return metrics.render_prometheus()
+    return contextvars.copy_context().run(record)
+
+
+def test_histogram_buckets_cache_ratio_and_stage_timings():
+    text = _exposition('plant "A"\\east')
+    labels = 'model="plant \\"A\\"\\\\east",stage="forecast"'
+    lines = text.splitlines()
+    # Buckets are cumulative: 0.003 s falls in every bucket from 0.005 up
+    assert f'model_stage_seconds_bucket{{{labels},le="0.0025"}} 0' in lines
+    assert f'model_stage_seconds_bucket{{{labels},le="0.005"}} 1' in lines
+    assert f'model_stage_seconds_bucket{{{labels},le="0.25"}} 2' in lines
+    assert f'model_stage_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f'model_stage_seconds_count{{{labels}}} 2' in lines
+    ratio = [line for line in lines if line.startswith("model_cache_hit_ratio") and 'model="plant \\"A\\"\\\\east"' in line]
+    assert len(ratio) == 1 and float(ratio[0].rsplit(" ", 1)[1]) == 2 / 3
+    # perf stages feed the latency histogram
+    assert any(line.startswith("model_stage_seconds_count") and 'stage="statements"' in line and 'plant \\"A\\"' in line
+               for line in lines)
+    assert "# TYPE model_stage_seconds histogram" in lines
@@ -0,0 +1,63 @@
+import asyncio
+import numpy as np
+from model_store import compile_model, empty_model
+from financial_engine import forecast, statement_lines, equipment_debt
+from model_api import ApiError, batch_worker, evaluate_payloads, evaluate_requests
+
+
+def _model(price=500.0):
+    model = empty_model()
+    model["equipment"] = [{"ID": 1, "Name": "Lathe", "Cost": 400000, "Useful Life": 10, "Max Capacity": 5000}]
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": 1000, "Unit Price": price, "Growth Rate": 0.1, "Unit Cost": 200.0}]
+    return model
+
+
+# The API's statements match the app's for the same model and financing
+def test_financing_matches_the_statements_page():
+    model = _model()
+    compiled = compile_model(model)
+    lines = statement_lines(forecast(compiled), equipment_debt(compiled, 0.3), 0.07)
+    response, = evaluate_payloads([{"model": model, "debt_ratio": 0.3, "interest_rate": 0.07}])
+
+    np.testing.assert_allclose(response["income_statement"]["Interest Expense"], lines["Interest Expense"])
+    np.testing.assert_allclose(response["income_statement"]["Net Income"], lines["Net Income"])
+    np.testing.assert_allclose(response["balance_sheet"]["Equity"], lines["Equity"])
+    assert lines["Interest Expense"][0] == 0.3 * 400000 * 0.07
+
+
+def test_batched_requests_keep_their_own_financing():
+    unlevered, levered = evaluate_payloads([{"model": _model(), "debt_ratio": 0.0}, {"model": _model(), "debt_ratio": 1.0}])
+    assert unlevered["income_statement"]["Interest Expense"] == [0.0] * 5
+    assert levered["income_statement"]["Net Income"][0] < unlevered["income_statement"]["Net Income"][0]
+
+
+# One bad request in a batch fails alone, with 400 for invalid input
+def test_invalid_requests_fail_alone():
+    outcomes = evaluate_requests([
+        {"model": _model()},
+        {"model": "not a model"},
+        {"model": _model(), "overrides": {"products": {"Part": "cheaper"}}},
+        ["not", "an", "object"],
+        {"model": _model(), "debt_ratio": 2},
+        {"model": _model(600.0)},
+    ])
+    assert [outcome.status if isinstance(outcome, ApiError) else 200 for outcome in outcomes] == [200, 400, 400, 400, 400, 200]
+    assert outcomes[5]["income_statement"]["Total Revenue"][0] == 600.0 * 1000
+
+
+def test_http_batch_answers_every_request(tmp_path):
+    async def run():
+        queue = asyncio.Queue()
+        worker = asyncio.create_task(batch_worker(queue, str(tmp_path)))
+        futures = []
+        for payload in ({"model": _model()}, {"model": []}, {"model_ref": "missing.json"}):
+            future = asyncio.get_running_loop().create_future()
+            await queue.put((payload, future))
+            futures.append(future)
+        outcomes = await asyncio.gather(*futures, return_exceptions=True)
+        worker.cancel()
+        return outcomes
+
+    ok, invalid, missing = asyncio.run(run())
+    assert ok["years"] == [2025, 2026, 2027, 2028, 2029]
+    assert (invalid.status, missing.status) == (400, 404)
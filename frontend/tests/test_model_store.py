@@ -0,0 +1,15 @@
+import numpy as np
+from model_store import empty_model, load_compiled, save_model
+
+
+# Saving returns the compiled arrays, and loading reads the same arrays back from the sidecar
+def test_save_model_returns_the_sidecar_arrays(tmp_path):
+    model = empty_model()
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": 100, "Unit Price": 50.0, "Growth Rate": 0.1, "Unit Cost": 20.0}]
+    path = str(tmp_path / "model.json")
+    compiled = save_model(path, model)
+    loaded = load_compiled(path)
+
+    assert sorted(compiled) == sorted(loaded)
+    for key, value in compiled.items():
+        np.testing.assert_array_equal(np.asarray(value), loaded[key])
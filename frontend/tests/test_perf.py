@@ -0,0 +1,46 @@
+import contextvars
+import threading
+import perf
+from perf import finish_run, run_scope, stage, start_run
+
+
+def test_stages_after_finish_are_not_added_to_the_logged_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(perf, "PERF_LOG_FILE", str(tmp_path / "performance.log"))
+    run = start_run()
+    with stage("forecast"):
+        pass
+    context = contextvars.copy_context()
+    finish_run("Financial Statements")
+
+    # A background thread still holding the rerun's context
+    def late_stage():
+        with stage("statements"):
+            pass
+    thread = threading.Thread(target=context.run, args=(late_stage,))
+    thread.start()
+    thread.join()
+    assert list(run["stages"]) == ["forecast"]
+    assert perf.STAGE_TOTALS["statements"]["calls"] >= 1
+
+
+def test_run_scope_times_a_rerun_of_its_own_and_joins_an_active_one(tmp_path, monkeypatch):
+    monkeypatch.setattr(perf, "PERF_LOG_FILE", str(tmp_path / "performance.log"))
+
+    @run_scope("Manage Equipment")
+    def fragment():
+        with stage("rendering"):
+            pass
+
+    # Fragment rerun on its own: a run is started and logged
+    logged = []
+    monkeypatch.setattr(perf, "finish_run", lambda page=None: logged.append(page) or finish_run(page))
+    fragment()
+    assert logged == ["Manage Equipment"]
+
+    # Inside a full rerun the fragment's stages join the page's run
+    run = start_run()
+    fragment()
+    assert run["stages"]["rendering"]["calls"] == 1
+    assert not run["finished"]
+    finish_run()
+    assert logged == ["Manage Equipment"]
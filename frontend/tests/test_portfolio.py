@@ -0,0 +1,40 @@
+import numpy as np
+from model_store import empty_model, save_model
+from portfolio import evaluate_portfolio
+
+
+def _plant(tmp_path, name, units, price, unit_cost):
+    model = empty_model()
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": units, "Unit Price": price, "Growth Rate": 0.1, "Unit Cost": unit_cost}]
+    save_model(str(tmp_path / f"{name}.json"), model)
+    return {"Name": name, "Model": f"{name}.json"}
+
+
+# The buyer's own COGS is far smaller than what it buys from the seller
+def test_large_purchase_is_booked_before_it_is_eliminated(tmp_path):
+    portfolio = {
+        "plants": [_plant(tmp_path, "Seller", 10000, 500.0, 200.0), _plant(tmp_path, "Buyer", 10, 100.0, 20.0)],
+        "transfers": [{"From": "Seller", "To": "Buyer", "Product": "Part", "Share": 1.0}],
+    }
+    evaluation = evaluate_portfolio(portfolio, str(tmp_path / "portfolio.json"), workers=1)
+    seller, buyer = evaluation["plants"]
+    consolidated, eliminations = evaluation["consolidated"], evaluation["eliminations"]
+
+    np.testing.assert_allclose(eliminations["Intercompany Sales"], seller["lines"]["Total Revenue"])
+    assert (buyer["lines"]["COGS"] >= eliminations["Intercompany Sales"]).all()
+    assert (consolidated["COGS"] >= 0).all()
+    assert (consolidated["Accounts Payable"] >= 0).all()
+    np.testing.assert_allclose(consolidated["Total Revenue"], buyer["lines"]["Total Revenue"])
+    np.testing.assert_allclose(consolidated["COGS"], seller["lines"]["COGS"] + buyer["lines"]["COGS"] - seller["lines"]["Total Revenue"])
+    # Eliminations cancel out of profit and equity
+    for line in ("Gross Profit", "Equity"):
+        np.testing.assert_allclose(consolidated[line], seller["lines"][line] + buyer["lines"][line])
+
+
+def test_parallel_evaluation_matches_in_process(tmp_path):
+    portfolio = {"plants": [_plant(tmp_path, f"Plant {i}", 100 * (i + 1), 50.0, 30.0) for i in range(3)],
+                 "transfers": [{"From": "Plant 0", "To": "Plant 2", "Product": "Part", "Share": 0.5}]}
+    serial = evaluate_portfolio(portfolio, str(tmp_path / "portfolio.json"), workers=1)
+    parallel = evaluate_portfolio(portfolio, str(tmp_path / "portfolio.json"), workers=3)
+    for line, values in serial["consolidated"].items():
+        np.testing.assert_allclose(parallel["consolidated"][line], values)
@@ -0,0 +1,50 @@
+import threading
+import time
+from recalc import Recalculator
+
+
+def _workers():
+    return [thread for thread in threading.enumerate() if thread.name == "recalculator"]
+
+
+def _wait_for_no_workers(timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while _workers() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return not _workers()
+
+
+def test_worker_exits_when_idle():
+    recalculator = Recalculator(lambda x, check_cancelled: x * 2, debounce=0)
+    assert not _workers()
+    recalculator.request("a", 21)
+    assert recalculator.wait("a", timeout=2) == ("a", 42)
+    assert _wait_for_no_workers()
+    # A later request starts a fresh worker
+    recalculator.request("b", 1)
+    assert recalculator.wait("b", timeout=2) == ("b", 2)
+    assert _wait_for_no_workers()
+
+
+def test_superseded_run_is_abandoned_and_close_stops_the_worker():
+    started, checks = threading.Event(), []
+
+    def compute(x, check_cancelled):
+        started.set()
+        for _ in range(200):
+            time.sleep(0.005)
+            checks.append(x)
+            check_cancelled()
+        return x
+
+    recalculator = Recalculator(compute, debounce=0)
+    recalculator.request("slow", 1)
+    started.wait(2)
+    recalculator.request("fast", 2)
+    assert recalculator.wait("fast", timeout=5) == ("fast", 2)
+    assert checks.count(1) < 200
+
+    recalculator.request("again", 3)
+    recalculator.close()
+    assert _wait_for_no_workers()
+    assert recalculator.result() == ("fast", 2)
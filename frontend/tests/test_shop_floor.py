@@ -0,0 +1,34 @@
+import numpy as np
+from model_store import compile_model, empty_model
+from shop_floor import run_shop_floor, shop_inputs
+
+
+def _model(learning_rate=1.0):
+    model = empty_model()
+    model["equipment"] = [{"ID": 1, "Name": "Lathe", "Cost": 100000, "Useful Life": 10, "Max Capacity": 5000}]
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": 1000, "Unit Price": 100.0, "Growth Rate": 0.5}]
+    model["cost_drivers"] = {"Part": {"Equipment Costs": {"Lathe": {"Cost Per Hour": 50.0, "Hours Per Unit": 0.5,
+                                                                    "Learning Rate": learning_rate}}}}
+    return model
+
+
+# Batches take the learning-adjusted hours of the simulated year
+def test_batch_hours_follow_the_learning_curve():
+    plain, learned = compile_model(_model()), compile_model(_model(0.8))
+
+    def batch_hours(compiled, year_index):
+        return shop_inputs(compiled, year_index, batch_size=10)["products"][0]["batch_hours"][0]
+
+    # The first year runs at the standard hours, later years at fewer
+    assert batch_hours(learned, 0) == batch_hours(plain, 0)
+    assert batch_hours(learned, 3) < 0.9 * batch_hours(plain, 3)
+
+
+def test_replications_run_in_the_calling_process_with_progress():
+    updates = []
+    summary, arrays = run_shop_floor(compile_model(_model()), {"replications": 3, "seed": 7, "batch_size": 50},
+                                     lambda share, message, partial: updates.append((share, partial["replications"])))
+    assert updates == [(1 / 3, 1), (2 / 3, 2), (1.0, 3)]
+    assert summary["replications"] == 3
+    assert arrays["utilization"].shape == (3, 1)
+    assert np.all((arrays["utilization"] > 0) & (arrays["utilization"] <= 100))
@@ -0,0 +1,35 @@
+import numpy as np
+from model_store import compile_model, empty_model
+from financial_engine import forecast, statement_lines
+from simulation import run_monte_carlo, run_sweep
+
+
+def _model(price=500.0):
+    model = empty_model()
+    model["equipment"] = [{"ID": 1, "Name": "Lathe", "Cost": 400000, "Useful Life": 10, "Max Capacity": 5000}]
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": 1000, "Unit Price": price, "Growth Rate": 0.1},
+                         {"ID": 2, "Name": "Other", "Initial Units": 200, "Unit Price": 80.0, "Growth Rate": 0.0, "Unit Cost": 30.0}]
+    model["cost_drivers"] = {"Part": {"Equipment Costs": {"Lathe": {"Cost Per Hour": 60.0, "Hours Per Unit": 2.0}},
+                                      "Machinist Labor": {"Cost Per Hour": 40.0, "Hours Per Unit": 1.5}}}
+    return model
+
+
+# Every swept value, whatever chunk it falls in, matches evaluating the model with that value
+def test_sweep_matches_single_model_evaluations():
+    prices = [300.0, 500.0, 700.0]
+    summary, arrays = run_sweep(compile_model(_model()), {"product": "Part", "field": "Unit Price", "values": prices, "chunk_size": 2},
+                                lambda *args: None)
+    for price, net_income in zip(prices, summary["Net Income"]):
+        lines = statement_lines(forecast(compile_model(_model(price))))
+        np.testing.assert_allclose(net_income, lines["Net Income"].sum())
+
+
+def test_monte_carlo_is_reproducible_from_its_seed():
+    compiled = compile_model(_model())
+    updates = []
+    params = {"n_scenarios": 50, "chunk_size": 20, "seed": 3}
+    summary, arrays = run_monte_carlo(compiled, params, lambda share, message, partial: updates.append(partial["n_scenarios"]))
+    assert updates == [20, 40, 50]
+    assert summary["n_scenarios"] == 50 and arrays["Net Income"].shape == (50, len(summary["years"]))
+    again, _ = run_monte_carlo(compiled, params, lambda *args: None)
+    assert again == summary
@@ -0,0 +1,37 @@
+import numpy as np
+from model_store import compile_model, empty_model
+from catalog_editor import LABOR_ROLES
+from financial_engine import forecast
+from staffing import staffing_plan
+
+MACHINIST = LABOR_ROLES.index("Machinist Labor")
+
+
+# Machinists double every year: 1, 2, 4, 8 and 16 FTEs
+def _plan(lead_months):
+    model = empty_model()
+    model["products"] = [{"ID": 1, "Name": "Part", "Initial Units": 1000, "Unit Price": 100.0, "Growth Rate": 1.0}]
+    model["cost_drivers"] = {"Part": {"Machinist Labor": {"Cost Per Hour": 40.0, "Hours Per Unit": 1.8}}}
+    model["assumptions"]["Staffing"] = {"Machinist Labor": {"Hours Per FTE": 1800.0, "Hiring Lead Months": lead_months}}
+    compiled = compile_model(model)
+    return staffing_plan(compiled, forecast(compiled))
+
+
+def test_hires_over_the_starting_headcount():
+    plan = _plan(0.0)
+    np.testing.assert_allclose(plan["headcount"][MACHINIST], [1, 2, 4, 8, 16])
+    np.testing.assert_allclose(plan["hires"][MACHINIST], [0, 1, 2, 4, 8])
+    np.testing.assert_allclose(plan["requisitions"][MACHINIST], plan["hires"][MACHINIST])
+    np.testing.assert_allclose(plan["labor_cost"][MACHINIST], np.array([1, 2, 4, 8, 16]) * 1800 * 40.0)
+
+
+# An 18-month lead opens half of a year's requisitions one year and half two
+# years earlier; the part that reaches back before the forecast is late
+def test_hiring_lead_is_prorated_within_the_year():
+    plan = _plan(18.0)
+    np.testing.assert_allclose(plan["late_hires"][MACHINIST], 0.5)
+    np.testing.assert_allclose(plan["requisitions"][MACHINIST], [1.5 + 0.5, 3, 6, 4, 0])
+    assert plan["requisitions"][MACHINIST].sum() == plan["hires"][MACHINIST].sum()
+
+    # Whole years move requisitions back whole years
+    np.testing.assert_allclose(_plan(12.0)["requisitions"][MACHINIST], [1, 2, 4, 8, 0])
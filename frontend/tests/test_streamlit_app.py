@@ -0,0 +1,30 @@
+import json
+import os
+from streamlit.testing.v1 import AppTest
+from model_store import empty_model, save_model
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+
+# The save file is read once per session; management pages then work on the
+# session's catalog, and moving between them does not reload or resave it
+def test_management_pages_share_the_session_catalog(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = empty_model()
+    model["equipment"] = [{"ID": "a", "Name": "Lathe", "Cost": 1000, "Useful Life": 5, "Max Capacity": 100}]
+    model["products"] = [{"ID": "p", "Name": "Part", "Initial Units": 100, "Unit Price": 50.0, "Growth Rate": 0.1, "Unit Cost": 20.0}]
+    save_model("financial_model_data.json", model)
+
+    app = AppTest.from_file(APP, default_timeout=60).run()
+    # Edits made outside the session are not picked up mid-session
+    on_disk = json.loads((tmp_path / "financial_model_data.json").read_text())
+    on_disk["equipment"][0]["Name"] = "Changed"
+    (tmp_path / "financial_model_data.json").write_text(json.dumps(on_disk))
+    saved = os.stat("financial_model_data.json").st_mtime_ns
+
+    for page in ["Manage Equipment", "Manage Products", "Manage Equipment"]:
+        app.sidebar.radio[0].set_value(page).run()
+        assert not app.exception
+        assert app.session_state["catalog"]["equipment"][0]["Name"] == "Lathe"
+        assert app.session_state["catalog_revision"] == 0
+    assert os.stat("financial_model_data.json").st_mtime_ns == saved
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from swot_rules import SWOT_RULES, compile_metric, evaluate_rules, flag_counts, swot_lists
+
+
+def test_metric_expressions_reduce_over_years():
+    metric = compile_metric("max(revenue) / min(cost) - first(revenue)")
+    series = {"revenue": np.array([[1.0, 4.0], [2.0, 3.0]]), "cost": np.array([[2.0, 1.0], [1.0, 1.0]])}
+    np.testing.assert_allclose(metric(series), [4.0 - 1.0, 3.0 - 2.0])
+    with pytest.raises(ValueError, match="Unsupported"):
+        compile_metric("__import__('os')")
+
+
+# One flag per rule and scenario; rules reading missing series or NaN metrics never fire
+def test_rules_over_a_scenario_batch():
+    revenue = np.array([[100.0, 300.0], [100.0, 110.0], [0.0, 0.0]])
+    cost = np.array([[50.0, 60.0], [120.0, 105.0], [0.0, 0.0]])
+    flags = evaluate_rules({"revenue": revenue, "cost": cost})
+    assert flags.shape == (len(SWOT_RULES), 3)
+
+    strengths, weaknesses, opportunities, threats = swot_lists(flags[:, 0])
+    assert strengths == ["Strong revenue-to-cost ratio"] and opportunities == ["Strong revenue growth potential"]
+    assert swot_lists(flags[:, 1])[1] == ["Revenue barely covers costs in early years"]
+    assert swot_lists(flags[:, 1])[3] == ["Potential losses in early years"]
+    assert not flags[:, 2].any()
+    # Utilization rules need the utilization series
+    utilization_rules = [i for i, rule in enumerate(SWOT_RULES) if "utilization" in rule["metric"]]
+    assert not flags[utilization_rules].any()
+    assert flag_counts(flags).sum() == flags.sum()
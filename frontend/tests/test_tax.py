@@ -0,0 +1,26 @@
+import numpy as np
+from tax import income_taxes
+
+
+# 100% bonus depreciation turns a pre-tax loss into a bigger tax loss; the
+# deferred tax on it is held back until the model is profitable
+def test_loss_year_with_full_bonus_depreciation():
+    pre_tax = np.array([-100.0, 50.0, 50.0, 50.0])
+    book = np.full(4, 25.0)
+    taxes = income_taxes(pre_tax, book, np.array([100.0, 0.0, 0.0, 0.0]), tax_rate=0.25, loss_carryforward_limit=0.8)
+
+    np.testing.assert_allclose(taxes["loss_carryforward"], [175.0, 115.0, 55.0, 0.0])
+    np.testing.assert_allclose(taxes["taxable_income"], [0.0, 15.0, 15.0, 20.0])
+    assert (taxes["expense"] >= 0).all()
+    assert taxes["expense"][0] == 0
+    # Every timing difference is either recognized or still carried forward
+    np.testing.assert_allclose(np.cumsum(taxes["deferred"]) + taxes["deferred_carryforward"], 0.25 * np.cumsum([75.0, -25.0, -25.0, -25.0]))
+
+
+def test_profitable_years_book_full_deferred_tax():
+    pre_tax = np.array([[100.0, 100.0, 100.0]])
+    taxes = income_taxes(pre_tax, np.full((1, 3), 10.0), np.array([[30.0, 0.0, 0.0]]), tax_rate=np.array([0.2]))
+
+    np.testing.assert_allclose(taxes["deferred"], [[4.0, -2.0, -2.0]])
+    np.testing.assert_allclose(taxes["expense"], 0.2 * pre_tax)
+    np.testing.assert_allclose(taxes["deferred_carryforward"], 0.0)
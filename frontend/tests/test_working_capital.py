@@ -0,0 +1,24 @@
+import numpy as np
+from working_capital import DAYS_PER_YEAR, trailing_balance, working_capital
+
+
+# A window longer than a period reaches back into the one before; the business
+# starts without balances, so nothing comes from before the first period
+def test_trailing_balance_over_partial_and_multiple_periods():
+    flows = np.array([365.0, 730.0])
+    np.testing.assert_allclose(trailing_balance(flows, 45.0, DAYS_PER_YEAR), [45.0, 90.0])
+    np.testing.assert_allclose(trailing_balance(flows, 500.0, DAYS_PER_YEAR), [365.0, 730.0 + 135.0])
+    # Days per product broadcast over a product axis
+    np.testing.assert_allclose(trailing_balance(np.stack([flows, flows]), np.array([0.0, 365.0]), DAYS_PER_YEAR),
+                               [[0.0, 0.0], [365.0, 730.0]])
+
+
+def test_year_end_balances_from_monthly_flows():
+    compiled = {"receivable_days": np.array([73.0]), "inventory_days": np.array([0.0]), "payable_days": np.array([36.5])}
+    revenue, cost = np.array([[1200.0, 2400.0]]), np.array([[600.0, 600.0]])
+    capital = working_capital(compiled, revenue, cost, periods_per_year=12)
+    # Year-end receivables are the last 73 days of the year's revenue, spread evenly
+    np.testing.assert_allclose(capital["receivable"], [240.0, 480.0])
+    np.testing.assert_allclose(capital["payable"], [60.0, 60.0])
+    np.testing.assert_allclose(capital["net"], [180.0, 420.0])
+    np.testing.assert_allclose(capital["change"], [180.0, 240.0])
@@ -0,0 +1,64 @@
+import numpy as np
+
+# Working capital from days outstanding. Each balance is the trailing window
+# of the flow that builds it:
+#
+#   accounts receivable  revenue over the last Receivable Days   (DSO)
+#   inventory            COGS over the last Inventory Days        (DIO)
+#   accounts payable     COGS over the last Payable Days          (DPO)
+#
+# Days are set model-wide in the assumptions and may be overridden per
+# product. Flows are spread evenly within each period, so a window may cover
+# part of a period or reach back over several; with periods_per_year=12 the
+# balances are built month by month and reported at each year end. The
+# business starts without working capital, so the first year's change is the
+# whole build-up.
+
+DAYS_PER_YEAR = 365
+WORKING_CAPITAL_FIELDS = {  # product / assumptions field: default days
+    "Receivable Days": 45.0,
+    "Inventory Days": 60.0,
+    "Payable Days": 30.0,
+}
+WORKING_CAPITAL_KEYS = {field: field.lower().replace(" ", "_") for field in WORKING_CAPITAL_FIELDS}
+
+
+# Balance of a flow over the last days at the end of every period. flows is
+# (..., periods) and days broadcasts against flows[..., 0]. Each window is the
+# difference of the cumulative flow at the period end and, interpolated, at
+# the window start.
+def trailing_balance(flows, days, period_days):
+    n_periods = flows.shape[-1]
+    cumulative = np.concatenate([np.zeros(flows.shape[:-1] + (1,)), np.cumsum(flows, axis=-1)], axis=-1)
+    start = np.maximum(np.arange(1, n_periods + 1) - np.asarray(days, dtype=np.float64)[..., None] / period_days, 0.0)
+    shape = np.broadcast_shapes(cumulative.shape[:-1], start.shape[:-1])
+    cumulative = np.broadcast_to(cumulative, shape + cumulative.shape[-1:])
+    start = np.broadcast_to(start, shape + start.shape[-1:])
+    low = np.floor(start).astype(np.int64)
+    c_low = np.take_along_axis(cumulative, low, axis=-1)
+    c_high = np.take_along_axis(cumulative, np.minimum(low + 1, n_periods), axis=-1)
+    return cumulative[..., 1:] - (c_low + (start - low) * (c_high - c_low))
+
+
+# Year-end balances (..., years) from product revenue and cost (..., products, years)
+def working_capital(compiled, product_revenue, product_cost, periods_per_year=1):
+    if periods_per_year > 1:
+        product_revenue = np.repeat(product_revenue / periods_per_year, periods_per_year, axis=-1)
+        product_cost = np.repeat(product_cost / periods_per_year, periods_per_year, axis=-1)
+    period_days = DAYS_PER_YEAR / periods_per_year
+
+    def balance(flows, key):
+        by_product = trailing_balance(flows, compiled[key], period_days)
+        return by_product.sum(axis=-2)[..., periods_per_year - 1::periods_per_year]
+
+    receivable = balance(product_revenue, "receivable_days")
+    inventory = balance(product_cost, "inventory_days")
+    payable = balance(product_cost, "payable_days")
+    net = receivable + inventory - payable
+    return {
+        "receivable": receivable,
+        "inventory": inventory,
+        "payable": payable,
+        "net": net,
+        "change": np.diff(net, axis=-1, prepend=0.0),
+    }